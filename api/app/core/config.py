@@ -2,7 +2,7 @@
 Configurações da aplicação
 """
 
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -22,6 +22,18 @@ class Settings(BaseSettings):
     # CORS
     ALLOWED_HOSTS: List[str] = ["*"]
     
+    # Execução das otimizações (processos dedicados; None = número de CPUs, 0 = sem processos)
+    OTIMIZACAO_WORKERS: Optional[int] = None
+    
+    # Jobs assíncronos de otimização
+    JOBS_WORKERS: int = 2
+    JOBS_DB_PATH: str = "jobs.db"
+    
+    # Cache de resultados (requisições com `seed` explícita; tamanho 0 desativa)
+    CACHE_TAMANHO: int = 256
+    CACHE_TTL_SEGUNDOS: float = 3600
+    CACHE_DISCO_PATH: Optional[str] = None
+    
     # Configurações do algoritmo genético (padrões)
     DEFAULT_POP_SIZE: int = 20
     DEFAULT_N_GERACOES: int = 80
@@ -13,6 +13,23 @@ MIN_N_GERACOES = 10
 MAX_N_GERACOES = 200
 MIN_TAXA_MUTACAO = 0.01
 MAX_TAXA_MUTACAO = 1.0
+MIN_TAMANHO_TORNEIO = 2
+MAX_TAMANHO_TORNEIO = 10
+MIN_FRACAO_CONSTRUTIVA = 0.0
+MAX_FRACAO_CONSTRUTIVA = 1.0
+MIN_N_ILHAS = 1
+MAX_N_ILHAS = 64
+MIN_ORCAMENTO_BUSCA_LOCAL = 1
+MAX_ORCAMENTO_BUSCA_LOCAL = 10000
+MIN_DIVERSIDADE = 0.0
+MAX_DIVERSIDADE = 0.5
+MIN_FRACAO_IMIGRANTES = 0.0
+MAX_FRACAO_IMIGRANTES = 1.0
+MIN_PESO_FITNESS = 0
+MAX_PESO_FITNESS = 1000000
+
+# Limite de configurações por requisição de otimização em lote
+MAX_TAMANHO_LOTE = 1000
 
 # Limites da configuração de escala
 MIN_CARGA_MAX_SEMANAL = 1
@@ -21,3 +38,7 @@ MIN_FOLGAS_OBRIGATORIAS = 0
 MAX_FOLGAS_OBRIGATORIAS = 7
 MIN_COBERTURA_MINIMA = 1
 MAX_COBERTURA_MINIMA = 10
+
+# Horizonte de planejamento (em semanas, até um trimestre)
+MIN_N_SEMANAS = 1
+MAX_N_SEMANAS = 13
@@ -0,0 +1,72 @@
+"""
+Layout precomputado da escala
+
+Tabelas derivadas de `DIAS_SEMANA` e `TURNOS`, montadas uma única vez (na
+importação, ou no primeiro uso para cada horizonte de `n_semanas`) e
+compartilhadas entre as requisições:
+
+- índices de dias e turnos pelo nome;
+- dias do horizonte (fatia do eixo dos dias) a que cada nome de folga
+  preferida se refere;
+- leitores (`itemgetter`) dos dias e turnos da escala aninhada e os
+  dicionários de turnos de cada código de 3 bits, usados na conversão entre
+  a escala `{id: {dia: {turno: 0/1}}}` e o genoma.
+"""
+
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, NamedTuple, Tuple
+
+from app.core.constants import DIAS_SEMANA, TURNOS
+
+N_DIAS = len(DIAS_SEMANA)
+N_TURNOS = len(TURNOS)
+
+INDICE_DIA_SEMANA: Dict[str, int] = {dia: d for d, dia in enumerate(DIAS_SEMANA)}
+INDICE_TURNO: Dict[str, int] = {turno: t for t, turno in enumerate(TURNOS)}
+
+# Turnos de um dia da escala aninhada, na ordem de TURNOS
+ler_turnos = itemgetter(*TURNOS)
+
+# Dicionário {turno: 0/1} de cada código (bit t = turno t trabalhado)
+TURNOS_POR_CODIGO: Tuple[Dict[str, int], ...] = tuple(
+    {turno: (codigo >> t) & 1 for t, turno in enumerate(TURNOS)}
+    for codigo in range(2 ** N_TURNOS)
+)
+
+
+class Layout(NamedTuple):
+    """Dias de um horizonte de `n_semanas` semanas e as suas tabelas de consulta"""
+    n_semanas: int
+    dias: Tuple[str, ...]
+    indice_dia: Dict[str, int]
+    dias_por_nome: Dict[str, slice]
+
+
+@lru_cache(maxsize=None)
+def layout(n_semanas: int = 1) -> Layout:
+    """
+    Layout do horizonte: os dias da semana, ou `dia_semana` para várias semanas
+
+    Em `dias_por_nome`, um dia da semana (`domingo`) vale para todas as semanas
+    e um dia do horizonte (`domingo_2`) só para ele.
+    """
+    if n_semanas == 1:
+        dias = tuple(DIAS_SEMANA)
+    else:
+        dias = tuple(f"{dia}_{semana + 1}" for semana in range(n_semanas) for dia in DIAS_SEMANA)
+    indice_dia = {dia: d for d, dia in enumerate(dias)}
+    dias_por_nome = {dia: slice(d, d + 1) for dia, d in indice_dia.items()}
+    for dia, d in INDICE_DIA_SEMANA.items():
+        dias_por_nome[dia] = slice(d, None, N_DIAS)
+    return Layout(n_semanas, dias, indice_dia, dias_por_nome)
+
+
+@lru_cache(maxsize=64)
+def _leitor_dias(dias: Tuple[str, ...]) -> itemgetter:
+    return itemgetter(*dias)
+
+
+def ler_dias(dias: List[str]) -> itemgetter:
+    """Leitor dos `dias` (na ordem) de uma linha da escala aninhada"""
+    return _leitor_dias(tuple(dias))
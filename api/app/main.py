@@ -2,11 +2,61 @@
 Arquivo principal da aplicação FastAPI
 """
 
-from fastapi import FastAPI
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 
 from app.core.config import settings
-from app.routers import escalas, configuracao
+from app.routers import escalas, configuracao, jobs, metricas as metricas_router
+from app.services.cache import CacheResultados
+from app.services.jobs import GerenciadorJobs
+from app.services.metricas import metricas
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cria o pool de processos, a fila de jobs e o cache, encerrando-os no desligamento
+    """
+    workers = settings.OTIMIZACAO_WORKERS
+    app.state.executor = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+    # Eventos de cancelamento e filas de progresso compartilhados com o pool
+    app.state.manager = multiprocessing.Manager() if workers != 0 else None
+    
+    app.state.jobs = GerenciadorJobs(
+        settings.JOBS_DB_PATH, settings.JOBS_WORKERS, app.state.executor, app.state.manager
+    )
+    app.state.jobs.iniciar()
+    
+    app.state.cache = None
+    if settings.CACHE_TAMANHO > 0:
+        app.state.cache = CacheResultados(
+            settings.CACHE_TAMANHO, settings.CACHE_TTL_SEGUNDOS, settings.CACHE_DISCO_PATH
+        )
+    
+    yield
+    
+    if app.state.cache is not None:
+        app.state.cache.fechar()
+    app.state.jobs.encerrar()
+    if app.state.executor is not None:
+        app.state.executor.shutdown(cancel_futures=True)
+        app.state.manager.shutdown()
+    app.state.cache = app.state.jobs = app.state.executor = app.state.manager = None
+
+
+def _rota(request: Request) -> str:
+    """Caminho da rota (ex.: `/api/v1/jobs/{job_id}`), para não criar uma série por id"""
+    for rota in request.app.routes:
+        correspondencia, _ = rota.matches(request.scope)
+        if correspondencia == Match.FULL:
+            return rota.path
+    return "desconhecida"
 
 
 def create_application() -> FastAPI:
@@ -19,6 +69,7 @@ def create_application() -> FastAPI:
         version=settings.VERSION,
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
     )
     
     # Configurar CORS
@@ -30,9 +81,21 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Latência de todas as requisições
+    @app.middleware("http")
+    async def medir_latencia(request: Request, call_next):
+        inicio = time.perf_counter()
+        response = await call_next(request)
+        metricas.observar_requisicao(
+            request.method, _rota(request), response.status_code, time.perf_counter() - inicio
+        )
+        return response
+    
     # Incluir routers
     app.include_router(escalas.router, prefix="/api/v1", tags=["escalas"])
     app.include_router(configuracao.router, prefix="/api/v1", tags=["configuracao"])
+    app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
+    app.include_router(metricas_router.router, tags=["metricas"])
     
     return app
 
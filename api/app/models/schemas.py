@@ -2,14 +2,17 @@
 Modelos Pydantic para validação de dados
 """
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Literal, Tuple, Union
 from pydantic import BaseModel, Field
 
 from app.core.constants import (
     MIN_POP_SIZE, MAX_POP_SIZE, MIN_N_GERACOES, MAX_N_GERACOES,
-    MIN_TAXA_MUTACAO, MAX_TAXA_MUTACAO, MIN_CARGA_MAX_SEMANAL,
-    MAX_CARGA_MAX_SEMANAL, MIN_FOLGAS_OBRIGATORIAS, MAX_FOLGAS_OBRIGATORIAS,
-    MIN_COBERTURA_MINIMA, MAX_COBERTURA_MINIMA
+    MIN_TAXA_MUTACAO, MAX_TAXA_MUTACAO, MIN_FRACAO_CONSTRUTIVA, MAX_FRACAO_CONSTRUTIVA,
+    MIN_N_ILHAS, MAX_N_ILHAS, MIN_ORCAMENTO_BUSCA_LOCAL, MAX_ORCAMENTO_BUSCA_LOCAL,
+    MIN_TAMANHO_TORNEIO, MAX_TAMANHO_TORNEIO, MIN_DIVERSIDADE, MAX_DIVERSIDADE, MIN_FRACAO_IMIGRANTES, MAX_FRACAO_IMIGRANTES,
+    MIN_PESO_FITNESS, MAX_PESO_FITNESS,
+    MIN_CARGA_MAX_SEMANAL, MAX_CARGA_MAX_SEMANAL, MIN_FOLGAS_OBRIGATORIAS, MAX_FOLGAS_OBRIGATORIAS,
+    MIN_COBERTURA_MINIMA, MAX_COBERTURA_MINIMA, MIN_N_SEMANAS, MAX_N_SEMANAS
 )
 
 
@@ -19,7 +22,7 @@ class Funcionario(BaseModel):
     nome: str
     preferencias_folga: List[str] = Field(
         default=[], 
-        description="Dias da semana preferidos para folga"
+        description="Dias preferidos para folga (`domingo` vale para todas as semanas, `domingo_2` só para a segunda)"
     )
 
 
@@ -43,10 +46,147 @@ class ParametrosAlgoritmo(BaseModel):
         le=MAX_TAXA_MUTACAO, 
         description="Taxa de mutação"
     )
+    selecao: Literal["torneio", "ranking", "sus"] = Field(
+        default="torneio", 
+        description="Seleção de pais: torneio, ranking linear ou amostragem universal estocástica (sus)"
+    )
+    tamanho_torneio: int = Field(
+        default=3, 
+        ge=MIN_TAMANHO_TORNEIO, 
+        le=MAX_TAMANHO_TORNEIO, 
+        description="Indivíduos em cada torneio (seleção por torneio)"
+    )
+    cruzamento: Literal["uniforme", "funcionario", "dia", "dois_pontos"] = Field(
+        default="uniforme", 
+        description=(
+            "Cruzamento: por bit (uniforme), por linha de funcionário, por dia "
+            "ou em dois pontos da sequência (funcionário, dia)"
+        )
+    )
+    mutacao: Literal["inverter", "trocar", "mover"] = Field(
+        default="inverter", 
+        description=(
+            "Mutação por funcionário: inverter um bit, trocar os turnos de dois dias "
+            "ou mover um turno para outro dia da mesma semana"
+        )
+    )
     usar_elitismo: bool = Field(
         default=False, 
         description="Usar elitismo na evolução"
     )
+    fracao_construtiva: float = Field(
+        default=0.5, 
+        ge=MIN_FRACAO_CONSTRUTIVA, 
+        le=MAX_FRACAO_CONSTRUTIVA, 
+        description="Fração da população inicial gerada pela heurística construtiva (o resto é aleatório)"
+    )
+    busca_local: bool = Field(
+        default=False, 
+        description="Aplicar busca local de reparo ao melhor indivíduo a cada geração"
+    )
+    orcamento_busca_local: int = Field(
+        default=200, 
+        ge=MIN_ORCAMENTO_BUSCA_LOCAL, 
+        le=MAX_ORCAMENTO_BUSCA_LOCAL, 
+        description="Movimentos testados pela busca local em cada geração"
+    )
+    eliminar_duplicados: bool = Field(
+        default=True, 
+        description="Perturbar os filhos cujo genoma repete o de outro indivíduo da população"
+    )
+    diversidade_minima: Optional[float] = Field(
+        default=None, 
+        ge=MIN_DIVERSIDADE, 
+        le=MAX_DIVERSIDADE, 
+        description=(
+            "Diversidade (distância de Hamming média entre pares, como fração dos bits) "
+            "abaixo da qual os piores indivíduos são substituídos por imigrantes aleatórios"
+        )
+    )
+    fracao_imigrantes: float = Field(
+        default=0.2, 
+        gt=MIN_FRACAO_IMIGRANTES, 
+        le=MAX_FRACAO_IMIGRANTES, 
+        description="Fração da população substituída por imigrantes quando a diversidade colapsa"
+    )
+    fitness_alvo: Optional[int] = Field(
+        default=None, 
+        ge=0, 
+        description=(
+            "Parar quando o melhor fitness (ponderado por `pesos`) chegar a este valor; "
+            "com os pesos padrão, 0 significa nenhuma violação"
+        )
+    )
+    geracoes_sem_melhora: Optional[int] = Field(
+        default=None, 
+        ge=1, 
+        description="Parar após este número de gerações sem melhora do melhor fitness"
+    )
+    tempo_max_segundos: Optional[float] = Field(
+        default=None, 
+        gt=0, 
+        description="Tempo máximo de execução em segundos"
+    )
+    n_ilhas: int = Field(
+        default=1, 
+        ge=MIN_N_ILHAS, 
+        le=MAX_N_ILHAS, 
+        description="Número de subpopulações (ilhas), cada uma em um processo"
+    )
+    intervalo_migracao: int = Field(
+        default=10, 
+        ge=1, 
+        description="Gerações entre migrações de indivíduos entre as ilhas"
+    )
+    n_migrantes: int = Field(
+        default=2, 
+        ge=1, 
+        description="Número de melhores indivíduos enviados a cada migração"
+    )
+    seed: Optional[int] = Field(
+        default=None, 
+        ge=0, 
+        description="Semente aleatória para execuções reprodutíveis (sorteada se omitida)"
+    )
+    solver: Literal["genetico", "exato", "cpsat", "branch_and_bound"] = Field(
+        default="genetico", 
+        description=(
+            "Backend de resolução: algoritmo genético ou exato (CP-SAT, se instalado, "
+            "ou branch and bound), limitado por tempo_max_segundos"
+        )
+    )
+    diagnostico: bool = Field(
+        default=False, 
+        description="Incluir no resultado os tempos por fase e os contadores da execução"
+    )
+
+
+class PesosFitness(BaseModel):
+    """Modelo para os pesos dos termos do fitness (o padrão conta só as violações)"""
+    violacao: int = Field(
+        default=1, 
+        ge=1, 
+        le=MAX_PESO_FITNESS, 
+        description="Peso de cada unidade de violação (turno acima da carga, folga ou funcionário faltando)"
+    )
+    preferencia_folga: int = Field(
+        default=0, 
+        ge=MIN_PESO_FITNESS, 
+        le=MAX_PESO_FITNESS, 
+        description="Peso de cada dia de folga preferido em que o funcionário trabalha"
+    )
+    carga_desigual: int = Field(
+        default=0, 
+        ge=MIN_PESO_FITNESS, 
+        le=MAX_PESO_FITNESS, 
+        description="Peso de cada turno semanal acima da carga equilibrada entre os funcionários"
+    )
+    noites_seguidas: int = Field(
+        default=0, 
+        ge=MIN_PESO_FITNESS, 
+        le=MAX_PESO_FITNESS, 
+        description="Peso de cada par de noites consecutivas trabalhadas"
+    )
 
 
 class ConfiguracaoEscala(BaseModel):
@@ -70,13 +210,57 @@ class ConfiguracaoEscala(BaseModel):
         le=MAX_COBERTURA_MINIMA, 
         description="Mínimo de funcionários por turno"
     )
+    n_semanas: int = Field(
+        default=1, 
+        ge=MIN_N_SEMANAS, 
+        le=MAX_N_SEMANAS, 
+        description="Horizonte de planejamento em semanas; carga e folgas valem para cada semana"
+    )
+    proibir_noite_manha: bool = Field(
+        default=False, 
+        description="Proibir o turno da manhã logo após um turno da noite, inclusive entre semanas"
+    )
+    pesos: PesosFitness = Field(
+        default=PesosFitness(), 
+        description="Pesos das violações e dos critérios suaves no fitness"
+    )
     parametros: Optional[ParametrosAlgoritmo] = None
+    escala_inicial: Optional[Dict[int, Dict[str, Dict[str, int]]]] = Field(
+        default=None, 
+        description="Escala anterior usada como ponto de partida da otimização"
+    )
+    funcionarios_congelados: List[int] = Field(
+        default=[], 
+        description="Funcionários cujas linhas da escala inicial não podem mudar"
+    )
+
+
+class ReplanejamentoEscala(ConfiguracaoEscala):
+    """Modelo para replanejamento incremental a partir de uma escala anterior"""
+    funcionarios_alterados: List[int] = Field(
+        default=[], 
+        description="Funcionários adicionados ou com preferências alteradas"
+    )
+    congelar_inalterados: bool = Field(
+        default=True, 
+        description="Manter fixas as linhas dos funcionários não alterados"
+    )
 
 
 class EscalaCompleta(BaseModel):
     """Modelo para escala completa"""
     escala: Dict[int, Dict[str, Dict[str, int]]]
     funcionarios: List[Funcionario]
+    n_semanas: int = Field(
+        default=1, 
+        ge=MIN_N_SEMANAS, 
+        le=MAX_N_SEMANAS, 
+        description="Horizonte da escala em semanas"
+    )
+    proibir_noite_manha: bool = Field(
+        default=False, 
+        description="Verificar turnos da manhã logo após um turno da noite"
+    )
     
     model_config = {
         "json_schema_extra": {
@@ -150,15 +334,101 @@ class EscalaCompleta(BaseModel):
     }
 
 
+class DiagnosticoOtimizacao(BaseModel):
+    """Modelo para os tempos por fase e contadores de uma otimização"""
+    tempos_fases: Dict[str, float] = Field(
+        description="Tempo total (s) em cada fase: inicializacao, avaliacao, selecao, cruzamento, mutacao, ..."
+    )
+    num_avaliacoes: int
+    avaliacoes_por_segundo: float
+    tempo_medio_geracao: float = Field(description="Tempo médio (s) por geração")
+    duplicados_substituidos: int = Field(
+        default=0, 
+        description="Filhos perturbados por repetirem o genoma de outro indivíduo"
+    )
+    imigrantes_inseridos: int = Field(
+        default=0, 
+        description="Indivíduos substituídos por imigrantes ao cair abaixo de diversidade_minima"
+    )
+
+
+FormatoEscala = Literal["json", "bitmask", "atribuicoes"]
+
+
 class ResultadoOtimizacao(BaseModel):
-    """Modelo para resultado da otimização"""
-    escala_otimizada: Dict[int, Dict[str, Dict[str, int]]]
+    """Modelo para resultado da otimização (a escala vem em um dos três formatos)"""
+    escala_otimizada: Optional[Dict[int, Dict[str, Dict[str, int]]]] = Field(
+        default=None, 
+        description="Escala aninhada {id: {dia: {turno: 0/1}}} (formato json)"
+    )
+    escala_bitmask: Optional[str] = Field(
+        default=None, 
+        description="Bitmap em base64 com as linhas dos funcionários, na ordem da requisição (formato bitmask)"
+    )
+    atribuicoes: Optional[List[Tuple[int, str, str]]] = Field(
+        default=None, 
+        description="Turnos trabalhados como [id, dia, turno] (formato atribuicoes)"
+    )
     num_violacoes: int
     evolucao_fitness: List[int]
+    evolucao_diversidade: List[float] = Field(
+        default=[], 
+        description="Diversidade da população (distância de Hamming média, fração dos bits) a cada geração"
+    )
     tempo_execucao: float
+    num_avaliacoes: int = Field(description="Número de indivíduos avaliados")
+    geracoes_executadas: int
+    criterio_parada: Literal[
+        "n_geracoes", "fitness_alvo", "geracoes_sem_melhora", "tempo_max_segundos", "cancelado", "otimo"
+    ] = Field(description="Critério que encerrou a evolução")
+    solver: str = Field(
+        default="genetico", 
+        description="Backend que produziu a escala"
+    )
+    otimo_provado: Optional[bool] = Field(
+        default=None, 
+        description="A escala tem comprovadamente o menor número de violações possível"
+    )
+    gap: Optional[int] = Field(
+        default=None, 
+        description="Diferença entre as violações da escala e o limite inferior provado"
+    )
+    cache_hit: bool = Field(
+        default=False, 
+        description="Resultado reaproveitado de uma requisição idêntica"
+    )
+    seed_utilizada: Optional[int] = Field(
+        default=None, 
+        description="Semente da execução; reenviá-la em parametros.seed reproduz o resultado"
+    )
+    diagnostico: Optional[DiagnosticoOtimizacao] = Field(
+        default=None, 
+        description="Tempos por fase e contadores (com parametros.diagnostico)"
+    )
     parametros_utilizados: ParametrosAlgoritmo
 
 
+class JobCriado(BaseModel):
+    """Modelo para resposta da submissão de um job"""
+    id: str
+    status: str
+
+
+class StatusJob(BaseModel):
+    """Modelo para o estado de um job de otimização"""
+    id: str
+    status: Literal["na_fila", "executando", "concluido", "cancelado", "erro"]
+    geracao_atual: int = Field(description="Última geração concluída")
+    melhor_fitness: Optional[int] = Field(
+        default=None, 
+        description="Melhor fitness encontrado até agora"
+    )
+    resultado: Optional[ResultadoOtimizacao] = None
+    erro: Optional[str] = None
+    criado_em: str
+    atualizado_em: str
+
+
 class ValidacaoEscala(BaseModel):
     """Modelo para resultado da validação"""
     escala_valida: bool
@@ -167,6 +437,57 @@ class ValidacaoEscala(BaseModel):
     estatisticas: Dict[str, Any]
 
 
+class ValidacaoLote(BaseModel):
+    """Modelo para validação de muitas escalas em formato compacto"""
+    funcionarios: List[Funcionario]
+    escalas: List[Union[str, List[int]]] = Field(
+        description=(
+            "Cada escala é uma lista com um inteiro de 21 bits por semana para cada "
+            "funcionário (bit dia * 3 + turno, dia no horizonte) ou um bitmap em base64"
+        )
+    )
+    carga_max_semanal: int = Field(
+        default=6, 
+        ge=MIN_CARGA_MAX_SEMANAL, 
+        le=MAX_CARGA_MAX_SEMANAL, 
+        description="Máximo de turnos por semana"
+    )
+    folgas_obrigatorias: int = Field(
+        default=1, 
+        ge=MIN_FOLGAS_OBRIGATORIAS, 
+        le=MAX_FOLGAS_OBRIGATORIAS, 
+        description="Mínimo de folgas por semana"
+    )
+    cobertura_minima: int = Field(
+        default=2, 
+        ge=MIN_COBERTURA_MINIMA, 
+        le=MAX_COBERTURA_MINIMA, 
+        description="Mínimo de funcionários por turno"
+    )
+    n_semanas: int = Field(
+        default=1, 
+        ge=MIN_N_SEMANAS, 
+        le=MAX_N_SEMANAS, 
+        description="Horizonte das escalas em semanas"
+    )
+    proibir_noite_manha: bool = Field(
+        default=False, 
+        description="Verificar turnos da manhã logo após um turno da noite"
+    )
+    detalhes: bool = Field(
+        default=False, 
+        description="Incluir violações e estatísticas de cada escala"
+    )
+
+
+class ResultadoValidacaoLote(BaseModel):
+    """Modelo para resultado da validação em lote"""
+    num_escalas: int
+    num_validas: int
+    num_violacoes: List[int]
+    detalhes: Optional[List[ValidacaoEscala]] = None
+
+
 class ErrorResponse(BaseModel):
     """Modelo para resposta de erro"""
     error: str
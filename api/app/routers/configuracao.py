@@ -24,6 +24,12 @@ async def exemplo_configuracao():
         "carga_max_semanal": 6,
         "folgas_obrigatorias": 1,
         "cobertura_minima": 2,
+        "pesos": {
+            "violacao": 1000,
+            "preferencia_folga": 1,
+            "carga_desigual": 1,
+            "noites_seguidas": 1
+        },
         "parametros": {
             "pop_size": 30,
             "n_geracoes": 100,
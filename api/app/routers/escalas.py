@@ -2,23 +2,110 @@
 Router para endpoints relacionados a escalas
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import functools
+import json
+import queue
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+from starlette.background import BackgroundTask
 
-from app.core.constants import DIAS_SEMANA, TURNOS
+from app.core.constants import DIAS_SEMANA, MAX_TAMANHO_LOTE, TURNOS
 from app.models.schemas import (
     ConfiguracaoEscala, 
     EscalaCompleta, 
+    FormatoEscala, 
+    ReplanejamentoEscala, 
     ResultadoOtimizacao, 
-    ValidacaoEscala
+    ResultadoValidacaoLote, 
+    ValidacaoEscala, 
+    ValidacaoLote
 )
-from app.services.genetic_algorithm import EscalaGeneticaService
+from app.services import genoma
+from app.services.cache import chave_configuracao
+from app.services.genetic_algorithm import EscalaGeneticaService, executar_otimizacao, transmitir_otimizacao
+from app.services.metricas import metricas
+from app.services.serializacao import codificar_json, formato_da_requisicao, resposta_resultado
 
 router = APIRouter()
 
 
+def validar_configuracao(config: ConfiguracaoEscala) -> None:
+    """Validações básicas de uma configuração antes de otimizá-la"""
+    if len(config.funcionarios) == 0:
+        raise HTTPException(
+            status_code=400, 
+            detail="Lista de funcionários não pode estar vazia"
+        )
+    
+    if config.carga_max_semanal > len(DIAS_SEMANA) * len(TURNOS):
+        raise HTTPException(
+            status_code=400, 
+            detail="Carga máxima semanal excede turnos disponíveis"
+        )
+    
+    if config.parametros and config.parametros.solver == "cpsat":
+        from app.services.solvers import cpsat_disponivel
+        
+        if not cpsat_disponivel():
+            raise HTTPException(
+                status_code=400, 
+                detail="Solver 'cpsat' requer o pacote ortools instalado"
+            )
+
+
+# Formato da escala na resposta, por parâmetro (tem prioridade) ou cabeçalho Accept
+QUERY_FORMATO = Query(
+    default=None, 
+    description=(
+        "Formato da escala: json (aninhada), bitmask (base64) ou atribuicoes ([id, dia, turno]); "
+        "também pode ser pedido por Accept: application/vnd.escalas.<formato>+json"
+    )
+)
+
+
+async def _executar_otimizacao(
+    config: ConfiguracaoEscala, request: Request, formato: str = "json"
+) -> Dict[str, Any]:
+    """Executa a otimização no pool de processos, passando antes pelo cache"""
+    # Reaproveitar o resultado de uma requisição idêntica (no mesmo formato)
+    cache = getattr(request.app.state, "cache", None)
+    chave = chave_configuracao(config) if cache is not None else None
+    if chave is not None:
+        chave = f"{chave}:{formato}"
+        resultado = cache.obter(chave)
+        if resultado is not None:
+            metricas.incrementar("escalas_cache_hits_total")
+            return {**resultado, "cache_hit": True}
+    
+    # Executar otimização fora do event loop (pool de processos, se configurado); o
+    # resultado já vem validado e no formato pedido, e é devolvido sem nova validação
+    executor = getattr(request.app.state, "executor", None)
+    loop = asyncio.get_running_loop()
+    with metricas.otimizacao_em_andamento():
+        resultado = await loop.run_in_executor(
+            executor, functools.partial(executar_otimizacao, config.model_dump(), formato=formato)
+        )
+    resultado = metricas.registrar_otimizacao(resultado)
+    
+    if chave is not None:
+        cache.guardar(chave, resultado)
+    
+    return resultado
+
+
 @router.post("/otimizar", response_model=ResultadoOtimizacao)
-async def otimizar_escala(config: ConfiguracaoEscala):
+async def otimizar_escala(
+    config: ConfiguracaoEscala, 
+    request: Request, 
+    formato: Optional[FormatoEscala] = QUERY_FORMATO, 
+    accept: Optional[str] = Header(default=None),
+):
     """
     Gera uma escala de trabalho otimizada usando algoritmo genético
     
@@ -26,36 +113,21 @@ async def otimizar_escala(config: ConfiguracaoEscala):
     - **carga_max_semanal**: Máximo de turnos por funcionário por semana
     - **folgas_obrigatorias**: Mínimo de folgas por funcionário por semana
     - **cobertura_minima**: Mínimo de funcionários necessários por turno
+    - **n_semanas**: Horizonte de planejamento (1 a 13 semanas); com mais de uma semana
+      os dias da escala são nomeados `segunda_1`, ..., `domingo_N`
+    - **proibir_noite_manha**: Proíbe a manhã logo após uma noite, inclusive entre semanas
     - **parametros**: Configurações do algoritmo genético (opcional)
+    
+    Requisições idênticas com `parametros.seed` definida são respondidas pelo cache.
+    Para escalas grandes, **formato** `bitmask` ou `atribuicoes` reduz a resposta.
     """
+    # Validações básicas
+    validar_configuracao(config)
+    formato = formato_da_requisicao(formato, accept)
+    
     try:
-        # Validações básicas
-        if len(config.funcionarios) == 0:
-            raise HTTPException(
-                status_code=400, 
-                detail="Lista de funcionários não pode estar vazia"
-            )
-        
-        if config.carga_max_semanal > len(DIAS_SEMANA) * len(TURNOS):
-            raise HTTPException(
-                status_code=400, 
-                detail="Carga máxima semanal excede turnos disponíveis"
-            )
-        
-        # Executar otimização
-        service = EscalaGeneticaService(config)
-        escala_otimizada, evolucao, tempo = service.otimizar()
-        
-        # Avaliar resultado final
-        num_violacoes = service.avaliar_individuo(escala_otimizada)
-        
-        return ResultadoOtimizacao(
-            escala_otimizada=escala_otimizada,
-            num_violacoes=num_violacoes,
-            evolucao_fitness=evolucao,
-            tempo_execucao=tempo,
-            parametros_utilizados=service.params
-        )
+        resultado = await _executar_otimizacao(config, request, formato)
+        return resposta_resultado(resultado, formato)
         
     except Exception as e:
         raise HTTPException(
@@ -64,6 +136,174 @@ async def otimizar_escala(config: ConfiguracaoEscala):
         )
 
 
+async def _otimizar_item_lote(
+    indice: int, dados: Dict[str, Any], request: Request, formato: str
+) -> Tuple[int, str]:
+    """Otimiza um item do lote, devolvendo a linha NDJSON do resultado ou do erro"""
+    try:
+        config = ConfiguracaoEscala.model_validate(dados)
+        validar_configuracao(config)
+        resultado = await _executar_otimizacao(config, request, formato)
+        return indice, codificar_json({"indice": indice, "resultado": resultado}).decode() + "\n"
+    except HTTPException as e:
+        erro = e.detail
+    except Exception as e:
+        erro = str(e)
+    return indice, json.dumps({"indice": indice, "erro": erro}, ensure_ascii=False) + "\n"
+
+
+@router.post("/otimizar/lote")
+async def otimizar_lote(
+    configuracoes: List[Dict[str, Any]], 
+    request: Request, 
+    formato: Optional[FormatoEscala] = QUERY_FORMATO, 
+    accept: Optional[str] = Header(default=None),
+):
+    """
+    Otimiza várias escalas (por exemplo, uma por loja ou equipe) em paralelo
+    
+    Recebe uma lista de `ConfiguracaoEscala` e responde em NDJSON, uma linha por
+    configuração assim que ela termina: `{"indice": i, "resultado": {...}}` ou
+    `{"indice": i, "erro": "..."}`. Erros de um item não afetam os demais.
+    """
+    if len(configuracoes) > MAX_TAMANHO_LOTE:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"O lote excede o limite de {MAX_TAMANHO_LOTE} configurações"
+        )
+    formato = formato_da_requisicao(formato, accept)
+    
+    async def linhas() -> AsyncIterator[str]:
+        tarefas = [
+            asyncio.ensure_future(_otimizar_item_lote(i, dados, request, formato))
+            for i, dados in enumerate(configuracoes)
+        ]
+        try:
+            for tarefa in asyncio.as_completed(tarefas):
+                _, linha = await tarefa
+                yield linha
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+    
+    return StreamingResponse(linhas(), media_type="application/x-ndjson")
+
+
+@router.post("/replanejar", response_model=ResultadoOtimizacao)
+async def replanejar_escala(
+    dados: ReplanejamentoEscala, 
+    request: Request, 
+    formato: Optional[FormatoEscala] = QUERY_FORMATO, 
+    accept: Optional[str] = Header(default=None),
+):
+    """
+    Replaneja uma escala após mudanças pequenas na equipe
+    
+    - **escala_inicial**: Escala anterior (obrigatória), usada para semear a população
+    - **funcionarios_alterados**: Funcionários adicionados ou com preferências alteradas
+    - **congelar_inalterados**: Mantém fixas as linhas dos demais funcionários
+    
+    Funcionários removidos são descartados e os novos recebem linhas aleatórias.
+    """
+    if not dados.escala_inicial:
+        raise HTTPException(
+            status_code=400, 
+            detail="Escala inicial é obrigatória para replanejamento"
+        )
+    validar_configuracao(dados)
+    
+    config = ConfiguracaoEscala.model_validate(
+        dados.model_dump(exclude={"funcionarios_alterados", "congelar_inalterados"})
+    )
+    if dados.congelar_inalterados:
+        alterados = set(dados.funcionarios_alterados)
+        config.funcionarios_congelados = [
+            f.id for f in dados.funcionarios
+            if f.id not in alterados and f.id in dados.escala_inicial
+        ]
+    
+    formato = formato_da_requisicao(formato, accept)
+    try:
+        resultado = await _executar_otimizacao(config, request, formato)
+        return resposta_resultado(resultado, formato)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Erro no replanejamento: {str(e)}"
+        )
+
+
+# Intervalo (s) de espera por um novo evento de geração antes de verificar se a otimização acabou
+INTERVALO_EVENTOS = 0.1
+
+
+def _proximo_evento(fila: "queue.Queue[Dict]") -> Optional[Dict]:
+    """Espera (em uma thread) o próximo evento de geração, ou None após `INTERVALO_EVENTOS`"""
+    try:
+        return fila.get(timeout=INTERVALO_EVENTOS)
+    except queue.Empty:
+        return None
+
+
+async def _eventos_otimizacao(config: Dict, request: Request) -> AsyncIterator[str]:
+    """
+    Eventos SSE da otimização: um por geração e o resultado final
+
+    A evolução roda no pool de processos (ou, sem ele, em uma thread) e envia o
+    progresso por uma fila. Se o cliente desconecta, o gerador é fechado (pelo
+    cancelamento ou pela tarefa de fundo da resposta): a otimização deixa de
+    contar como em andamento na hora, e a evolução para ao fim da geração que
+    estiver rodando.
+    """
+    executor = getattr(request.app.state, "executor", None)
+    manager = getattr(request.app.state, "manager", None)
+    if executor is not None and manager is not None:
+        cancelamento, fila = manager.Event(), manager.Queue()
+    else:
+        executor, cancelamento, fila = None, threading.Event(), queue.Queue()
+    
+    loop = asyncio.get_running_loop()
+    with metricas.otimizacao_em_andamento():
+        try:
+            tarefa = loop.run_in_executor(executor, transmitir_otimizacao, config, cancelamento, fila)
+            while True:
+                # Tarefa concluída antes da espera: todos os eventos já estão na fila
+                terminou = tarefa.done()
+                evento = await loop.run_in_executor(None, _proximo_evento, fila)
+                if evento is not None:
+                    yield f"event: geracao\ndata: {json.dumps(evento)}\n\n"
+                elif terminou:
+                    break
+            resultado = await tarefa
+        finally:
+            cancelamento.set()
+    resultado = ResultadoOtimizacao(**metricas.registrar_otimizacao(resultado))
+    yield f"event: resultado\ndata: {resultado.model_dump_json()}\n\n"
+
+
+@router.post("/otimizar/stream")
+async def otimizar_escala_stream(config: ConfiguracaoEscala, request: Request):
+    """
+    Otimiza a escala enviando o progresso de cada geração via Server-Sent Events
+    
+    - Evento **geracao**: `geracao`, `melhor_fitness`, `media_fitness`, `tempo_decorrido` e `diversidade`
+    - Evento **resultado**: o `ResultadoOtimizacao` final
+    
+    Fechar a conexão interrompe a evolução, permitindo parar assim que o fitness
+    for satisfatório.
+    """
+    validar_configuracao(config)
+    eventos = _eventos_otimizacao(config.model_dump(), request)
+    
+    # A tarefa de fundo roda também quando o cliente desconecta e fecha os eventos
+    return StreamingResponse(
+        eventos,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=BackgroundTask(eventos.aclose),
+    )
+
+
 @router.post("/validar", response_model=ValidacaoEscala)
 async def validar_escala(dados: EscalaCompleta):
     """
@@ -71,17 +311,21 @@ async def validar_escala(dados: EscalaCompleta):
     
     - **escala**: Escala completa para validação (dict com id do funcionário como chave)
     - **funcionarios**: Lista de funcionários correspondente        
+    - **n_semanas**: Horizonte da escala; com mais de uma semana os dias são `segunda_1`, ...
     """
     try:
         # Criar configuração temporária para validação
-        config_temp = ConfiguracaoEscala(funcionarios=dados.funcionarios)
+        config_temp = ConfiguracaoEscala(
+            funcionarios=dados.funcionarios,
+            n_semanas=dados.n_semanas,
+            proibir_noite_manha=dados.proibir_noite_manha,
+        )
         service = EscalaGeneticaService(config_temp)
         
-        # Verificar violações
-        violacoes = service.checar_restricoes(dados.escala)
-        
-        # Calcular estatísticas
-        estatisticas = service.calcular_estatisticas(dados.escala)
+        # Verificar violações e calcular estatísticas em uma única passada
+        individuo = genoma.de_dict(dados.escala, service.ids_funcionarios, service.nomes_dias)
+        _, relatorios = service.validar_lote(individuo[None], detalhes=True)
+        violacoes, estatisticas = relatorios[0]
         
         return ValidacaoEscala(
             escala_valida=len(violacoes) == 0,
@@ -95,3 +339,94 @@ async def validar_escala(dados: EscalaCompleta):
             status_code=500, 
             detail=f"Erro na validação: {str(e)}"
         )
+
+
+def _decodificar_escalas(dados: ValidacaoLote) -> np.ndarray:
+    """Decodifica as escalas compactas do lote em um único array de genomas"""
+    n_funcionarios = len(dados.funcionarios)
+    n_dias = genoma.N_DIAS * dados.n_semanas
+    n_bits = n_dias * genoma.N_TURNOS
+    escalas = np.zeros((len(dados.escalas), n_funcionarios, n_dias, genoma.N_TURNOS), dtype=bool)
+    indices_mascaras = [i for i, escala in enumerate(dados.escalas) if not isinstance(escala, str)]
+    
+    for i, escala in enumerate(dados.escalas):
+        if isinstance(escala, str):
+            try:
+                escalas[i] = genoma.de_base64(escala, n_funcionarios, n_dias)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Escala {i}: {e}")
+        elif len(escala) != n_funcionarios:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Escala {i}: esperado um inteiro por funcionário ({n_funcionarios})"
+            )
+    
+    if indices_mascaras:
+        erro_mascaras = HTTPException(
+            status_code=400, 
+            detail=f"Máscaras devem ser inteiros de 0 a 2^{n_bits} - 1"
+        )
+        if dados.n_semanas > 1:
+            # Mais de 63 bits: inteiros do Python, convertidos byte a byte
+            mascaras = [mascara for i in indices_mascaras for mascara in dados.escalas[i]]
+            if any(mascara < 0 or mascara >> n_bits for mascara in mascaras):
+                raise erro_mascaras
+            escalas[indices_mascaras] = genoma.de_inteiros(mascaras, n_dias).reshape(
+                len(indices_mascaras), n_funcionarios, n_dias, genoma.N_TURNOS
+            )
+            return escalas
+        
+        try:
+            valores = np.array([dados.escalas[i] for i in indices_mascaras], dtype=np.int64)
+        except (OverflowError, ValueError):
+            # Inteiros que não cabem em 64 bits
+            raise erro_mascaras
+        if ((valores < 0) | (valores >> n_bits != 0)).any():
+            raise erro_mascaras
+        escalas[indices_mascaras] = genoma.de_bitmasks(valores)
+    
+    return escalas
+
+
+@router.post("/validar/lote", response_model=ResultadoValidacaoLote)
+async def validar_lote(dados: ValidacaoLote):
+    """
+    Valida muitas escalas de uma vez, recebidas em formato compacto
+    
+    Cada escala é uma lista com um inteiro de 21 bits por semana para cada
+    funcionário (bit `dia * 3 + turno`, do menos significativo, com os dias de
+    todas as `n_semanas`) ou um bitmap em base64 com as linhas dos funcionários
+    empacotadas, como o `escala_bitmask` do formato bitmask. Por padrão retorna apenas as contagens;
+    use **detalhes** para incluir violações e estatísticas de cada escala.
+    """
+    escalas = _decodificar_escalas(dados)
+    
+    config = ConfiguracaoEscala(
+        funcionarios=dados.funcionarios,
+        carga_max_semanal=dados.carga_max_semanal,
+        folgas_obrigatorias=dados.folgas_obrigatorias,
+        cobertura_minima=dados.cobertura_minima,
+        n_semanas=dados.n_semanas,
+        proibir_noite_manha=dados.proibir_noite_manha,
+    )
+    service = EscalaGeneticaService(config)
+    num_violacoes, relatorios = service.validar_lote(escalas, dados.detalhes)
+    
+    detalhes = None
+    if relatorios is not None:
+        detalhes = [
+            ValidacaoEscala(
+                escala_valida=len(violacoes) == 0,
+                num_violacoes=len(violacoes),
+                violacoes=violacoes,
+                estatisticas=estatisticas
+            )
+            for violacoes, estatisticas in relatorios
+        ]
+    
+    return ResultadoValidacaoLote(
+        num_escalas=len(escalas),
+        num_validas=int((num_violacoes == 0).sum()),
+        num_violacoes=num_violacoes.tolist(),
+        detalhes=detalhes
+    )
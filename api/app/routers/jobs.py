@@ -0,0 +1,56 @@
+"""
+Router para jobs assíncronos de otimização
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.models.schemas import ConfiguracaoEscala, JobCriado, StatusJob
+from app.routers.escalas import validar_configuracao
+from app.services.jobs import GerenciadorJobs
+
+router = APIRouter()
+
+
+def obter_gerenciador(request: Request) -> GerenciadorJobs:
+    """Retorna a fila de jobs criada no início da aplicação"""
+    gerenciador = getattr(request.app.state, "jobs", None)
+    if gerenciador is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="Fila de jobs não está disponível"
+        )
+    return gerenciador
+
+
+@router.post("/jobs", response_model=JobCriado, status_code=202)
+async def submeter_job(config: ConfiguracaoEscala, request: Request):
+    """
+    Submete uma otimização para execução assíncrona e retorna o id do job
+    
+    Use **GET** `/jobs/{id}` para acompanhar o progresso e obter o resultado.
+    """
+    validar_configuracao(config)
+    job_id = obter_gerenciador(request).submeter(config.model_dump())
+    return JobCriado(id=job_id, status="na_fila")
+
+
+@router.get("/jobs/{job_id}", response_model=StatusJob)
+async def consultar_job(job_id: str, request: Request):
+    """
+    Retorna o status, a geração atual, o melhor fitness e o resultado final do job
+    """
+    job = obter_gerenciador(request).consultar(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return StatusJob(**job)
+
+
+@router.delete("/jobs/{job_id}", response_model=StatusJob)
+async def cancelar_job(job_id: str, request: Request):
+    """
+    Cancela um job na fila ou em execução
+    """
+    job = obter_gerenciador(request).cancelar(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return StatusJob(**job)
@@ -0,0 +1,32 @@
+"""
+Router para as métricas de desempenho (formato Prometheus)
+"""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from app.services.metricas import metricas
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def exportar_metricas(request: Request):
+    """
+    Métricas no formato de exposição do Prometheus
+    
+    - Histograma de latência das requisições por método, rota e status
+    - Otimizações em andamento e jobs na fila e em execução
+    - Otimizações concluídas, avaliações e tempo total por fase do algoritmo
+    """
+    medidores = {}
+    jobs = getattr(request.app.state, "jobs", None)
+    if jobs is not None:
+        ocupacao = jobs.ocupacao()
+        medidores["escalas_jobs_na_fila"] = ocupacao["na_fila"]
+        medidores["escalas_jobs_executando"] = ocupacao["executando"]
+    
+    return PlainTextResponse(
+        metricas.exportar(medidores), 
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,142 @@
+"""
+Avaliação incremental (delta) de um indivíduo
+
+Em vez de reavaliar todos os funcionários e turnos a cada inversão de bit,
+o avaliador mantém agregados do indivíduo (turnos e dias trabalhados por
+funcionário em cada semana, turnos por dia de cada funcionário e
+funcionários por turno) e atualiza o fitness ponderado em O(1). É a base para
+buscas locais que testam muitos movimentos simples.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from app.services import genoma
+
+
+class AvaliadorIncremental:
+    """
+    Mantém os agregados de um indivíduo e o seu fitness (`genoma.fitness`).
+    """
+
+    def __init__(
+        self,
+        individuo: np.ndarray,
+        carga_max_semanal: int,
+        folgas_obrigatorias: int,
+        cobertura_minima: int,
+        proibir_noite_manha: bool = False,
+        pesos: genoma.Pesos = genoma.Pesos(),
+        preferencias: Optional[np.ndarray] = None,
+    ):
+        self.individuo = individuo.copy()
+        self.carga_max_semanal = carga_max_semanal
+        self.folgas_obrigatorias = folgas_obrigatorias
+        self.cobertura_minima = cobertura_minima
+        self.proibir_noite_manha = proibir_noite_manha
+        self.pesos = pesos
+        self.n_dias = individuo.shape[1]
+        self.n_turnos = individuo.shape[2]
+        if preferencias is None:
+            preferencias = np.zeros(individuo.shape[:2], dtype=bool)
+        self.preferencias = preferencias
+        self.carga_equilibrada = genoma.carga_equilibrada(
+            individuo.shape[0], carga_max_semanal, cobertura_minima
+        )
+
+        # Agregados do indivíduo (carga e folgas por semana)
+        n_funcionarios = individuo.shape[0]
+        self.turnos_por_dia = individuo.sum(axis=2)
+        por_semana = self.turnos_por_dia.reshape(n_funcionarios, -1, genoma.N_DIAS)
+        self.total_turnos = por_semana.sum(axis=2)
+        self.dias_trabalhados = (por_semana > 0).sum(axis=2)
+        self.trabalhando = individuo.sum(axis=0)
+
+        self.fitness = int(
+            genoma.fitness(
+                individuo, carga_max_semanal, folgas_obrigatorias, cobertura_minima,
+                preferencias, pesos, proibir_noite_manha,
+            )
+        )
+
+    def delta(self, funcionario: int, dia: int, turno: int) -> int:
+        """Variação do fitness se o bit (funcionario, dia, turno) for invertido"""
+        sinal = -1 if self.individuo[funcionario, dia, turno] else 1
+        semana = dia // genoma.N_DIAS
+        pesos = self.pesos
+
+        # Violações, pela magnitude
+        total = self.total_turnos[funcionario, semana]
+        violacoes = _excesso(total + sinal, self.carga_max_semanal) - _excesso(total, self.carga_max_semanal)
+
+        dias = self.dias_trabalhados[funcionario, semana]
+        variacao_dias = self._variacao_dias(funcionario, dia, sinal)
+        violacoes += _excesso(dias + variacao_dias, genoma.N_DIAS - self.folgas_obrigatorias) - _excesso(
+            dias, genoma.N_DIAS - self.folgas_obrigatorias
+        )
+
+        cobertura = self.trabalhando[dia, turno]
+        violacoes += _excesso(self.cobertura_minima, cobertura + sinal) - _excesso(
+            self.cobertura_minima, cobertura
+        )
+
+        if self.proibir_noite_manha:
+            violacoes += sinal * self._vizinho_noite_manha(funcionario, dia, turno)
+        variacao = pesos.violacao * violacoes
+
+        # Termos suaves
+        if pesos.preferencia_folga and self.preferencias[funcionario, dia]:
+            variacao += pesos.preferencia_folga * variacao_dias
+        if pesos.carga_desigual:
+            variacao += pesos.carga_desigual * (
+                _excesso(total + sinal, self.carga_equilibrada) - _excesso(total, self.carga_equilibrada)
+            )
+        if pesos.noites_seguidas and turno == self.n_turnos - 1:
+            variacao += pesos.noites_seguidas * sinal * self._noites_vizinhas(funcionario, dia)
+        return variacao
+
+    def inverter(self, funcionario: int, dia: int, turno: int) -> int:
+        """Inverte o bit (funcionario, dia, turno) e retorna o novo fitness"""
+        self.fitness += self.delta(funcionario, dia, turno)
+        sinal = -1 if self.individuo[funcionario, dia, turno] else 1
+        semana = dia // genoma.N_DIAS
+
+        self.dias_trabalhados[funcionario, semana] += self._variacao_dias(funcionario, dia, sinal)
+        self.individuo[funcionario, dia, turno] = sinal > 0
+        self.turnos_por_dia[funcionario, dia] += sinal
+        self.total_turnos[funcionario, semana] += sinal
+        self.trabalhando[dia, turno] += sinal
+        return self.fitness
+
+    def _variacao_dias(self, funcionario: int, dia: int, sinal: int) -> int:
+        """Variação dos dias trabalhados ao somar `sinal` turnos em `dia`"""
+        turnos_no_dia = self.turnos_por_dia[funcionario, dia]
+        if sinal > 0 and turnos_no_dia == 0:
+            return 1
+        if sinal < 0 and turnos_no_dia == 1:
+            return -1
+        return 0
+
+    def _noites_vizinhas(self, funcionario: int, dia: int) -> int:
+        """Noites trabalhadas pelo funcionário nos dias vizinhos"""
+        noites = 0
+        if dia > 0:
+            noites += int(self.individuo[funcionario, dia - 1, -1])
+        if dia + 1 < self.n_dias:
+            noites += int(self.individuo[funcionario, dia + 1, -1])
+        return noites
+
+    def _vizinho_noite_manha(self, funcionario: int, dia: int, turno: int) -> int:
+        """Pares noite-manhã que o bit (funcionario, dia, turno) forma com os dias vizinhos"""
+        pares = 0
+        if turno == self.n_turnos - 1 and dia + 1 < self.n_dias:
+            pares += int(self.individuo[funcionario, dia + 1, 0])
+        if turno == 0 and dia > 0:
+            pares += int(self.individuo[funcionario, dia - 1, -1])
+        return pares
+
+
+def _excesso(valor: int, limite: int) -> int:
+    """Quanto `valor` passa de `limite` (zero se não passa)"""
+    return max(int(valor) - int(limite), 0)
@@ -0,0 +1,148 @@
+"""
+Busca local (fase memética) sobre um indivíduo
+
+A cada passo a busca sorteia uma violação do indivíduo e tenta um movimento
+de reparo dirigido a ela, avaliado pelo `AvaliadorIncremental`:
+
+- turno com cobertura insuficiente: escalar mais um funcionário, ou mover para
+  ele um turno do mesmo funcionário em que a cobertura está sobrando;
+- funcionário acima da carga ou sem folgas na semana: passar um dos seus turnos
+  para outro funcionário, ou simplesmente retirá-lo;
+- noite seguida de manhã: passar ou retirar um dos dois turnos.
+
+Movimentos que não pioram o fitness são aceitos; os demais são desfeitos.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.avaliacao_incremental import AvaliadorIncremental
+from app.services.genoma import N_DIAS, noites_seguidas_de_manha
+
+Bit = Tuple[int, int, int]
+
+
+def busca_local(
+    avaliador: AvaliadorIncremental,
+    rng: np.random.Generator,
+    orcamento: int,
+    livres: Optional[np.ndarray] = None,
+) -> int:
+    """
+    Aplica até `orcamento` movimentos de reparo ao indivíduo do avaliador
+
+    Só as linhas marcadas em `livres` (funcionários não congelados) são alteradas.
+    Retorna o fitness final.
+    """
+    if livres is None:
+        livres = np.ones(avaliador.individuo.shape[0], dtype=bool)
+    if not livres.any():
+        return avaliador.fitness
+
+    for _ in range(orcamento):
+        if avaliador.fitness == 0:
+            break
+        movimento = _sortear_movimento(avaliador, rng, livres)
+        if movimento is None:
+            break
+        _aplicar_se_nao_piorar(avaliador, movimento)
+
+    return avaliador.fitness
+
+
+def _sortear_movimento(
+    avaliador: AvaliadorIncremental, rng: np.random.Generator, livres: np.ndarray
+) -> Optional[List[Bit]]:
+    """
+    Sorteia uma violação reparável e monta um movimento de reparo para ela
+
+    Retorna `None` quando nenhuma violação pode ser reparada.
+    """
+    individuo = avaliador.individuo
+    n_turnos = avaliador.n_turnos
+
+    violacoes = []
+    descobertos = np.flatnonzero(avaliador.trabalhando.ravel() < avaliador.cobertura_minima)
+    if len(descobertos):
+        # Turnos em que todos os funcionários livres já trabalham não têm reparo
+        escalados = individuo[livres].reshape(int(livres.sum()), -1)[:, descobertos]
+        descobertos = descobertos[~escalados.all(axis=0)]
+    if len(descobertos):
+        violacoes.append(("cobertura", descobertos))
+    sobrecarregados = np.flatnonzero(
+        (
+            (avaliador.total_turnos > avaliador.carga_max_semanal)
+            | (N_DIAS - avaliador.dias_trabalhados < avaliador.folgas_obrigatorias)
+        )
+        & livres[:, None]
+    )
+    if len(sobrecarregados):
+        violacoes.append(("semana", sobrecarregados))
+    if avaliador.proibir_noite_manha:
+        pares = np.flatnonzero(noites_seguidas_de_manha(individuo) & livres[:, None])
+        if len(pares):
+            violacoes.append(("noite_manha", pares))
+    if not violacoes:
+        return None
+
+    tipo, indices = violacoes[rng.integers(len(violacoes))]
+    indice = int(indices[rng.integers(len(indices))])
+
+    if tipo == "cobertura":
+        dia, turno = divmod(indice, n_turnos)
+        candidatos = np.flatnonzero(livres & ~individuo[:, dia, turno])
+        funcionario = int(candidatos[rng.integers(len(candidatos))])
+
+        # Mover um turno do mesmo funcionário em que a cobertura está sobrando
+        inicio = dia - dia % N_DIAS
+        sobrando = individuo[funcionario, inicio:inicio + N_DIAS] & (
+            avaliador.trabalhando[inicio:inicio + N_DIAS] > avaliador.cobertura_minima
+        )
+        origens = np.argwhere(sobrando)
+        if len(origens) and rng.random() < 0.5:
+            dia_origem, turno_origem = origens[rng.integers(len(origens))]
+            return [(funcionario, inicio + int(dia_origem), int(turno_origem)), (funcionario, dia, turno)]
+        return [(funcionario, dia, turno)]
+
+    if tipo == "semana":
+        funcionario, semana = divmod(indice, avaliador.total_turnos.shape[1])
+        turnos = np.argwhere(individuo[funcionario, semana * N_DIAS:(semana + 1) * N_DIAS])
+        dia, turno = turnos[rng.integers(len(turnos))]
+        return _liberar_turno(avaliador, rng, livres, funcionario, semana * N_DIAS + int(dia), int(turno))
+
+    funcionario, dia = divmod(indice, avaliador.n_dias - 1)
+    if rng.random() < 0.5:
+        return _liberar_turno(avaliador, rng, livres, funcionario, dia, n_turnos - 1)
+    return _liberar_turno(avaliador, rng, livres, funcionario, dia + 1, 0)
+
+
+def _liberar_turno(
+    avaliador: AvaliadorIncremental,
+    rng: np.random.Generator,
+    livres: np.ndarray,
+    funcionario: int,
+    dia: int,
+    turno: int,
+) -> List[Bit]:
+    """Passa o turno do funcionário para outro (mantendo a cobertura) ou o retira"""
+    outros = livres & ~avaliador.individuo[:, dia, turno]
+    outros[funcionario] = False
+    candidatos = np.flatnonzero(outros)
+    if len(candidatos) and rng.random() < 0.5:
+        substituto = int(candidatos[rng.integers(len(candidatos))])
+        return [(funcionario, dia, turno), (substituto, dia, turno)]
+    return [(funcionario, dia, turno)]
+
+
+def _aplicar_se_nao_piorar(avaliador: AvaliadorIncremental, movimento: List[Bit]) -> bool:
+    """Aplica o movimento e o desfaz se o fitness piorar"""
+    fitness_anterior = avaliador.fitness
+    for bit in movimento:
+        avaliador.inverter(*bit)
+    if avaliador.fitness <= fitness_anterior:
+        return True
+
+    for bit in reversed(movimento):
+        avaliador.inverter(*bit)
+    return False
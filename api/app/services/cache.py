@@ -0,0 +1,107 @@
+"""
+Cache de resultados de otimização
+
+Requisições idênticas (mesma configuração e mesma semente explícita) produzem
+o mesmo resultado, então ele pode ser reaproveitado. A chave é um hash da
+configuração normalizada; o cache em memória usa LRU com expiração (TTL) e
+pode ser complementado por um arquivo SQLite que sobrevive a reinícios.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.models.schemas import ConfiguracaoEscala, ParametrosAlgoritmo
+
+
+def chave_configuracao(config: ConfiguracaoEscala) -> Optional[str]:
+    """
+    Hash canônico da configuração, ou None se ela não for reprodutível (sem `seed`)
+    """
+    parametros = config.parametros or ParametrosAlgoritmo()
+    if parametros.seed is None:
+        return None
+
+    normalizada = config.model_dump()
+    normalizada["parametros"] = parametros.model_dump()
+    for funcionario in normalizada["funcionarios"]:
+        funcionario["preferencias_folga"] = sorted(set(funcionario["preferencias_folga"]))
+
+    texto = json.dumps(normalizada, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheResultados:
+    """
+    Cache LRU com TTL, opcionalmente persistido em SQLite.
+    """
+
+    def __init__(self, tamanho: int, ttl_segundos: float, caminho_disco: Optional[str] = None):
+        self.tamanho = tamanho
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conexao = None
+
+        if caminho_disco:
+            self._conexao = sqlite3.connect(caminho_disco, check_same_thread=False)
+            with self._conexao:
+                self._conexao.execute(
+                    "CREATE TABLE IF NOT EXISTS cache (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira_em REAL NOT NULL)"
+                )
+
+    def obter(self, chave: str) -> Optional[Dict]:
+        """Retorna o resultado guardado para a chave, se existir e não tiver expirado"""
+        agora = time.time()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                expira_em, valor = item
+                if expira_em > agora:
+                    self._itens.move_to_end(chave)
+                    return valor
+                del self._itens[chave]
+
+            if self._conexao is None:
+                return None
+
+            linha = self._conexao.execute(
+                "SELECT valor, expira_em FROM cache WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None or linha[1] <= agora:
+                return None
+
+            valor = json.loads(linha[0])
+            self._guardar_em_memoria(chave, valor, linha[1])
+            return valor
+
+    def guardar(self, chave: str, valor: Dict) -> None:
+        """Guarda um resultado no cache"""
+        expira_em = time.time() + self.ttl_segundos
+        with self._lock:
+            self._guardar_em_memoria(chave, valor, expira_em)
+
+            if self._conexao is not None:
+                with self._conexao:
+                    self._conexao.execute("DELETE FROM cache WHERE expira_em <= ?", (time.time(),))
+                    self._conexao.execute(
+                        "INSERT OR REPLACE INTO cache (chave, valor, expira_em) VALUES (?, ?, ?)",
+                        (chave, json.dumps(valor), expira_em),
+                    )
+
+    def fechar(self) -> None:
+        """Fecha o arquivo do cache em disco, se houver"""
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+    def _guardar_em_memoria(self, chave: str, valor: Dict, expira_em: float) -> None:
+        self._itens[chave] = (expira_em, valor)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.tamanho:
+            self._itens.popitem(last=False)
@@ -0,0 +1,77 @@
+"""
+Heurística construtiva para a população inicial
+
+Em vez de sortear dias e turnos às cegas, a heurística percorre os turnos do
+horizonte em ordem e escala em cada um os `cobertura_minima` funcionários
+elegíveis que ficariam com a menor fração usada da carga ou dos dias de
+trabalho da semana, com desempate aleatório. Elegível é quem
+ainda tem carga disponível na semana, não gasta uma folga obrigatória ao
+trabalhar no dia e, se a regra estiver ativa, não trabalhou na noite anterior.
+Dias de folga preferidos só são usados quando não há outra opção.
+
+O resultado fica perto da viabilidade desde a primeira geração, e cargas acima
+de 7 turnos por semana são atendidas com mais de um turno no mesmo dia.
+"""
+
+import numpy as np
+
+from app.services.genoma import N_DIAS, N_TURNOS
+
+
+def construir_populacao(
+    rng: np.random.Generator,
+    pop_size: int,
+    carga_max_semanal: int,
+    folgas_obrigatorias: int,
+    cobertura_minima: int,
+    preferencias: np.ndarray,
+    proibir_noite_manha: bool = False,
+) -> np.ndarray:
+    """
+    Gera `pop_size` indivíduos pela heurística gulosa aleatorizada
+
+    `preferencias` é a máscara (n_funcionarios, n_dias) dos dias de folga preferidos.
+    """
+    n_funcionarios, n_dias = preferencias.shape
+    populacao = np.zeros((pop_size, n_funcionarios, n_dias, N_TURNOS), dtype=bool)
+    max_dias_trabalhados = N_DIAS - folgas_obrigatorias
+    n_escolhidos = min(cobertura_minima, n_funcionarios)
+    individuos = np.arange(pop_size)[:, None]
+
+    # Quem prefere folgar no dia só é escolhido depois de todos os demais elegíveis
+    penalidade_preferencia = 2.0 * preferencias
+
+    for dia in range(n_dias):
+        if dia % N_DIAS == 0:
+            carga = np.zeros((pop_size, n_funcionarios), dtype=np.int64)
+            dias_trabalhados = np.zeros((pop_size, n_funcionarios), dtype=np.int64)
+        trabalha_no_dia = np.zeros((pop_size, n_funcionarios), dtype=bool)
+
+        for turno in range(N_TURNOS):
+            elegiveis = (carga < carga_max_semanal) & (
+                trabalha_no_dia | (dias_trabalhados < max_dias_trabalhados)
+            )
+            if proibir_noite_manha and turno == 0 and dia > 0:
+                elegiveis &= ~populacao[:, :, dia - 1, -1]
+
+            # Fração da carga ou dos dias da semana que o funcionário passaria a usar,
+            # com um acréscimo para quem ainda não trabalha no dia (gasta um dia a mais)
+            dia_novo = ~trabalha_no_dia / max(max_dias_trabalhados, 1)
+            custo = np.maximum(
+                (carga + 1) / carga_max_semanal,
+                dias_trabalhados / max(max_dias_trabalhados, 1) + dia_novo,
+            )
+            custo += 0.5 * dia_novo + penalidade_preferencia[:, dia]
+            custo += 1e-3 * rng.random((pop_size, n_funcionarios))
+            custo[~elegiveis] = np.inf
+            escolhidos = np.argpartition(custo, n_escolhidos - 1, axis=-1)[:, :n_escolhidos]
+            validos = np.isfinite(np.take_along_axis(custo, escolhidos, axis=-1))
+
+            linhas = np.broadcast_to(individuos, escolhidos.shape)[validos]
+            funcionarios = escolhidos[validos]
+            populacao[linhas, funcionarios, dia, turno] = True
+            carga[linhas, funcionarios] += 1
+            dias_trabalhados[linhas, funcionarios] += ~trabalha_no_dia[linhas, funcionarios]
+            trabalha_no_dia[linhas, funcionarios] = True
+
+    return populacao
@@ -2,17 +2,44 @@
 Serviço do algoritmo genético para otimização de escalas
 """
 
-import random
+import queue
+import secrets
+import threading
 import time
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 
-from app.core.constants import DIAS_SEMANA, TURNOS
-from app.models.schemas import ConfiguracaoEscala, ParametrosAlgoritmo
+import numpy as np
+
+from app.core.constants import TURNOS
+from app.models.schemas import (
+    ConfiguracaoEscala, DiagnosticoOtimizacao, ParametrosAlgoritmo, ResultadoOtimizacao
+)
+from app.services import genoma, operadores
+from app.services.avaliacao_incremental import AvaliadorIncremental
+from app.services.busca_local import busca_local
+from app.services.construcao import construir_populacao
+from app.services.metricas import CronometroFases
+
+# Perturbações aplicadas a um indivíduo duplicado antes de desistir
+TENTATIVAS_DUPLICADOS = 3
+
+
+class ProgressoGeracao(NamedTuple):
+    """Progresso da evolução ao fim de uma geração"""
+    geracao: int
+    melhor_fitness: int
+    media_fitness: float
+    tempo_decorrido: float
+    diversidade: float = 0.0
 
 
 class EscalaGeneticaService:
     """
     Serviço para otimização de escalas usando algoritmos genéticos.
+
+    Os indivíduos são genomas booleanos (n_funcionarios, dias, turnos), com os
+    dias de todas as `n_semanas` do horizonte, e a população inteira é um único
+    array; veja `app.services.genoma`.
     """
     
     def __init__(self, config: ConfiguracaoEscala):
@@ -20,147 +47,496 @@ class EscalaGeneticaService:
         self.carga_max_semanal = config.carga_max_semanal
         self.folgas_obrigatorias = config.folgas_obrigatorias
         self.cobertura_minima = config.cobertura_minima
+        self.proibir_noite_manha = config.proibir_noite_manha
+        self.n_semanas = config.n_semanas
+        self.nomes_dias = genoma.nomes_dias(config.n_semanas)
+        self.n_dias = len(self.nomes_dias)
+        self.preferencias_folga = genoma.mascara_preferencias(
+            [f.preferencias_folga for f in self.funcionarios], config.n_semanas
+        )
+        self.pesos = genoma.Pesos(**config.pesos.model_dump())
+        self.ids_funcionarios = [f.id for f in self.funcionarios]
+        self.config = config
+        self.populacao = None
+        self.fitness = None
+        self.num_avaliacoes = 0
+        self.cronometro = CronometroFases()
+        self.melhor_individuo = None
+        self.melhor_fitness = None
+        self.evolucao_fitness = []
+        self.evolucao_diversidade = []
+        self.num_duplicados = 0
+        self.num_imigrantes = 0
+        self.criterio_parada = "n_geracoes"
+        self.limite_inferior = None
         
         # Parâmetros do algoritmo
         if config.parametros:
             self.params = config.parametros
         else:
             self.params = ParametrosAlgoritmo()
+        
+        # Cada execução tem o seu próprio gerador; sem semente informada, uma é sorteada
+        # e devolvida no resultado para que a execução possa ser reproduzida
+        self.seed = self.params.seed if self.params.seed is not None else secrets.randbits(63)
+        self.rng = np.random.default_rng(self.seed)
+        self.solver_utilizado = self.params.solver
+        
+        # Escala inicial (replanejamento): linhas mapeadas pelo id do funcionário
+        self.individuo_inicial = None
+        self.livres = None
+        if config.escala_inicial:
+            self.individuo_inicial, self.presentes_inicial = genoma.de_dict_parcial(
+                config.escala_inicial, self.ids_funcionarios, self.nomes_dias
+            )
+            congelados = np.isin(self.ids_funcionarios, config.funcionarios_congelados)
+            self.livres = ~(congelados & self.presentes_inicial)
 
-    def checar_restricoes(self, escala: Dict) -> List[str]:
-        """Verifica todas as restrições da escala"""
-        violacoes = []
+    def validar_lote(
+        self, escalas: np.ndarray, detalhes: bool = False
+    ) -> Tuple[np.ndarray, Optional[List[Tuple[List[str], Dict]]]]:
+        """
+        Valida várias escalas (n_escalas, n_funcionarios, dias, turnos) em uma única passada
+
+        Retorna o número de violações de cada escala e, se `detalhes`, a lista de
+        violações legíveis e as estatísticas de cada uma.
+        """
+        total_turnos, folgas, trabalhando = genoma.agregados(escalas)
+        excedeu_carga = total_turnos > self.carga_max_semanal
+        sem_folgas = folgas < self.folgas_obrigatorias
+        sem_cobertura = trabalhando < self.cobertura_minima
+        num_violacoes = (
+            excedeu_carga.sum(axis=(-2, -1))
+            + sem_folgas.sum(axis=(-2, -1))
+            + sem_cobertura.sum(axis=(-2, -1))
+        )
+        noite_manha = None
+        if self.proibir_noite_manha:
+            noite_manha = genoma.noites_seguidas_de_manha(escalas)
+            num_violacoes += noite_manha.sum(axis=(-2, -1))
+        if not detalhes:
+            return num_violacoes, None
         
-        # 1. Carga horária máxima e folgas obrigatórias
-        for f in self.funcionarios:
-            total_turnos = sum(escala[f.id][dia][turno] for dia in DIAS_SEMANA for turno in TURNOS)
-            folgas = sum(all(escala[f.id][dia][t] == 0 for t in TURNOS) for dia in DIAS_SEMANA)
+        n_slots = escalas.shape[-2] * escalas.shape[-1]
+        preferidos_trabalhados = (escalas.any(axis=-1) & self.preferencias_folga).sum(axis=-1)
+        relatorios = []
+        for i in range(len(escalas)):
+            violacoes = []
             
-            if total_turnos > self.carga_max_semanal:
-                violacoes.append(f"{f.nome} excedeu carga máxima semanal.")
+            # 1. Carga horária máxima e folgas obrigatórias (em cada semana)
+            for j, s in zip(*np.nonzero(excedeu_carga[i] | sem_folgas[i])):
+                nome = self.funcionarios[j].nome
+                semana = f" na semana {s + 1}" if self.n_semanas > 1 else ""
+                if excedeu_carga[i, j, s]:
+                    violacoes.append(f"{nome} excedeu carga máxima semanal{semana}.")
+                if sem_folgas[i, j, s]:
+                    violacoes.append(f"{nome} não tem folgas suficientes{semana}.")
             
-            if folgas < self.folgas_obrigatorias:
-                violacoes.append(f"{f.nome} não tem folgas suficientes.")
-        
-        # 2. Cobertura mínima por turno
-        for dia in DIAS_SEMANA:
-            for turno in TURNOS:
-                trabalhando = sum(escala[f.id][dia][turno] for f in self.funcionarios)
-                if trabalhando < self.cobertura_minima:
-                    violacoes.append(f"Cobertura insuficiente em {dia} {turno}.")
-        
-        return violacoes
-
-    def avaliar_individuo(self, individuo: Dict) -> int:
-        """Avaliação do indivíduo (número de violações)"""
-        violacoes = self.checar_restricoes(individuo)
-        return len(violacoes)
-
-    def gerar_individuo(self) -> Dict:
-        """Geração de individuo aleatório (escala de trabalho)"""
-        escala = {f.id: {dia: {turno: 0 for turno in TURNOS} for dia in DIAS_SEMANA} for f in self.funcionarios}
-        
-        for f in self.funcionarios:
-            dias_trabalhados = random.sample(DIAS_SEMANA, self.carga_max_semanal)
-            for dia in dias_trabalhados:
-                turno = random.choice(TURNOS)
-                escala[f.id][dia][turno] = 1
-        
-        return escala
-
-    def selecionar_pais(self, populacao: List[Dict]) -> List[Dict]:
-        """Seleção de pais (torneio)"""
-        pais = []
-        for _ in range(2):
-            torneio = random.sample(populacao, 3)
-            melhor = min(torneio, key=lambda ind: self.avaliar_individuo(ind))
-            pais.append(melhor)
-        return pais
-
-    def cruzar_pais(self, pai1: Dict, pai2: Dict) -> Dict:
-        """Cruzamento de pais"""
-        filho = {}
-        
-        for funcionario_id in pai1.keys():
-            filho[funcionario_id] = {}
+            # 2. Cobertura mínima por turno
+            for d, t in zip(*np.nonzero(sem_cobertura[i])):
+                violacoes.append(f"Cobertura insuficiente em {self.nomes_dias[d]} {TURNOS[t]}.")
             
-            for dia in pai1[funcionario_id].keys():
-                filho[funcionario_id][dia] = {}
-                
-                for turno in pai1[funcionario_id][dia].keys():
-                    # Escolha aleatória entre os pais
-                    pai_escolhido = pai1 if random.random() < 0.5 else pai2
-                    filho[funcionario_id][dia][turno] = pai_escolhido[funcionario_id][dia][turno]
-        
-        return filho
-
-    def mutar_individuo(self, individuo: Dict) -> Dict:
-        """Mutação do indivíduo"""
-        for f in self.funcionarios:
-            if random.random() < self.params.taxa_mutacao:
-                dia = random.choice(DIAS_SEMANA)
-                turno = random.choice(TURNOS)
-                if individuo[f.id][dia][turno] == 1:
-                    individuo[f.id][dia][turno] = 0  # Remove o turno
-                else:
-                    individuo[f.id][dia][turno] = 1  # Adiciona o turno
-        return individuo
-
-    def otimizar(self) -> Tuple[Dict, List[int], float]:
-        """Executa o algoritmo genético completo"""
-        inicio = time.time()
+            # 3. Noite seguida de manhã
+            if noite_manha is not None:
+                for j, d in zip(*np.nonzero(noite_manha[i])):
+                    violacoes.append(
+                        f"{self.funcionarios[j].nome} trabalha na noite de {self.nomes_dias[d]} "
+                        f"e na manhã seguinte."
+                    )
+            
+            estatisticas = {
+                f.nome: {
+                    "turnos_totais": int(total_turnos[i, j].sum()),
+                    "folgas": int(folgas[i, j].sum()),
+                    "carga_percentual": (int(total_turnos[i, j].sum()) / n_slots) * 100,
+                    "folgas_preferidas_trabalhadas": int(preferidos_trabalhados[i, j]),
+                }
+                for j, f in enumerate(self.funcionarios)
+            }
+            relatorios.append((violacoes, estatisticas))
+        
+        return num_violacoes, relatorios
+
+    def checar_restricoes(self, escala: Dict) -> List[str]:
+        """Verifica todas as restrições da escala (relatório legível do /validar)"""
+        individuo = genoma.de_dict(escala, self.ids_funcionarios, self.nomes_dias)
+        _, relatorios = self.validar_lote(individuo[None], detalhes=True)
+        return relatorios[0][0]
+
+    def avaliar_populacao(self, populacao: np.ndarray) -> np.ndarray:
+        """Avaliação de toda a população de uma vez (fitness ponderado por `pesos`)"""
+        return genoma.fitness(
+            populacao,
+            self.carga_max_semanal,
+            self.folgas_obrigatorias,
+            self.cobertura_minima,
+            self.preferencias_folga,
+            self.pesos,
+            self.proibir_noite_manha,
+        )
+
+    def avaliar_individuo(self, individuo: np.ndarray) -> int:
+        """Avaliação do indivíduo (fitness ponderado por `pesos`)"""
+        return int(self.avaliar_populacao(individuo))
+
+    def contar_violacoes(self, populacao: np.ndarray) -> np.ndarray:
+        """Número de restrições violadas por indivíduo (como no relatório do /validar)"""
+        return genoma.contar_violacoes(
+            populacao,
+            self.carga_max_semanal,
+            self.folgas_obrigatorias,
+            self.cobertura_minima,
+            self.proibir_noite_manha,
+        )
+
+    def criar_avaliador(self, individuo: np.ndarray) -> AvaliadorIncremental:
+        """Avaliador incremental do indivíduo com as restrições e os pesos da escala"""
+        return AvaliadorIncremental(
+            individuo,
+            self.carga_max_semanal,
+            self.folgas_obrigatorias,
+            self.cobertura_minima,
+            self.proibir_noite_manha,
+            self.pesos,
+            self.preferencias_folga,
+        )
+
+    def gerar_populacao(self, pop_size: int) -> np.ndarray:
+        """
+        Geração da população inicial (escalas de trabalho)
+
+        Uma fração `fracao_construtiva` vem da heurística construtiva e o restante é
+        aleatório. Com escala inicial, o primeiro indivíduo é a escala anterior e os
+        demais são cópias perturbadas; funcionários que não estavam na escala
+        anterior mantêm as linhas geradas.
+        """
+        n_construtivos = round(pop_size * self.params.fracao_construtiva)
+        populacao = np.concatenate([
+            construir_populacao(
+                self.rng,
+                n_construtivos,
+                self.carga_max_semanal,
+                self.folgas_obrigatorias,
+                self.cobertura_minima,
+                self.preferencias_folga,
+                self.proibir_noite_manha,
+            ),
+            genoma.gerar_populacao(
+                self.rng,
+                pop_size - n_construtivos,
+                len(self.funcionarios),
+                self.carga_max_semanal,
+                self.n_semanas,
+            ),
+        ])
+        if self.individuo_inicial is None:
+            return populacao
+        
+        populacao[:, self.presentes_inicial] = self.individuo_inicial[self.presentes_inicial]
+        genoma.mutar(self.rng, populacao[1:], self.params.taxa_mutacao, self.livres)
+        return populacao
+
+    def selecionar_pais(self, fitness: np.ndarray, n_filhos: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Seleção de pais (operador `selecao`), retornando os índices dos escolhidos"""
+        selecao = operadores.SELECAO[self.params.selecao]
+        pais = selecao(self.rng, fitness, 2 * n_filhos, self.params.tamanho_torneio)
+        return pais[:n_filhos], pais[n_filhos:]
+
+    def cruzar_pais(self, pais1: np.ndarray, pais2: np.ndarray) -> np.ndarray:
+        """Cruzamento de pais (operador `cruzamento`)"""
+        return operadores.CRUZAMENTO[self.params.cruzamento](self.rng, pais1, pais2)
+
+    def mutar_filhos(self, filhos: np.ndarray) -> np.ndarray:
+        """Mutação dos filhos (operador `mutacao`)"""
+        mutacao = operadores.MUTACAO[self.params.mutacao]
+        return mutacao(self.rng, filhos, self.params.taxa_mutacao, self.livres)
+
+    def para_escala(self, individuo: np.ndarray) -> Dict:
+        """Converte um indivíduo para o formato de escala da API"""
+        return genoma.para_dict(individuo, self.ids_funcionarios, self.nomes_dias)
+
+    def nova_geracao(self, populacao: np.ndarray, fitness: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Produz a próxima geração, avaliando apenas os filhos novos"""
+        n_elite = 1 if self.params.usar_elitismo else 0
+        
+        # Ordenar a população pelo fitness já calculado e selecionar os pais
+        with self.cronometro.medir("selecao"):
+            ordem = np.argsort(fitness, kind="stable")
+            populacao, fitness = populacao[ordem], fitness[ordem]
+            pais1, pais2 = self.selecionar_pais(fitness, self.params.pop_size - n_elite)
+        
+        # Cruzamento e mutação
+        with self.cronometro.medir("cruzamento"):
+            filhos = self.cruzar_pais(populacao[pais1], populacao[pais2])
+        with self.cronometro.medir("mutacao"):
+            filhos = self.mutar_filhos(filhos)
+        
+        # Manter o melhor indivíduo (e seu fitness) se elitismo for usado
+        populacao = np.concatenate([populacao[:n_elite], filhos])
+        self.substituir_duplicados(populacao, n_elite)
+        return populacao, np.concatenate([fitness[:n_elite], self._avaliar_novos(populacao[n_elite:])])
+
+    def substituir_duplicados(self, populacao: np.ndarray, inicio: int = 0) -> None:
+        """
+        Perturba, no próprio array, os indivíduos a partir de `inicio` que repetem
+        um genoma anterior da população (detectados pelo hash dos bits)
+        """
+        if not self.params.eliminar_duplicados:
+            return
+        with self.cronometro.medir("diversidade"):
+            for _ in range(TENTATIVAS_DUPLICADOS):
+                repetidos = np.flatnonzero(genoma.duplicados(populacao))
+                repetidos = repetidos[repetidos >= inicio]
+                if not len(repetidos):
+                    return
+                self.num_duplicados += len(repetidos)
+                populacao[repetidos] = genoma.perturbar(self.rng, populacao[repetidos], self.livres)
+
+    def inserir_imigrantes(self, populacao: np.ndarray, fitness: np.ndarray) -> None:
+        """Substitui os piores indivíduos por novos indivíduos gerados (`fracao_imigrantes`)"""
+        n = min(len(populacao) - 1, max(1, round(len(populacao) * self.params.fracao_imigrantes)))
+        piores = np.argsort(fitness, kind="stable")[::-1][:n]
+        with self.cronometro.medir("inicializacao"):
+            populacao[piores] = self.gerar_populacao(n)
+        fitness[piores] = self._avaliar_novos(populacao[piores])
+        self.num_imigrantes += n
+
+    def aplicar_busca_local(self, populacao: np.ndarray, fitness: np.ndarray) -> None:
+        """Fase memética: busca local de reparo no melhor indivíduo, no próprio array"""
+        indice = int(fitness.argmin())
+        avaliador = self.criar_avaliador(populacao[indice])
+        busca_local(avaliador, self.rng, self.params.orcamento_busca_local, self.livres)
+        populacao[indice] = avaliador.individuo
+        fitness[indice] = avaliador.fitness
+
+    def _avaliar_novos(self, populacao: np.ndarray) -> np.ndarray:
+        """Avalia indivíduos recém-criados, contabilizando as avaliações"""
+        self.num_avaliacoes += len(populacao)
+        with self.cronometro.medir("avaliacao"):
+            return self.avaliar_populacao(populacao)
+
+    def evoluir(self) -> Iterator[ProgressoGeracao]:
+        """
+        Executa o algoritmo genético geração a geração
+
+        Produz um `ProgressoGeracao` ao fim de cada geração. O melhor indivíduo e a
+        evolução do fitness e da diversidade ficam em `melhor_individuo`,
+        `evolucao_fitness` e `evolucao_diversidade`, e o tempo de cada fase em
+        `cronometro`; parar de consumir o gerador interrompe
+        a evolução.
+        """
+        self.cronometro = CronometroFases()
+        self.evolucao_diversidade = []
+        self.num_duplicados = 0
+        self.num_imigrantes = 0
+        # Backends exatos e o modelo de ilhas só são importados quando usados
+        if self.params.solver != "genetico":
+            from app.services import solvers
+            yield from solvers.resolver(self)
+            return
+        
+        if self.params.n_ilhas > 1:
+            from app.services import ilhas
+            yield from ilhas.evoluir_em_ilhas(self)
+            return
+        
+        inicio = time.perf_counter()
+        self.num_avaliacoes = 0
+        self.melhor_individuo = None
+        self.melhor_fitness = None
+        self.evolucao_fitness = []
+        self.criterio_parada = "n_geracoes"
         
         # Inicialização da população
-        populacao = [self.gerar_individuo() for _ in range(self.params.pop_size)]
+        with self.cronometro.medir("inicializacao"):
+            self.populacao = self.gerar_populacao(self.params.pop_size)
+        self.substituir_duplicados(self.populacao)
+        self.fitness = self._avaliar_novos(self.populacao)
         
         # Evolução da população
-        melhores_geracoes = []
-        evolucao_fitness = []
-        
+        ultima_melhora = 0
         for geracao in range(self.params.n_geracoes):
-            nova_populacao = []
+            if geracao > 0:
+                self.populacao, self.fitness = self.nova_geracao(self.populacao, self.fitness)
+            if self.params.busca_local:
+                with self.cronometro.medir("busca_local"):
+                    self.aplicar_busca_local(self.populacao, self.fitness)
             
-            # Avaliar e ordenar a população
-            populacao_ordenada = sorted(populacao, key=lambda ind: self.avaliar_individuo(ind), reverse=False)
+            # Diversidade da população; abaixo do mínimo, os piores dão lugar a imigrantes
+            with self.cronometro.medir("diversidade"):
+                diversidade = genoma.diversidade(self.populacao)
+            minima = self.params.diversidade_minima
+            if minima is not None and diversidade < minima:
+                self.inserir_imigrantes(self.populacao, self.fitness)
+            self.evolucao_diversidade.append(diversidade)
             
-            # Manter o melhor indivíduo se elitismo for usado
-            if self.params.usar_elitismo:
-                nova_populacao.append(populacao_ordenada[0])
+            # Guardar o melhor indivíduo já encontrado
+            indice_melhor = int(self.fitness.argmin())
+            if self.melhor_fitness is None or self.fitness[indice_melhor] < self.melhor_fitness:
+                self.melhor_individuo = self.populacao[indice_melhor].copy()
+                self.melhor_fitness = int(self.fitness[indice_melhor])
+                ultima_melhora = geracao
+            self.evolucao_fitness.append(int(self.fitness[indice_melhor]))
             
-            # Seleção e cruzamento
-            while len(nova_populacao) < self.params.pop_size:
-                pai1, pai2 = self.selecionar_pais(populacao_ordenada)
-                filho = self.cruzar_pais(pai1, pai2)
-                filho = self.mutar_individuo(filho)
-                nova_populacao.append(filho)
+            tempo_decorrido = time.perf_counter() - inicio
+            criterio = self._criterio_parada(geracao - ultima_melhora, tempo_decorrido)
+            if criterio is not None:
+                self.criterio_parada = criterio
             
-            populacao = nova_populacao
-            melhores_geracoes.append(populacao_ordenada[0])
+            yield ProgressoGeracao(
+                geracao=geracao + 1,
+                melhor_fitness=self.melhor_fitness,
+                media_fitness=float(self.fitness.mean()),
+                tempo_decorrido=tempo_decorrido,
+                diversidade=diversidade,
+            )
             
-            # Adicionar fitness da geração atual
-            melhor_fitness = self.avaliar_individuo(populacao_ordenada[0])
-            evolucao_fitness.append(melhor_fitness)
+            if criterio is not None:
+                return
+
+    def emigrantes(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Os `n` melhores indivíduos da população atual e seus fitness"""
+        melhores = np.argsort(self.fitness, kind="stable")[:n]
+        return self.populacao[melhores].copy(), self.fitness[melhores].copy()
+
+    def receber_imigrantes(self, individuos: np.ndarray, fitness: np.ndarray) -> None:
+        """Substitui os piores indivíduos da população atual pelos imigrantes"""
+        piores = np.argsort(self.fitness, kind="stable")[::-1][:len(individuos)]
+        self.populacao[piores] = individuos[:len(piores)]
+        self.fitness[piores] = fitness[:len(piores)]
+
+    def _criterio_parada(self, geracoes_sem_melhora: int, tempo_decorrido: float) -> Optional[str]:
+        """Retorna o critério de parada antecipada atingido, se houver"""
+        if self.params.fitness_alvo is not None and self.melhor_fitness <= self.params.fitness_alvo:
+            return "fitness_alvo"
         
-        # Avaliação da melhor escala encontrada
-        melhor_individuo = min(melhores_geracoes, key=lambda ind: self.avaliar_individuo(ind))
-        tempo_execucao = time.time() - inicio
+        if (
+            self.params.geracoes_sem_melhora is not None
+            and geracoes_sem_melhora >= self.params.geracoes_sem_melhora
+        ):
+            return "geracoes_sem_melhora"
         
-        return melhor_individuo, evolucao_fitness, tempo_execucao
+        if self.params.tempo_max_segundos is not None and tempo_decorrido >= self.params.tempo_max_segundos:
+            return "tempo_max_segundos"
+        
+        return None
 
-    def calcular_estatisticas(self, escala: Dict) -> Dict:
-        """Calcula estatísticas da escala"""
-        estatisticas = {}
+    def otimizar(
+        self,
+        cancelamento: Optional[threading.Event] = None,
+        progresso: Optional[Callable[[int, int], None]] = None,
+    ) -> Tuple[np.ndarray, List[int], float]:
+        """
+        Executa o algoritmo genético completo
+
+        - **cancelamento**: evento verificado entre gerações; quando marcado, a evolução para
+        - **progresso**: chamado ao fim de cada geração com (geração, melhor fitness até agora)
+        """
+        inicio = time.perf_counter()
         
-        for f in self.funcionarios:
-            total_turnos = sum(escala[f.id][dia][turno] 
-                             for dia in DIAS_SEMANA for turno in TURNOS)
-            folgas = sum(all(escala[f.id][dia][t] == 0 for t in TURNOS) 
-                        for dia in DIAS_SEMANA)
+        evolucao = self.evoluir()
+        for evento in evolucao:
+            if progresso is not None:
+                progresso(evento.geracao, evento.melhor_fitness)
             
-            estatisticas[f.nome] = {
-                "turnos_totais": total_turnos,
-                "folgas": folgas,
-                "carga_percentual": (total_turnos / (len(DIAS_SEMANA) * len(TURNOS))) * 100
-            }
+            # Parar entre gerações se a execução foi cancelada
+            if cancelamento is not None and cancelamento.is_set():
+                evolucao.close()
+                self.criterio_parada = "cancelado"
+                break
+        
+        tempo_execucao = time.perf_counter() - inicio
+        
+        return self.melhor_individuo, self.evolucao_fitness, tempo_execucao
+
+    def montar_resultado(
+        self, melhor_individuo: np.ndarray, evolucao: List[int], tempo: float, formato: str = "json"
+    ) -> ResultadoOtimizacao:
+        """Monta o resultado da otimização no formato da API, com a escala no `formato` pedido"""
+        num_violacoes = int(self.contar_violacoes(melhor_individuo))
+        
+        # Zero violações é sempre ótimo; os backends exatos também provam limites maiores
+        limite_inferior = self.limite_inferior
+        if limite_inferior is None and num_violacoes == 0:
+            limite_inferior = 0
+        
+        if formato == "bitmask":
+            escala = {"escala_bitmask": genoma.para_base64(melhor_individuo)}
+        elif formato == "atribuicoes":
+            escala = {"atribuicoes": genoma.para_atribuicoes(
+                melhor_individuo, self.ids_funcionarios, self.nomes_dias
+            )}
+        else:
+            escala = {"escala_otimizada": self.para_escala(melhor_individuo)}
         
-        return estatisticas
+        return ResultadoOtimizacao(
+            **escala,
+            num_violacoes=num_violacoes,
+            evolucao_fitness=evolucao,
+            evolucao_diversidade=self.evolucao_diversidade,
+            tempo_execucao=tempo,
+            num_avaliacoes=self.num_avaliacoes,
+            geracoes_executadas=len(evolucao),
+            criterio_parada=self.criterio_parada,
+            solver=self.solver_utilizado,
+            otimo_provado=None if limite_inferior is None else num_violacoes == limite_inferior,
+            gap=None if limite_inferior is None else num_violacoes - limite_inferior,
+            seed_utilizada=self.seed,
+            diagnostico=self.diagnostico(evolucao, tempo),
+            parametros_utilizados=self.params.model_copy(update={"seed": self.seed}),
+        )
+
+    def diagnostico(self, evolucao: List[int], tempo: float) -> DiagnosticoOtimizacao:
+        """Tempos por fase e contadores da última execução"""
+        return DiagnosticoOtimizacao(
+            tempos_fases=dict(self.cronometro.totais),
+            num_avaliacoes=self.num_avaliacoes,
+            avaliacoes_por_segundo=self.num_avaliacoes / tempo if tempo > 0 else 0.0,
+            tempo_medio_geracao=tempo / len(evolucao) if evolucao else 0.0,
+            duplicados_substituidos=self.num_duplicados,
+            imigrantes_inseridos=self.num_imigrantes,
+        )
+
+    def calcular_estatisticas(self, escala: Dict) -> Dict:
+        """Calcula estatísticas da escala"""
+        individuo = genoma.de_dict(escala, self.ids_funcionarios, self.nomes_dias)
+        _, relatorios = self.validar_lote(individuo[None], detalhes=True)
+        return relatorios[0][1]
+
+
+def executar_otimizacao(
+    config: Dict,
+    cancelamento: Optional[threading.Event] = None,
+    progresso: Optional[Callable[[int, int], None]] = None,
+    formato: str = "json",
+) -> Dict:
+    """
+    Executa uma otimização completa a partir de dados simples.
+
+    Recebe e retorna dicionários (picklable) para poder rodar em outro processo;
+    a escala do resultado vem no `formato` pedido.
+    """
+    service = EscalaGeneticaService(ConfiguracaoEscala.model_validate(config))
+    melhor_individuo, evolucao, tempo = service.otimizar(cancelamento, progresso)
+    
+    return service.montar_resultado(melhor_individuo, evolucao, tempo, formato).model_dump()
+
+
+def transmitir_otimizacao(config: Dict, cancelamento: threading.Event, fila: "queue.Queue[Dict]") -> Dict:
+    """
+    Como `executar_otimizacao`, colocando na `fila` o `ProgressoGeracao` (em
+    dicionário) de cada geração, para o streaming por SSE.
+    """
+    service = EscalaGeneticaService(ConfiguracaoEscala.model_validate(config))
+    inicio = time.perf_counter()
+    
+    evolucao = service.evoluir()
+    for evento in evolucao:
+        fila.put(evento._asdict())
+        if cancelamento.is_set():
+            evolucao.close()
+            service.criterio_parada = "cancelado"
+            break
+    
+    tempo = time.perf_counter() - inicio
+    return service.montar_resultado(service.melhor_individuo, service.evolucao_fitness, tempo).model_dump()
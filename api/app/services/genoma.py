@@ -0,0 +1,358 @@
+"""
+Representação vetorizada do genoma das escalas
+
+Uma população inteira é guardada em um único array booleano com forma
+``(pop_size, n_funcionarios, n_dias, n_turnos)``, em que ``n_dias`` cobre o
+horizonte de ``n_semanas`` semanas. Os operadores genéticos trabalham com
+máscaras aleatórias sobre esse array, e a conversão para o formato aninhado
+``{id: {dia: {turno: 0/1}}}`` só acontece na fronteira da API.
+
+Para guardar ou transferir genomas (migração entre ilhas, melhores indivíduos)
+as linhas de cada funcionário são empacotadas em bits, 8 turnos por byte.
+"""
+
+import base64
+from itertools import chain
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.constants import DIAS_SEMANA, TURNOS
+from app.core.layout import N_DIAS, N_TURNOS, TURNOS_POR_CODIGO, layout, ler_dias, ler_turnos
+
+# Peso de cada turno no código de 3 bits de um dia
+_BITS_TURNOS = 1 << np.arange(N_TURNOS, dtype=np.uint8)
+
+
+class Pesos(NamedTuple):
+    """Pesos dos termos do fitness (o padrão conta só a magnitude das violações)"""
+    violacao: int = 1
+    preferencia_folga: int = 0
+    carga_desigual: int = 0
+    noites_seguidas: int = 0
+
+
+def nomes_dias(n_semanas: int = 1) -> List[str]:
+    """Nomes dos dias do horizonte: os da semana, ou `dia_semana` para várias semanas"""
+    return list(layout(n_semanas).dias)
+
+
+def mascara_preferencias(preferencias: List[List[str]], n_semanas: int = 1) -> np.ndarray:
+    """
+    Máscara (n_funcionarios, n_dias) dos dias de folga preferidos
+
+    Um dia da semana (`domingo`) vale para todas as semanas do horizonte e um dia
+    do horizonte (`domingo_2`) só para ele; nomes desconhecidos são ignorados.
+    """
+    horizonte = layout(n_semanas)
+    mascara = np.zeros((len(preferencias), len(horizonte.dias)), dtype=bool)
+    for i, preferidos in enumerate(preferencias):
+        for nome in preferidos:
+            dias = horizonte.dias_por_nome.get(nome)
+            if dias is not None:
+                mascara[i, dias] = True
+    return mascara
+
+
+def bits_aleatorios(rng: np.random.Generator, forma: Tuple[int, ...]) -> np.ndarray:
+    """Máscara booleana uniforme, sorteada em bytes (um bit aleatório por posição)"""
+    n_bits = int(np.prod(forma))
+    bytes_aleatorios = rng.integers(0, 256, size=(n_bits + 7) // 8, dtype=np.uint8)
+    return np.unpackbits(bytes_aleatorios, count=n_bits).view(bool).reshape(forma)
+
+
+def gerar_populacao(
+    rng: np.random.Generator,
+    pop_size: int,
+    n_funcionarios: int,
+    carga_max_semanal: int,
+    n_semanas: int = 1,
+) -> np.ndarray:
+    """Gera uma população aleatória: `carga_max_semanal` dias por semana com um turno cada"""
+    forma = (pop_size, n_funcionarios, n_semanas, N_DIAS)
+
+    # Os primeiros dias de uma permutação aleatória de cada semana são trabalhados
+    ordem = rng.random(forma, dtype=np.float32).argsort(axis=-1)
+    dias_trabalhados = np.zeros(forma, dtype=bool)
+    np.put_along_axis(dias_trabalhados, ordem[..., :carga_max_semanal], True, axis=-1)
+    del ordem
+
+    turnos = rng.integers(0, N_TURNOS, size=forma, dtype=np.int8)
+    populacao = (np.arange(N_TURNOS, dtype=np.int8) == turnos[..., None]) & dias_trabalhados[..., None]
+    return populacao.reshape(pop_size, n_funcionarios, n_semanas * N_DIAS, N_TURNOS)
+
+
+def cruzar(rng: np.random.Generator, pais1: np.ndarray, pais2: np.ndarray) -> np.ndarray:
+    """Cruzamento uniforme: cada bit do filho vem de um dos pais com chance de 50%"""
+    return np.where(bits_aleatorios(rng, pais1.shape), pais1, pais2)
+
+
+def mutar(
+    rng: np.random.Generator,
+    populacao: np.ndarray,
+    taxa_mutacao: float,
+    livres: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Inverte um bit (dia, turno) por funcionário com probabilidade `taxa_mutacao`
+
+    Se `livres` for informado (máscara por funcionário), só essas linhas são mutadas.
+    """
+    sorteados = rng.random(populacao.shape[:2]) < taxa_mutacao
+    if livres is not None:
+        sorteados &= livres
+    individuos, funcionarios = np.nonzero(sorteados)
+    dias = rng.integers(0, populacao.shape[-2], size=len(individuos))
+    turnos = rng.integers(0, N_TURNOS, size=len(individuos))
+    populacao[individuos, funcionarios, dias, turnos] ^= True
+    return populacao
+
+
+def perturbar(
+    rng: np.random.Generator,
+    individuos: np.ndarray,
+    livres: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Inverte um bit aleatório de cada indivíduo (só nas linhas `livres`, se informado)"""
+    linhas = np.arange(individuos.shape[1]) if livres is None else np.flatnonzero(livres)
+    if not len(linhas):
+        return individuos
+    n = len(individuos)
+    funcionarios = linhas[rng.integers(0, len(linhas), size=n)]
+    dias = rng.integers(0, individuos.shape[-2], size=n)
+    turnos = rng.integers(0, N_TURNOS, size=n)
+    individuos[np.arange(n), funcionarios, dias, turnos] ^= True
+    return individuos
+
+
+def duplicados(populacao: np.ndarray) -> np.ndarray:
+    """Máscara dos indivíduos cujo genoma já apareceu antes na população (hash dos bits)"""
+    bits = compactar(populacao).reshape(len(populacao), -1)
+    vistos = set()
+    mascara = np.zeros(len(populacao), dtype=bool)
+    for i, linha in enumerate(bits):
+        chave = linha.tobytes()
+        mascara[i] = chave in vistos
+        vistos.add(chave)
+    return mascara
+
+
+def diversidade(populacao: np.ndarray) -> float:
+    """
+    Distância de Hamming média entre pares de indivíduos, como fração dos bits
+
+    Calculada pela frequência de cada bit: um bit com k uns em n indivíduos
+    difere em k * (n - k) pares, sem comparar os pares um a um.
+    """
+    n = len(populacao)
+    if n < 2:
+        return 0.0
+    uns = populacao.reshape(n, -1).sum(axis=0, dtype=np.int64)
+    pares_diferentes = (uns * (n - uns)).sum()
+    return float(pares_diferentes / (n * (n - 1) / 2) / uns.size)
+
+
+def agregados(populacao: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turnos e folgas por funcionário e semana e funcionários trabalhando por (dia, turno)
+
+    `total_turnos` e `folgas` têm forma (..., n_funcionarios, n_semanas).
+    """
+    n_dias = populacao.shape[-2]
+    semanas = populacao.reshape(populacao.shape[:-2] + (n_dias // N_DIAS, N_DIAS, N_TURNOS))
+    total_turnos = semanas.sum(axis=(-2, -1))
+    folgas = (~semanas.any(axis=-1)).sum(axis=-1)
+    trabalhando = populacao.sum(axis=-3)
+    return total_turnos, folgas, trabalhando
+
+
+def noites_seguidas_de_manha(populacao: np.ndarray) -> np.ndarray:
+    """Dias em que o funcionário trabalha à noite e na manhã do dia seguinte"""
+    return populacao[..., :-1, -1] & populacao[..., 1:, 0]
+
+
+def noites_consecutivas(populacao: np.ndarray) -> np.ndarray:
+    """Dias em que o funcionário trabalha à noite e também na noite seguinte"""
+    return populacao[..., :-1, -1] & populacao[..., 1:, -1]
+
+
+def carga_equilibrada(n_funcionarios: int, carga_max_semanal: int, cobertura_minima: int) -> int:
+    """Turnos semanais de cada funcionário com a cobertura mínima dividida igualmente"""
+    demanda = cobertura_minima * N_DIAS * N_TURNOS
+    return min(carga_max_semanal, -(-demanda // n_funcionarios))
+
+
+def fitness(
+    populacao: np.ndarray,
+    carga_max_semanal: int,
+    folgas_obrigatorias: int,
+    cobertura_minima: int,
+    preferencias: np.ndarray,
+    pesos: Pesos = Pesos(),
+    proibir_noite_manha: bool = False,
+) -> np.ndarray:
+    """
+    Fitness ponderado de cada indivíduo (menor é melhor)
+
+    As violações contam pela magnitude (turnos acima da carga, folgas e
+    funcionários que faltam, pares noite-manhã), somadas aos termos suaves: dias
+    de folga preferidos trabalhados (`preferencias` é a máscara (n_funcionarios,
+    n_dias)), turnos acima da carga equilibrada e noites consecutivas.
+    """
+    total_turnos, folgas, trabalhando = agregados(populacao)
+
+    violacoes = (
+        np.maximum(total_turnos - carga_max_semanal, 0).sum(axis=(-2, -1))
+        + np.maximum(folgas_obrigatorias - folgas, 0).sum(axis=(-2, -1))
+        + np.maximum(cobertura_minima - trabalhando, 0).sum(axis=(-2, -1))
+    )
+    if proibir_noite_manha:
+        violacoes += noites_seguidas_de_manha(populacao).sum(axis=(-2, -1))
+    resultado = pesos.violacao * violacoes
+
+    if pesos.preferencia_folga:
+        preferidos = (populacao.any(axis=-1) & preferencias).sum(axis=(-2, -1))
+        resultado += pesos.preferencia_folga * preferidos
+    if pesos.carga_desigual:
+        alvo = carga_equilibrada(populacao.shape[-3], carga_max_semanal, cobertura_minima)
+        resultado += pesos.carga_desigual * np.maximum(total_turnos - alvo, 0).sum(axis=(-2, -1))
+    if pesos.noites_seguidas:
+        resultado += pesos.noites_seguidas * noites_consecutivas(populacao).sum(axis=(-2, -1))
+    return resultado
+
+
+def contar_violacoes(
+    populacao: np.ndarray,
+    carga_max_semanal: int,
+    folgas_obrigatorias: int,
+    cobertura_minima: int,
+    proibir_noite_manha: bool = False,
+) -> np.ndarray:
+    """Número de violações de cada indivíduo, calculado por reduções sobre a população"""
+    total_turnos, folgas, trabalhando = agregados(populacao)
+
+    violacoes = (
+        (total_turnos > carga_max_semanal).sum(axis=(-2, -1))
+        + (folgas < folgas_obrigatorias).sum(axis=(-2, -1))
+        + (trabalhando < cobertura_minima).sum(axis=(-2, -1))
+    )
+    if proibir_noite_manha:
+        violacoes += noites_seguidas_de_manha(populacao).sum(axis=(-2, -1))
+    return violacoes
+
+
+def compactar(individuos: np.ndarray) -> np.ndarray:
+    """Empacota a linha de cada funcionário em bits: forma (..., n_funcionarios, bytes)"""
+    linhas = individuos.reshape(individuos.shape[:-2] + (-1,))
+    return np.packbits(linhas, axis=-1)
+
+
+def descompactar(bits: np.ndarray, n_dias: int) -> np.ndarray:
+    """Reverte `compactar` para genomas booleanos com `n_dias` dias"""
+    linhas = np.unpackbits(bits, axis=-1, count=n_dias * N_TURNOS).view(bool)
+    return linhas.reshape(bits.shape[:-1] + (n_dias, N_TURNOS))
+
+
+def de_bitmasks(mascaras: np.ndarray) -> np.ndarray:
+    """
+    Converte inteiros de 21 bits por funcionário em genomas
+
+    O bit `dia * N_TURNOS + turno` (a partir do menos significativo) indica trabalho.
+    """
+    bits = (mascaras[..., None] >> np.arange(N_DIAS * N_TURNOS)) & 1
+    return bits.astype(bool).reshape(mascaras.shape + (N_DIAS, N_TURNOS))
+
+
+def de_inteiros(mascaras: List[int], n_dias: int) -> np.ndarray:
+    """
+    Como `de_bitmasks`, para inteiros de qualquer tamanho (21 bits por semana do horizonte)
+
+    Os inteiros devem estar entre 0 e 2^(n_dias * N_TURNOS) - 1.
+    """
+    n_bits = n_dias * N_TURNOS
+    n_bytes = (n_bits + 7) // 8
+    dados = np.frombuffer(b"".join(m.to_bytes(n_bytes, "little") for m in mascaras), dtype=np.uint8)
+    bits = np.unpackbits(dados.reshape(len(mascaras), n_bytes), axis=-1, count=n_bits, bitorder="little")
+    return bits.view(bool).reshape(len(mascaras), n_dias, N_TURNOS)
+
+
+def de_base64(texto: str, n_funcionarios: int, n_dias: int = N_DIAS) -> np.ndarray:
+    """Converte um bitmap em base64 (linhas de funcionários, bits empacotados) em genoma"""
+    n_bits = n_funcionarios * n_dias * N_TURNOS
+    dados = np.frombuffer(base64.b64decode(texto, validate=True), dtype=np.uint8)
+    if len(dados) != (n_bits + 7) // 8:
+        raise ValueError("Bitmap com tamanho incompatível com o número de funcionários")
+    bits = np.unpackbits(dados, count=n_bits)
+    return bits.astype(bool).reshape(n_funcionarios, n_dias, N_TURNOS)
+
+
+def para_base64(individuo: np.ndarray) -> str:
+    """Converte um genoma em bitmap base64"""
+    return base64.b64encode(np.packbits(individuo)).decode("ascii")
+
+
+def para_dict(
+    individuo: np.ndarray, ids_funcionarios: List[int], dias: Optional[List[str]] = None
+) -> Dict:
+    """Converte um genoma para o formato aninhado usado pela API"""
+    dias = dias or DIAS_SEMANA
+    # Cada dia vira um código de 3 bits, e o dicionário de turnos sai da tabela
+    codigos = (individuo.astype(np.uint8) * _BITS_TURNOS).sum(axis=-1, dtype=np.uint8).tolist()
+    return {
+        funcionario_id: {dia: TURNOS_POR_CODIGO[codigo].copy() for dia, codigo in zip(dias, linha)}
+        for funcionario_id, linha in zip(ids_funcionarios, codigos)
+    }
+
+
+def para_atribuicoes(
+    individuo: np.ndarray, ids_funcionarios: List[int], dias: Optional[List[str]] = None
+) -> List[Tuple[int, str, str]]:
+    """Lista de (id, dia, turno) trabalhados, ordenada por funcionário, dia e turno"""
+    dias = dias or DIAS_SEMANA
+    funcionarios, indices_dias, turnos = np.nonzero(individuo)
+    ids = np.asarray(ids_funcionarios)[funcionarios].tolist()
+    return list(zip(
+        ids,
+        [dias[d] for d in indices_dias.tolist()],
+        [TURNOS[t] for t in turnos.tolist()],
+    ))
+
+
+def de_dict_parcial(
+    escala: Dict, ids_funcionarios: List[int], dias: Optional[List[str]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte uma escala que pode não ter todos os funcionários
+
+    Retorna o genoma (linhas ausentes zeradas) e a máscara dos funcionários presentes.
+    """
+    dias = dias or DIAS_SEMANA
+    ler = ler_dias(dias)
+    individuo = np.zeros((len(ids_funcionarios), len(dias), N_TURNOS), dtype=bool)
+    presentes = np.zeros(len(ids_funcionarios), dtype=bool)
+    for i, funcionario_id in enumerate(ids_funcionarios):
+        linha = escala.get(funcionario_id)
+        if linha is None:
+            continue
+        presentes[i] = True
+        try:
+            individuo[i] = [ler_turnos(turnos) for turnos in ler(linha)]
+        except KeyError:
+            # Linha com dias ou turnos faltando: os ausentes valem 0
+            for d, dia in enumerate(dias):
+                turnos = linha.get(dia, {})
+                for t, turno in enumerate(TURNOS):
+                    individuo[i, d, t] = bool(turnos.get(turno, 0))
+    return individuo, presentes
+
+
+def de_dict(escala: Dict, ids_funcionarios: List[int], dias: Optional[List[str]] = None) -> np.ndarray:
+    """Converte uma escala no formato aninhado para genoma"""
+    dias = dias or DIAS_SEMANA
+    ler = ler_dias(dias)
+    valores = chain.from_iterable(
+        chain.from_iterable(map(ler_turnos, ler(escala[funcionario_id])))
+        for funcionario_id in ids_funcionarios
+    )
+    forma = (len(ids_funcionarios), len(dias), N_TURNOS)
+    return np.fromiter(valores, dtype=bool, count=int(np.prod(forma))).reshape(forma)
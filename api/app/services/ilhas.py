@@ -0,0 +1,228 @@
+"""
+Modelo de ilhas do algoritmo genético
+
+Cada ilha é uma subpopulação evoluída em um processo próprio, com um fluxo
+aleatório independente derivado (`SeedSequence.spawn`) da semente da execução. A cada `intervalo_migracao`
+gerações, cada ilha envia seus melhores indivíduos para a próxima ilha do
+anel e substitui os seus piores pelos que recebe da anterior. A migração
+é síncrona, para que execuções com a mesma semente sejam reprodutíveis.
+"""
+
+import multiprocessing
+import queue
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List
+
+import numpy as np
+
+from app.models.schemas import ConfiguracaoEscala
+from app.services import genoma
+
+if TYPE_CHECKING:
+    from app.services.genetic_algorithm import EscalaGeneticaService, ProgressoGeracao
+
+# Intervalo (s) entre verificações de parada enquanto se espera por mensagens
+INTERVALO_ESPERA = 0.1
+
+
+def _executar_ilha(
+    indice: int,
+    config: Dict,
+    semente: np.random.SeedSequence,
+    entrada: multiprocessing.Queue,
+    saida: multiprocessing.Queue,
+    eventos: multiprocessing.Queue,
+    parar: multiprocessing.Event,
+) -> None:
+    """Evolui uma ilha, trocando migrantes com as vizinhas do anel"""
+    from app.services.genetic_algorithm import EscalaGeneticaService
+
+    try:
+        service = EscalaGeneticaService(ConfiguracaoEscala.model_validate(config))
+        service.rng = np.random.default_rng(semente)
+        params = service.params
+        anterior_ativa = True
+
+        for progresso in service.evoluir():
+            eventos.put((
+                "geracao", indice, progresso.geracao,
+                service.evolucao_fitness[-1], progresso.melhor_fitness, progresso.media_fitness,
+                progresso.diversidade,
+            ))
+            if service.criterio_parada == "fitness_alvo":
+                parar.set()
+            if parar.is_set():
+                break
+
+            if progresso.geracao % params.intervalo_migracao == 0:
+                individuos, fitness = service.emigrantes(params.n_migrantes)
+                saida.put((genoma.compactar(individuos), fitness))
+
+                while anterior_ativa and not parar.is_set():
+                    try:
+                        migrantes = entrada.get(timeout=INTERVALO_ESPERA)
+                    except queue.Empty:
+                        continue
+                    if migrantes is None:
+                        anterior_ativa = False
+                    else:
+                        bits, fitness = migrantes
+                        service.receber_imigrantes(genoma.descompactar(bits, service.n_dias), fitness)
+                    break
+
+        eventos.put((
+            "fim", indice, genoma.compactar(service.melhor_individuo), service.melhor_fitness,
+            service.evolucao_fitness, service.num_avaliacoes, service.criterio_parada,
+            service.cronometro.totais, service.num_duplicados, service.num_imigrantes,
+        ))
+    except Exception as e:
+        eventos.put(("erro", indice, str(e)))
+    finally:
+        # Avisa a próxima ilha que não haverá mais migrantes
+        saida.put(None)
+
+
+def evoluir_em_ilhas(service: "EscalaGeneticaService") -> Iterator["ProgressoGeracao"]:
+    """
+    Executa a evolução em `n_ilhas` processos, produzindo o progresso combinado
+
+    Ao terminar, o melhor indivíduo global, a evolução do fitness (melhor entre as
+    ilhas em cada geração) e da diversidade (média das ilhas) e os totais de avaliações e de tempo por fase (somados
+    entre as ilhas) ficam no próprio `service`.
+    """
+    from app.services.genetic_algorithm import ProgressoGeracao
+
+    params = service.params
+    n_ilhas = params.n_ilhas
+    config_ilha = service.config.model_dump()
+    config_ilha["parametros"] = params.model_dump()
+    config_ilha["parametros"]["n_ilhas"] = 1
+
+    contexto = multiprocessing.get_context()
+    sementes = np.random.SeedSequence(service.seed).spawn(n_ilhas)
+    filas = [contexto.Queue() for _ in range(n_ilhas)]
+    eventos = contexto.Queue()
+    parar = contexto.Event()
+    processos = [
+        contexto.Process(
+            target=_executar_ilha,
+            args=(i, config_ilha, sementes[i], filas[i], filas[(i + 1) % n_ilhas], eventos, parar),
+            daemon=True,
+        )
+        for i in range(n_ilhas)
+    ]
+
+    inicio = time.perf_counter()
+    service.num_avaliacoes = 0
+    service.melhor_individuo = None
+    service.melhor_fitness = None
+    service.evolucao_fitness = []
+    service.criterio_parada = "n_geracoes"
+
+    relatorios: Dict[int, Dict[int, tuple]] = {}
+    ultima_geracao = [0] * n_ilhas
+    finais: Dict[int, tuple] = {}
+    melhor_por_ilha: Dict[int, int] = {}
+    erros: List[str] = []
+
+    def processar(mensagem: tuple) -> None:
+        tipo, indice = mensagem[0], mensagem[1]
+        if tipo == "geracao":
+            geracao = mensagem[2]
+            relatorios.setdefault(geracao, {})[indice] = mensagem[3:]
+            ultima_geracao[indice] = geracao
+        elif tipo == "fim":
+            finais[indice] = mensagem[2:]
+        else:
+            finais[indice] = None
+            erros.append(f"Ilha {indice}: {mensagem[2]}")
+
+    def receber() -> bool:
+        try:
+            processar(eventos.get(timeout=INTERVALO_ESPERA))
+            return True
+        except queue.Empty:
+            # Um processo que morreu sem avisar conta como erro
+            for i, processo in enumerate(processos):
+                if i not in finais and not processo.is_alive() and eventos.empty():
+                    finais[i] = None
+                    erros.append(f"Ilha {i} terminou inesperadamente")
+            return False
+
+    def geracao_pronta(geracao: int) -> bool:
+        return geracao in relatorios and all(
+            ultima_geracao[i] >= geracao or i in finais for i in range(n_ilhas)
+        )
+
+    for processo in processos:
+        processo.start()
+
+    try:
+        proxima = 1
+        while len(finais) < n_ilhas or geracao_pronta(proxima):
+            if not geracao_pronta(proxima):
+                receber()
+                continue
+
+            relatorio = relatorios.pop(proxima)
+            for indice, (_, melhor, _, _) in relatorio.items():
+                melhor_por_ilha[indice] = melhor
+            service.evolucao_fitness.append(min(atual for atual, _, _, _ in relatorio.values()))
+            diversidade = float(np.mean([diversidade for _, _, _, diversidade in relatorio.values()]))
+            service.evolucao_diversidade.append(diversidade)
+
+            yield ProgressoGeracao(
+                geracao=proxima,
+                melhor_fitness=min(melhor_por_ilha.values()),
+                media_fitness=float(np.mean([media for _, _, media, _ in relatorio.values()])),
+                tempo_decorrido=time.perf_counter() - inicio,
+                diversidade=diversidade,
+            )
+            proxima += 1
+    finally:
+        parar.set()
+        limite = time.perf_counter() + 10
+        while len(finais) < n_ilhas and time.perf_counter() < limite:
+            receber()
+
+        # Esvaziar as filas de migração para que os processos possam terminar
+        for fila in filas:
+            while True:
+                try:
+                    fila.get_nowait()
+                except queue.Empty:
+                    break
+        for processo in processos:
+            processo.join(timeout=1)
+            if processo.is_alive():
+                processo.terminate()
+
+        _combinar_resultados(service, finais)
+
+    if erros:
+        raise RuntimeError("; ".join(erros))
+
+
+def _combinar_resultados(service: "EscalaGeneticaService", finais: Dict[int, tuple]) -> None:
+    """Guarda no serviço o melhor indivíduo global e os totais das ilhas"""
+    concluidas = sorted((indice, final) for indice, final in finais.items() if final is not None)
+    if not concluidas:
+        return
+
+    indice_melhor, melhor = min(concluidas, key=lambda item: item[1][1])
+    bits, melhor_fitness = melhor[0], melhor[1]
+    service.melhor_individuo = genoma.descompactar(bits, service.n_dias)
+    service.melhor_fitness = melhor_fitness
+    service.num_avaliacoes = sum(final[3] for _, final in concluidas)
+    service.num_duplicados = sum(final[6] for _, final in concluidas)
+    service.num_imigrantes = sum(final[7] for _, final in concluidas)
+    for _, final in concluidas:
+        for fase, segundos in final[5].items():
+            service.cronometro.adicionar(fase, segundos)
+
+    criterios = [final[4] for _, final in concluidas]
+    if "fitness_alvo" in criterios:
+        service.criterio_parada = "fitness_alvo"
+    else:
+        _, mais_longa = max(concluidas, key=lambda item: (len(item[1][2]), -item[0]))
+        service.criterio_parada = mais_longa[4]
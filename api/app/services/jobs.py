@@ -0,0 +1,292 @@
+"""
+Jobs assíncronos de otimização
+
+As otimizações submetidas entram em uma fila em processo, consumida por um
+conjunto limitado de threads. Com um pool de processos, cada thread só
+acompanha o seu job: a otimização roda no pool, o cancelamento chega ao
+processo por um evento do `multiprocessing.Manager` e o progresso volta por
+uma fila. Sem o pool, a otimização roda na própria thread. O estado e o
+resultado de cada job ficam em um arquivo SQLite local, para sobreviverem a
+reinícios da API.
+"""
+
+import json
+import queue
+import secrets
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import Executor, wait
+from datetime import datetime
+from multiprocessing.managers import SyncManager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.services.genetic_algorithm import executar_otimizacao
+from app.services.metricas import metricas
+
+STATUS_NA_FILA = "na_fila"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_CANCELADO = "cancelado"
+STATUS_ERRO = "erro"
+
+STATUS_FINAIS = {STATUS_CONCLUIDO, STATUS_CANCELADO, STATUS_ERRO}
+
+# Intervalo (s) com que a thread de um job no pool lê o progresso enviado pelo processo
+INTERVALO_PROGRESSO = 0.1
+
+
+class ProgressoEmFila:
+    """
+    Callback de progresso (picklable) que envia `(geracao, melhor_fitness)` por
+    uma fila do `multiprocessing.Manager`.
+    """
+
+    def __init__(self, fila: "queue.Queue[Tuple[int, int]]"):
+        self.fila = fila
+
+    def __call__(self, geracao: int, melhor_fitness: int) -> None:
+        self.fila.put((geracao, melhor_fitness))
+
+
+class RepositorioJobs:
+    """
+    Persistência dos jobs em SQLite.
+    """
+
+    def __init__(self, caminho: str):
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    config TEXT NOT NULL,
+                    geracao_atual INTEGER NOT NULL DEFAULT 0,
+                    melhor_fitness INTEGER,
+                    resultado TEXT,
+                    erro TEXT,
+                    criado_em TEXT NOT NULL,
+                    atualizado_em TEXT NOT NULL
+                )
+                """
+            )
+
+    def criar(self, job_id: str, config: Dict) -> None:
+        """Registra um novo job na fila"""
+        agora = datetime.now().isoformat()
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT INTO jobs (id, status, config, criado_em, atualizado_em) VALUES (?, ?, ?, ?, ?)",
+                (job_id, STATUS_NA_FILA, json.dumps(config), agora, agora),
+            )
+
+    def atualizar(self, job_id: str, **campos) -> None:
+        """Atualiza campos de um job"""
+        if "resultado" in campos and campos["resultado"] is not None:
+            campos["resultado"] = json.dumps(campos["resultado"])
+        campos["atualizado_em"] = datetime.now().isoformat()
+
+        atribuicoes = ", ".join(f"{campo} = ?" for campo in campos)
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                f"UPDATE jobs SET {atribuicoes} WHERE id = ?", (*campos.values(), job_id)
+            )
+
+    def obter(self, job_id: str) -> Optional[Dict]:
+        """Retorna o job ou None se não existir"""
+        with self._lock:
+            linha = self._conexao.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if linha is None:
+            return None
+
+        job = dict(linha)
+        job["config"] = json.loads(job["config"])
+        if job["resultado"] is not None:
+            job["resultado"] = json.loads(job["resultado"])
+        return job
+
+    def pendentes(self) -> List[Dict]:
+        """Jobs que não terminaram (na fila ou interrompidos durante a execução)"""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT id, config FROM jobs WHERE status IN (?, ?) ORDER BY criado_em",
+                (STATUS_NA_FILA, STATUS_EXECUTANDO),
+            ).fetchall()
+        return [{"id": linha["id"], "config": json.loads(linha["config"])} for linha in linhas]
+
+    def fechar(self) -> None:
+        """Fecha a conexão com o banco"""
+        with self._lock:
+            self._conexao.close()
+
+
+class GerenciadorJobs:
+    """
+    Fila de jobs de otimização com um conjunto limitado de workers.
+
+    Com `executor` (pool de processos), as otimizações rodam nele, com os
+    eventos de cancelamento e as filas de progresso criados pelo `manager`.
+    """
+
+    def __init__(
+        self,
+        caminho_banco: str,
+        n_workers: int,
+        executor: Optional[Executor] = None,
+        manager: Optional[SyncManager] = None,
+    ):
+        self.repositorio = RepositorioJobs(caminho_banco)
+        self.n_workers = n_workers
+        # O pool só é usado junto com o manager, que cria os objetos compartilhados com ele
+        self.executor = executor if manager is not None else None
+        self._manager = manager if executor is not None else None
+        self._fila: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._cancelamentos: Dict[str, threading.Event] = {}
+        self._configs: Dict[str, Dict] = {}
+        self._progresso: Dict[str, Dict] = {}
+        self._cancelados: Set[str] = set()
+        self._executando = 0
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    def iniciar(self) -> None:
+        """Inicia os workers e reenfileira jobs que não terminaram antes do reinício"""
+        for job in self.repositorio.pendentes():
+            self.repositorio.atualizar(job["id"], status=STATUS_NA_FILA, geracao_atual=0)
+            self._enfileirar(job["id"], job["config"])
+
+        for i in range(self.n_workers):
+            worker = threading.Thread(target=self._executar_worker, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def encerrar(self) -> None:
+        """Interrompe os jobs em andamento (retomados no próximo início) e para os workers"""
+        with self._lock:
+            for cancelamento in self._cancelamentos.values():
+                cancelamento.set()
+        for _ in self._workers:
+            self._fila.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        self.repositorio.fechar()
+
+    def submeter(self, config: Dict) -> str:
+        """Cria um job para a configuração e o coloca na fila"""
+        # Fixar a semente na submissão: um job retomado após reinício repete a mesma execução
+        parametros = dict(config.get("parametros") or {})
+        if parametros.get("seed") is None:
+            parametros["seed"] = secrets.randbits(63)
+        config = {**config, "parametros": parametros}
+
+        job_id = uuid.uuid4().hex
+        self.repositorio.criar(job_id, config)
+        self._enfileirar(job_id, config)
+        return job_id
+
+    def consultar(self, job_id: str) -> Optional[Dict]:
+        """Retorna o estado atual do job, incluindo o progresso em memória"""
+        job = self.repositorio.obter(job_id)
+        if job is not None and job["status"] == STATUS_EXECUTANDO:
+            with self._lock:
+                job.update(self._progresso.get(job_id, {}))
+        return job
+
+    def cancelar(self, job_id: str) -> Optional[Dict]:
+        """Cancela um job na fila ou em execução e retorna o seu estado"""
+        job = self.repositorio.obter(job_id)
+        if job is None or job["status"] in STATUS_FINAIS:
+            return job
+
+        with self._lock:
+            self._cancelados.add(job_id)
+            cancelamento = self._cancelamentos.get(job_id)
+        if cancelamento is not None:
+            cancelamento.set()
+        if job["status"] == STATUS_NA_FILA:
+            self.repositorio.atualizar(job_id, status=STATUS_CANCELADO)
+        return self.consultar(job_id)
+
+    def ocupacao(self) -> Dict[str, int]:
+        """Número de jobs aguardando na fila e em execução"""
+        with self._lock:
+            return {"na_fila": self._fila.qsize(), "executando": self._executando}
+
+    def _enfileirar(self, job_id: str, config: Dict) -> None:
+        cancelamento = self._manager.Event() if self._manager is not None else threading.Event()
+        with self._lock:
+            self._cancelamentos[job_id] = cancelamento
+            self._configs[job_id] = config
+        self._fila.put(job_id)
+
+    def _executar_worker(self) -> None:
+        while True:
+            job_id = self._fila.get()
+            if job_id is None:
+                return
+            with self._lock:
+                cancelamento = self._cancelamentos[job_id]
+                config = self._configs.pop(job_id)
+            try:
+                if not cancelamento.is_set():
+                    self._executar_job(job_id, config, cancelamento)
+            finally:
+                with self._lock:
+                    self._cancelamentos.pop(job_id, None)
+                    self._progresso.pop(job_id, None)
+                    self._cancelados.discard(job_id)
+
+    def _executar_job(self, job_id: str, config: Dict, cancelamento: threading.Event) -> None:
+        self.repositorio.atualizar(job_id, status=STATUS_EXECUTANDO)
+
+        def progresso(geracao: int, melhor_fitness: int) -> None:
+            with self._lock:
+                self._progresso[job_id] = {"geracao_atual": geracao, "melhor_fitness": melhor_fitness}
+
+        with self._lock:
+            self._executando += 1
+        try:
+            with metricas.otimizacao_em_andamento():
+                if self.executor is None:
+                    resultado = executar_otimizacao(config, cancelamento, progresso)
+                else:
+                    resultado = self._executar_no_pool(config, cancelamento, progresso)
+                resultado = metricas.registrar_otimizacao(resultado)
+        except Exception as e:
+            self.repositorio.atualizar(job_id, status=STATUS_ERRO, erro=str(e))
+            return
+        finally:
+            with self._lock:
+                self._executando -= 1
+
+        with self._lock:
+            cancelado_pelo_usuario = job_id in self._cancelados
+            ultimo_progresso = self._progresso.get(job_id, {})
+
+        if cancelamento.is_set() and not cancelado_pelo_usuario:
+            # Interrompido pelo desligamento: continua pendente para ser retomado
+            return
+
+        status = STATUS_CANCELADO if cancelado_pelo_usuario else STATUS_CONCLUIDO
+        self.repositorio.atualizar(job_id, status=status, resultado=resultado, **ultimo_progresso)
+
+    def _executar_no_pool(
+        self, config: Dict, cancelamento: threading.Event, progresso: Callable[[int, int], None]
+    ) -> Dict:
+        """Roda a otimização no pool, repassando o progresso enviado pelo processo"""
+        fila = self._manager.Queue()
+        futuro = self.executor.submit(executar_otimizacao, config, cancelamento, ProgressoEmFila(fila))
+        while True:
+            terminou, _ = wait([futuro], timeout=INTERVALO_PROGRESSO)
+            try:
+                while True:
+                    progresso(*fila.get_nowait())
+            except queue.Empty:
+                pass
+            if terminou:
+                return futuro.result()
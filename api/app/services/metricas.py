@@ -0,0 +1,152 @@
+"""
+Métricas de desempenho no formato de exposição do Prometheus
+
+- `CronometroFases` acumula, com relógio monotônico, o tempo de cada fase de uma
+  execução (inicialização, avaliação, seleção, cruzamento, mutação, ...);
+- `RegistroMetricas` guarda, no processo da API, o histograma de latência das
+  requisições, as otimizações em andamento e os totais por fase das otimizações
+  concluídas, e os exporta como texto para o endpoint `/metrics`.
+
+As otimizações rodam em outros processos; os seus tempos por fase chegam ao
+registro pelo bloco `diagnostico` do resultado.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Limites (s) dos buckets do histograma de latência
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Nome, tipo e descrição das métricas exportadas
+DESCRICOES = {
+    "escalas_requisicoes_duracao_segundos": ("histogram", "Latência das requisições HTTP"),
+    "escalas_otimizacoes_em_andamento": ("gauge", "Otimizações em execução"),
+    "escalas_otimizacoes_total": ("counter", "Otimizações concluídas"),
+    "escalas_cache_hits_total": ("counter", "Otimizações respondidas pelo cache"),
+    "escalas_avaliacoes_total": ("counter", "Indivíduos avaliados pelas otimizações concluídas"),
+    "escalas_fase_segundos_total": ("counter", "Tempo gasto em cada fase das otimizações concluídas"),
+    "escalas_jobs_na_fila": ("gauge", "Jobs aguardando na fila"),
+    "escalas_jobs_executando": ("gauge", "Jobs em execução"),
+}
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+class CronometroFases:
+    """Tempo acumulado (s) por fase de uma execução"""
+
+    def __init__(self):
+        self.totais: Dict[str, float] = {}
+
+    @contextmanager
+    def medir(self, fase: str) -> Iterator[None]:
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.adicionar(fase, time.perf_counter() - inicio)
+
+    def adicionar(self, fase: str, segundos: float) -> None:
+        self.totais[fase] = self.totais.get(fase, 0.0) + segundos
+
+
+class RegistroMetricas:
+    """Contadores, medidores e histogramas da API (seguro entre threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[str, Dict[Rotulos, float]] = {}
+        self._histogramas: Dict[Rotulos, List[float]] = {}
+        self._em_andamento = 0
+
+    def incrementar(self, nome: str, valor: float = 1.0, **rotulos: str) -> None:
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            serie = self._contadores.setdefault(nome, {})
+            serie[chave] = serie.get(chave, 0.0) + valor
+
+    def observar_requisicao(self, metodo: str, rota: str, status: int, duracao: float) -> None:
+        """Registra a duração de uma requisição no histograma de latência"""
+        chave = (("metodo", metodo), ("rota", rota), ("status", str(status)))
+        with self._lock:
+            # Contagem por bucket, seguida da soma e do total de observações
+            valores = self._histogramas.setdefault(chave, [0.0] * (len(BUCKETS_LATENCIA) + 2))
+            for i, limite in enumerate(BUCKETS_LATENCIA):
+                if duracao <= limite:
+                    valores[i] += 1
+            valores[-2] += duracao
+            valores[-1] += 1
+
+    @contextmanager
+    def otimizacao_em_andamento(self) -> Iterator[None]:
+        with self._lock:
+            self._em_andamento += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._em_andamento -= 1
+
+    def registrar_otimizacao(self, resultado: Dict) -> Dict:
+        """
+        Contabiliza uma otimização concluída a partir do seu resultado
+
+        Retorna o resultado sem o bloco `diagnostico` se ele não foi pedido em
+        `parametros.diagnostico`.
+        """
+        diagnostico = resultado.get("diagnostico")
+        if diagnostico is not None:
+            self.incrementar(
+                "escalas_otimizacoes_total",
+                solver=resultado["solver"],
+                criterio_parada=resultado["criterio_parada"],
+            )
+            self.incrementar("escalas_avaliacoes_total", diagnostico["num_avaliacoes"])
+            for fase, segundos in diagnostico["tempos_fases"].items():
+                self.incrementar("escalas_fase_segundos_total", segundos, fase=fase)
+
+        if resultado["parametros_utilizados"].get("diagnostico"):
+            return resultado
+        return {**resultado, "diagnostico": None}
+
+    def exportar(self, medidores: Dict[str, float]) -> str:
+        """Texto no formato de exposição do Prometheus, com `medidores` adicionais"""
+        linhas = []
+
+        def cabecalho(nome: str) -> None:
+            tipo, descricao = DESCRICOES[nome]
+            linhas.append(f"# HELP {nome} {descricao}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+        with self._lock:
+            nome = "escalas_requisicoes_duracao_segundos"
+            cabecalho(nome)
+            for chave, valores in sorted(self._histogramas.items()):
+                for limite, contagem in zip(BUCKETS_LATENCIA, valores):
+                    linhas.append(f"{nome}_bucket{_rotulos(chave + (('le', str(limite)),))} {contagem:g}")
+                linhas.append(f"{nome}_bucket{_rotulos(chave + (('le', '+Inf'),))} {valores[-1]:g}")
+                linhas.append(f"{nome}_sum{_rotulos(chave)} {valores[-2]:.6f}")
+                linhas.append(f"{nome}_count{_rotulos(chave)} {valores[-1]:g}")
+
+            medidores = {"escalas_otimizacoes_em_andamento": self._em_andamento, **medidores}
+            for nome, valor in medidores.items():
+                cabecalho(nome)
+                linhas.append(f"{nome} {valor:g}")
+
+            for nome, serie in self._contadores.items():
+                cabecalho(nome)
+                for chave, valor in sorted(serie.items()):
+                    linhas.append(f"{nome}{_rotulos(chave)} {valor:.9g}")
+
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulos(chave: Rotulos) -> str:
+    if not chave:
+        return ""
+    return "{" + ",".join(f'{nome}="{valor}"' for nome, valor in chave) + "}"
+
+
+metricas = RegistroMetricas()
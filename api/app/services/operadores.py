@@ -0,0 +1,162 @@
+"""
+Operadores genéticos sobre o genoma em array
+
+Cada operador trabalha na população inteira de uma vez, e é escolhido pelo
+nome em `ParametrosAlgoritmo` (`selecao`, `cruzamento` e `mutacao`) a partir
+dos registros `SELECAO`, `CRUZAMENTO` e `MUTACAO`:
+
+- seleção: `torneio` (de `tamanho_torneio` indivíduos), `ranking` (linear) e
+  `sus` (amostragem universal estocástica);
+- cruzamento: `uniforme` (por bit), `funcionario` (linhas inteiras de um dos
+  pais), `dia` (dias inteiros de um dos pais) e `dois_pontos` (trecho contínuo
+  de dias de funcionários consecutivos);
+- mutação: `inverter` (um bit por funcionário), `trocar` (troca os turnos de
+  dois dias da mesma semana) e `mover` (move um turno trabalhado para outro dia
+  da mesma semana).
+
+O cruzamento `funcionario` e a mutação `trocar` mantêm a carga semanal de
+cada funcionário (`mover` também, salvo quando o dia de destino já tem o
+turno), e o cruzamento `dia` mantém a cobertura de cada dia herdado.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services import genoma
+from app.services.genoma import N_DIAS, N_TURNOS
+
+# Seleção: (rng, fitness, n_pais, tamanho_torneio) -> índices dos pais
+Selecao = Callable[[np.random.Generator, np.ndarray, int, int], np.ndarray]
+# Cruzamento: (rng, pais1, pais2) -> filhos
+Cruzamento = Callable[[np.random.Generator, np.ndarray, np.ndarray], np.ndarray]
+# Mutação: (rng, populacao, taxa_mutacao, livres) -> populacao, alterada no próprio array
+Mutacao = Callable[[np.random.Generator, np.ndarray, float, Optional[np.ndarray]], np.ndarray]
+
+
+def selecao_torneio(rng: np.random.Generator, fitness: np.ndarray, n_pais: int, tamanho_torneio: int) -> np.ndarray:
+    """Vencedor (menor fitness) de cada torneio entre `tamanho_torneio` indivíduos distintos"""
+    torneios = rng.random((n_pais, len(fitness))).argsort(axis=-1)[:, :tamanho_torneio]
+    vencedores = fitness[torneios].argmin(axis=-1)
+    return np.take_along_axis(torneios, vencedores[:, None], axis=-1)[:, 0]
+
+
+def selecao_ranking(rng: np.random.Generator, fitness: np.ndarray, n_pais: int, tamanho_torneio: int) -> np.ndarray:
+    """Ranking linear: o melhor tem peso n, o pior peso 1, independente da escala do fitness"""
+    posicoes = np.empty(len(fitness), dtype=np.int64)
+    posicoes[np.argsort(fitness, kind="stable")] = np.arange(len(fitness))
+    pesos = len(fitness) - posicoes
+    return rng.choice(len(fitness), size=n_pais, p=pesos / pesos.sum())
+
+
+def selecao_sus(rng: np.random.Generator, fitness: np.ndarray, n_pais: int, tamanho_torneio: int) -> np.ndarray:
+    """
+    Amostragem universal estocástica proporcional a `max(fitness) - fitness + 1`
+
+    Os `n_pais` ponteiros são igualmente espaçados a partir de um único sorteio,
+    e os escolhidos são embaralhados para formar os pares.
+    """
+    pesos = (fitness.max() - fitness + 1).astype(np.float64)
+    acumulado = np.cumsum(pesos)
+    passo = acumulado[-1] / n_pais
+    ponteiros = (rng.random() + np.arange(n_pais)) * passo
+    escolhidos = np.searchsorted(acumulado, ponteiros, side="right")
+    return rng.permutation(np.minimum(escolhidos, len(fitness) - 1))
+
+
+def cruzamento_funcionario(rng: np.random.Generator, pais1: np.ndarray, pais2: np.ndarray) -> np.ndarray:
+    """Cada linha (funcionário) do filho vem inteira de um dos pais"""
+    return np.where(genoma.bits_aleatorios(rng, pais1.shape[:2])[..., None, None], pais1, pais2)
+
+
+def cruzamento_dia(rng: np.random.Generator, pais1: np.ndarray, pais2: np.ndarray) -> np.ndarray:
+    """Cada dia do filho (todos os funcionários e turnos) vem inteiro de um dos pais"""
+    dias = genoma.bits_aleatorios(rng, (len(pais1), pais1.shape[2]))
+    return np.where(dias[:, None, :, None], pais1, pais2)
+
+
+def cruzamento_dois_pontos(rng: np.random.Generator, pais1: np.ndarray, pais2: np.ndarray) -> np.ndarray:
+    """
+    Dois pontos de corte na sequência (funcionário, dia): o trecho entre eles vem
+    do segundo pai, e o resto do primeiro
+    """
+    n, n_funcionarios, n_dias = pais1.shape[:3]
+    cortes = np.sort(rng.integers(0, n_funcionarios * n_dias + 1, size=(n, 2)), axis=-1)
+    posicoes = np.arange(n_funcionarios * n_dias).reshape(n_funcionarios, n_dias)
+    trecho = (posicoes >= cortes[:, 0, None, None]) & (posicoes < cortes[:, 1, None, None])
+    return np.where(trecho[..., None], pais2, pais1)
+
+
+def _sortear_linhas(
+    rng: np.random.Generator,
+    populacao: np.ndarray,
+    taxa_mutacao: float,
+    livres: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Linhas (indivíduo, funcionário) mutadas, cada uma com probabilidade `taxa_mutacao`"""
+    sorteados = rng.random(populacao.shape[:2]) < taxa_mutacao
+    if livres is not None:
+        sorteados &= livres
+    return np.nonzero(sorteados)
+
+
+def _dia_da_mesma_semana(rng: np.random.Generator, dias: np.ndarray) -> np.ndarray:
+    return dias - dias % N_DIAS + rng.integers(0, N_DIAS, size=len(dias))
+
+
+def mutacao_trocar(
+    rng: np.random.Generator,
+    populacao: np.ndarray,
+    taxa_mutacao: float,
+    livres: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Troca os turnos de dois dias da mesma semana de um funcionário"""
+    individuos, funcionarios = _sortear_linhas(rng, populacao, taxa_mutacao, livres)
+    dias1 = rng.integers(0, populacao.shape[2], size=len(individuos))
+    dias2 = _dia_da_mesma_semana(rng, dias1)
+    turnos1 = populacao[individuos, funcionarios, dias1]
+    populacao[individuos, funcionarios, dias1] = populacao[individuos, funcionarios, dias2]
+    populacao[individuos, funcionarios, dias2] = turnos1
+    return populacao
+
+
+def mutacao_mover(
+    rng: np.random.Generator,
+    populacao: np.ndarray,
+    taxa_mutacao: float,
+    livres: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Move um turno trabalhado de um funcionário para outro dia da mesma semana"""
+    individuos, funcionarios = _sortear_linhas(rng, populacao, taxa_mutacao, livres)
+    linhas = populacao[individuos, funcionarios].reshape(len(individuos), populacao.shape[2] * N_TURNOS)
+
+    # Um turno trabalhado sorteado em cada linha; linhas sem turnos ficam como estão
+    posicoes = np.where(linhas, rng.random(linhas.shape), -1.0).argmax(axis=-1)
+    trabalham = linhas[np.arange(len(linhas)), posicoes]
+    individuos, funcionarios, posicoes = individuos[trabalham], funcionarios[trabalham], posicoes[trabalham]
+    dias, turnos = np.divmod(posicoes, N_TURNOS)
+
+    # O turno some do dia de origem; se o destino já tinha o mesmo turno, a carga diminui
+    populacao[individuos, funcionarios, dias, turnos] = False
+    populacao[individuos, funcionarios, _dia_da_mesma_semana(rng, dias), turnos] = True
+    return populacao
+
+
+SELECAO: Dict[str, Selecao] = {
+    "torneio": selecao_torneio,
+    "ranking": selecao_ranking,
+    "sus": selecao_sus,
+}
+
+CRUZAMENTO: Dict[str, Cruzamento] = {
+    "uniforme": genoma.cruzar,
+    "funcionario": cruzamento_funcionario,
+    "dia": cruzamento_dia,
+    "dois_pontos": cruzamento_dois_pontos,
+}
+
+MUTACAO: Dict[str, Mutacao] = {
+    "inverter": genoma.mutar,
+    "trocar": mutacao_trocar,
+    "mover": mutacao_mover,
+}
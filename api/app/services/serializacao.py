@@ -0,0 +1,65 @@
+"""
+Serialização das respostas de otimização
+
+A escala pode ser devolvida em três formatos, escolhidos pelo parâmetro
+`formato` ou pelo cabeçalho `Accept`:
+
+- `json` (padrão): `escala_otimizada` aninhada `{id: {dia: {turno: 0/1}}}`;
+- `bitmask`: `escala_bitmask`, bitmap em base64 com as linhas dos funcionários
+  (para uma semana, o mesmo formato aceito pelo `/validar/lote`);
+- `atribuicoes`: `atribuicoes`, lista de `[id, dia, turno]` trabalhados.
+
+Os resultados já chegam validados do serviço, então são codificados direto
+para JSON (orjson, se instalado, ou pydantic-core), sem passar de novo pelo
+`response_model`.
+"""
+
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+FORMATO_PADRAO = "json"
+
+# Tipos de mídia do cabeçalho Accept para cada formato
+TIPOS_MIDIA = {
+    "json": "application/json",
+    "bitmask": "application/vnd.escalas.bitmask+json",
+    "atribuicoes": "application/vnd.escalas.atribuicoes+json",
+}
+
+
+def formato_da_requisicao(formato: Optional[str], accept: Optional[str]) -> str:
+    """Formato pedido: o parâmetro `formato` tem prioridade sobre o cabeçalho Accept"""
+    if formato is not None:
+        return formato
+    for item in (accept or "").split(","):
+        tipo = item.split(";")[0].strip().lower()
+        for nome, tipo_midia in TIPOS_MIDIA.items():
+            if tipo == tipo_midia:
+                return nome
+    return FORMATO_PADRAO
+
+
+def codificar_json(conteudo: Any) -> bytes:
+    """JSON compacto do conteúdo (chaves inteiras viram texto, como no json padrão)"""
+    if orjson is not None:
+        return orjson.dumps(conteudo, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(conteudo)
+
+
+class RespostaRapida(JSONResponse):
+    """Resposta JSON codificada por `codificar_json`, sem revalidação"""
+
+    def render(self, content: Any) -> bytes:
+        return codificar_json(content)
+
+
+def resposta_resultado(resultado: dict, formato: str) -> RespostaRapida:
+    """Resposta de um resultado de otimização já no formato pedido"""
+    return RespostaRapida(resultado, media_type=TIPOS_MIDIA[formato])
@@ -0,0 +1,469 @@
+"""
+Backends de resolução da escala
+
+O AG (`genetico`) é o backend padrão. Os backends exatos tratam a escala como
+um problema inteiro (x[f, d, t] binário) e minimizam o número de violações
+(o mesmo do relatório do `/validar`), dentro de um limite de tempo; os termos
+suaves do fitness (`pesos`) não entram no modelo:
+
+- `cpsat`: OR-Tools CP-SAT (dependência opcional, importada só quando usada);
+- `branch_and_bound`: busca em profundidade em Python/NumPy, sem dependências;
+- `exato`: CP-SAT se estiver instalado, senão branch and bound.
+
+Além da escala, os backends exatos informam o limite inferior provado do
+número de violações; se ele for igual ao da escala, ela é ótima.
+"""
+
+import importlib.util
+import math
+import sys
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.services import genoma
+from app.services.avaliacao_incremental import AvaliadorIncremental
+from app.services.busca_local import busca_local
+from app.services.construcao import construir_populacao
+from app.services.genoma import N_DIAS, N_TURNOS
+
+if TYPE_CHECKING:
+    from app.services.genetic_algorithm import EscalaGeneticaService, ProgressoGeracao
+
+# Limite de tempo (s) dos backends exatos quando `tempo_max_segundos` não é informado
+TEMPO_LIMITE_PADRAO = 10.0
+
+# Indivíduos gerados pela heurística construtiva para a solução inicial
+N_SOLUCOES_INICIAIS = 10
+
+
+class SolucaoExata(NamedTuple):
+    """Melhor escala encontrada por um backend exato e o limite inferior provado"""
+    individuo: np.ndarray
+    limite_inferior: int
+    num_nos: int
+    criterio_parada: str
+
+
+@lru_cache(maxsize=None)
+def cpsat_disponivel() -> bool:
+    """Indica se o OR-Tools está instalado, sem importá-lo (a importação é lenta)"""
+    return importlib.util.find_spec("ortools") is not None
+
+
+def resolver(service: "EscalaGeneticaService") -> Iterator["ProgressoGeracao"]:
+    """
+    Resolve a escala com o backend exato escolhido em `parametros.solver`
+
+    Produz um único `ProgressoGeracao` e deixa no `service` o melhor indivíduo,
+    o limite inferior e o critério de parada (`otimo` ou `tempo_max_segundos`).
+    """
+    from app.services.genetic_algorithm import ProgressoGeracao
+
+    nome = service.params.solver
+    if nome == "exato":
+        nome = "cpsat" if cpsat_disponivel() else "branch_and_bound"
+    if nome == "cpsat" and not cpsat_disponivel():
+        raise ValueError("Solver 'cpsat' requer o pacote ortools instalado")
+
+    inicio = time.perf_counter()
+    tempo_limite = service.params.tempo_max_segundos or TEMPO_LIMITE_PADRAO
+    with service.cronometro.medir(nome):
+        solucao = SOLVERS[nome](service, tempo_limite)
+
+    violacoes = int(service.contar_violacoes(solucao.individuo))
+    fitness = service.avaliar_individuo(solucao.individuo)
+    service.solver_utilizado = nome
+    service.melhor_individuo = solucao.individuo
+    service.melhor_fitness = fitness
+    service.limite_inferior = min(solucao.limite_inferior, violacoes)
+    service.evolucao_fitness = [fitness]
+    service.num_avaliacoes = solucao.num_nos
+    service.criterio_parada = "otimo" if service.limite_inferior == violacoes else solucao.criterio_parada
+
+    yield ProgressoGeracao(
+        geracao=1,
+        melhor_fitness=fitness,
+        media_fitness=float(fitness),
+        tempo_decorrido=time.perf_counter() - inicio,
+    )
+
+
+def _linhas_fixas(service: "EscalaGeneticaService") -> Tuple[np.ndarray, np.ndarray]:
+    """Máscara dos funcionários congelados e o indivíduo com as suas linhas preenchidas"""
+    n_funcionarios = len(service.funcionarios)
+    base = np.zeros((n_funcionarios, service.n_dias, N_TURNOS), dtype=bool)
+    if service.livres is None:
+        return np.zeros(n_funcionarios, dtype=bool), base
+    fixos = ~service.livres
+    base[fixos] = service.individuo_inicial[fixos]
+    return fixos, base
+
+
+def _demanda(service: "EscalaGeneticaService", base: np.ndarray) -> np.ndarray:
+    """Funcionários livres que faltam em cada (dia, turno), além dos congelados"""
+    return np.maximum(service.cobertura_minima - base.sum(axis=0), 0)
+
+
+def _custo_linhas_fixas(service: "EscalaGeneticaService", fixos: np.ndarray, base: np.ndarray) -> int:
+    """Violações das linhas congeladas (exceto cobertura, que entra na demanda)"""
+    if not fixos.any():
+        return 0
+    fixas = base[fixos]
+    total_turnos, folgas, _ = genoma.agregados(fixas)
+    custo = int(
+        (total_turnos > service.carga_max_semanal).sum() + (folgas < service.folgas_obrigatorias).sum()
+    )
+    if service.proibir_noite_manha:
+        custo += int(genoma.noites_seguidas_de_manha(fixas).sum())
+    return custo
+
+
+def _limites_por_semana(service: "EscalaGeneticaService", demanda: List[int], n_livres: int) -> List[int]:
+    """
+    Limite inferior de violações de cada semana pela capacidade dos funcionários livres
+
+    Sem violar carga e folgas, cada um cobre no máximo min(carga, 3 * dias de trabalho)
+    turnos. Cada violação reduz o déficit em no máximo max(demanda de um turno
+    descoberto, turnos extras de um funcionário que passa a violar os limites).
+    """
+    slots_semana = N_DIAS * N_TURNOS
+    oferta = min(
+        slots_semana, service.carga_max_semanal, N_TURNOS * (N_DIAS - service.folgas_obrigatorias)
+    )
+    limites = []
+    for semana in range(service.n_semanas):
+        demandas = demanda[semana * slots_semana:(semana + 1) * slots_semana]
+        deficit = sum(demandas) - n_livres * oferta
+        ganho = max(max(demandas), slots_semana - oferta)
+        limites.append(math.ceil(deficit / ganho) if deficit > 0 else 0)
+    return limites
+
+
+def limite_inferior_capacidade(service: "EscalaGeneticaService") -> int:
+    """Limite inferior do número de violações de qualquer escala da configuração"""
+    fixos, base = _linhas_fixas(service)
+    demanda = _demanda(service, base).ravel().tolist()
+    return _custo_linhas_fixas(service, fixos, base) + sum(
+        _limites_por_semana(service, demanda, int((~fixos).sum()))
+    )
+
+
+def _solucao_heuristica(service: "EscalaGeneticaService", fixos: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """Solução inicial: heurística construtiva seguida de busca local"""
+    populacao = construir_populacao(
+        service.rng,
+        N_SOLUCOES_INICIAIS,
+        service.carga_max_semanal,
+        service.folgas_obrigatorias,
+        service.cobertura_minima,
+        service.preferencias_folga,
+        service.proibir_noite_manha,
+    )
+    populacao[:, fixos] = base[fixos]
+    melhor = populacao[int(service.contar_violacoes(populacao).argmin())]
+
+    avaliador = AvaliadorIncremental(
+        melhor,
+        service.carga_max_semanal,
+        service.folgas_obrigatorias,
+        service.cobertura_minima,
+        service.proibir_noite_manha,
+    )
+    busca_local(avaliador, service.rng, 20 * melhor.size, ~fixos)
+    return avaliador.individuo
+
+
+def resolver_cpsat(service: "EscalaGeneticaService", tempo_limite: float) -> SolucaoExata:
+    """Modelo CP-SAT com uma variável de penalidade por violação"""
+    from ortools.sat.python import cp_model
+
+    n_funcionarios, n_dias = len(service.funcionarios), service.n_dias
+    fixos, base = _linhas_fixas(service)
+    inicial = _solucao_heuristica(service, fixos, base)
+
+    modelo = cp_model.CpModel()
+    x = [
+        [[modelo.NewBoolVar(f"x_{f}_{d}_{t}") for t in range(N_TURNOS)] for d in range(n_dias)]
+        for f in range(n_funcionarios)
+    ]
+    penalidades = []
+
+    for f in range(n_funcionarios):
+        trabalha = []
+        for d in range(n_dias):
+            dia = modelo.NewBoolVar(f"y_{f}_{d}")
+            modelo.AddMaxEquality(dia, x[f][d])
+            trabalha.append(dia)
+
+        for semana in range(service.n_semanas):
+            dias = range(semana * N_DIAS, (semana + 1) * N_DIAS)
+            excedeu = modelo.NewBoolVar(f"carga_{f}_{semana}")
+            modelo.Add(
+                sum(x[f][d][t] for d in dias for t in range(N_TURNOS)) <= service.carga_max_semanal
+            ).OnlyEnforceIf(excedeu.Not())
+            sem_folga = modelo.NewBoolVar(f"folga_{f}_{semana}")
+            modelo.Add(
+                sum(trabalha[d] for d in dias) <= N_DIAS - service.folgas_obrigatorias
+            ).OnlyEnforceIf(sem_folga.Not())
+            penalidades += [excedeu, sem_folga]
+
+        if service.proibir_noite_manha:
+            for d in range(n_dias - 1):
+                par = modelo.NewBoolVar(f"noite_manha_{f}_{d}")
+                modelo.AddBoolOr([x[f][d][-1].Not(), x[f][d + 1][0].Not(), par])
+                penalidades.append(par)
+
+    for d in range(n_dias):
+        for t in range(N_TURNOS):
+            falta = modelo.NewBoolVar(f"cobertura_{d}_{t}")
+            modelo.Add(
+                sum(x[f][d][t] for f in range(n_funcionarios)) >= service.cobertura_minima
+            ).OnlyEnforceIf(falta.Not())
+            penalidades.append(falta)
+
+    for f in range(n_funcionarios):
+        for d in range(n_dias):
+            for t in range(N_TURNOS):
+                if fixos[f]:
+                    modelo.Add(x[f][d][t] == int(base[f, d, t]))
+                else:
+                    modelo.AddHint(x[f][d][t], int(inicial[f, d, t]))
+
+    # O limite de capacidade ajuda o CP-SAT, que sofre com a simetria entre funcionários
+    limite_capacidade = limite_inferior_capacidade(service)
+    modelo.Add(sum(penalidades) >= limite_capacidade)
+    modelo.Minimize(sum(penalidades))
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = tempo_limite
+    solver.parameters.random_seed = service.seed % 2**31
+    status = solver.Solve(modelo)
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return SolucaoExata(inicial, limite_capacidade, 0, "tempo_max_segundos")
+
+    individuo = np.array(
+        [[[solver.Value(x[f][d][t]) for t in range(N_TURNOS)] for d in range(n_dias)]
+         for f in range(n_funcionarios)],
+        dtype=bool,
+    )
+    return SolucaoExata(
+        individuo,
+        max(limite_capacidade, math.ceil(solver.BestObjectiveBound() - 1e-6)),
+        int(solver.NumBranches()),
+        "otimo" if status == cp_model.OPTIMAL else "tempo_max_segundos",
+    )
+
+
+class _BranchAndBound:
+    """
+    Branch and bound sobre os turnos do horizonte, em ordem
+
+    Os funcionários livres têm as mesmas restrições, então são agrupados em
+    classes pelo estado na semana (carga, dias trabalhados, se já trabalha no
+    dia, se trabalhou na noite anterior). Em cada turno a busca escolhe quantos
+    funcionários de cada classe escalar (exatamente a demanda) ou deixa o turno
+    descoberto: cobertura parcial nunca compensa, pois nenhuma restrição melhora
+    com turnos a mais. Os limites inferiores vêm da capacidade que resta.
+    """
+
+    def __init__(self, service: "EscalaGeneticaService", tempo_limite: float):
+        self.service = service
+        self.carga = service.carga_max_semanal
+        self.max_dias = N_DIAS - service.folgas_obrigatorias
+        self.proibir_noite_manha = service.proibir_noite_manha
+        self.n_slots = service.n_dias * N_TURNOS
+        self.limite_tempo = time.perf_counter() + tempo_limite
+
+        self.fixos, self.base = _linhas_fixas(service)
+        self.linhas_livres = np.flatnonzero(~self.fixos)
+        self.demanda = _demanda(service, self.base).ravel().tolist()
+        self.custo_fixo = _custo_linhas_fixas(service, self.fixos, self.base)
+        self.limite_semanas = _limites_por_semana(service, self.demanda, len(self.linhas_livres))
+        self.limite_apos_semana = [
+            sum(self.limite_semanas[semana + 1:]) for semana in range(service.n_semanas)
+        ]
+
+        self.num_nos = 0
+        self.interrompido = False
+        self.visitados: Dict[Tuple, int] = {}
+        self.melhor_custo = math.inf
+        self.melhor_caminho: Optional[List] = None
+
+    def resolver(self) -> SolucaoExata:
+        inicial = _solucao_heuristica(self.service, self.fixos, self.base)
+        self.melhor_custo = int(self.service.contar_violacoes(inicial)) - self.custo_fixo
+
+        classes = (((0, 0, False, False), len(self.linhas_livres)),) if len(self.linhas_livres) else ()
+        limite_raiz = self._limite_inferior(0, classes)
+        if self.melhor_custo > limite_raiz:
+            limite_recursao = sys.getrecursionlimit()
+            sys.setrecursionlimit(max(limite_recursao, 4 * self.n_slots + 200))
+            try:
+                self._buscar(0, classes, 0, [])
+            finally:
+                sys.setrecursionlimit(limite_recursao)
+
+        individuo = inicial if self.melhor_caminho is None else self._reconstruir(self.melhor_caminho)
+        if self.interrompido:
+            return SolucaoExata(individuo, limite_raiz + self.custo_fixo, self.num_nos, "tempo_max_segundos")
+        # Busca completa: a melhor solução é ótima
+        return SolucaoExata(individuo, int(self.melhor_custo) + self.custo_fixo, self.num_nos, "otimo")
+
+    def _buscar(self, k: int, classes: Tuple, custo: int, caminho: List) -> None:
+        self.num_nos += 1
+        if self.num_nos % 1000 == 0 and time.perf_counter() > self.limite_tempo:
+            self.interrompido = True
+        if self.interrompido:
+            return
+
+        if k == self.n_slots:
+            if custo < self.melhor_custo:
+                self.melhor_custo = custo
+                self.melhor_caminho = list(caminho)
+            return
+        if custo + self._limite_inferior(k, classes) >= self.melhor_custo:
+            return
+        chave = (k, classes)
+        if self.visitados.get(chave, math.inf) <= custo:
+            return
+        self.visitados[chave] = custo
+
+        dia, turno = divmod(k, N_TURNOS)
+        demanda = self.demanda[k]
+        if demanda > 0:
+            ordenadas = sorted(
+                classes, key=lambda item: (self._custo_escalar(item[0], turno), self._prioridade(item[0]))
+            )
+            custos = [self._custo_escalar(estado, turno) for estado, _ in ordenadas]
+            for composicao in self._composicoes([n for _, n in ordenadas], demanda):
+                acrescimo = sum(q * c for q, c in zip(composicao, custos))
+                escolhas = [(estado, q) for (estado, _), q in zip(ordenadas, composicao) if q]
+                caminho.append(escolhas)
+                self._buscar(
+                    k + 1, self._transicao(ordenadas, composicao, dia, turno), custo + acrescimo, caminho
+                )
+                caminho.pop()
+                if self.interrompido:
+                    return
+
+        # Turno descoberto (ou sem demanda): ninguém é escalado
+        caminho.append([])
+        self._buscar(
+            k + 1,
+            self._transicao(classes, [0] * len(classes), dia, turno),
+            custo + (1 if demanda > 0 else 0),
+            caminho,
+        )
+        caminho.pop()
+
+    def _custo_escalar(self, estado: Tuple, turno: int) -> int:
+        """Violações novas ao escalar um funcionário no estado `estado`"""
+        carga, dias, trabalha_hoje, noite_anterior = estado
+        return (
+            int(carga == self.carga)
+            + int(not trabalha_hoje and dias == self.max_dias)
+            + int(self.proibir_noite_manha and turno == 0 and noite_anterior)
+        )
+
+    def _prioridade(self, estado: Tuple) -> float:
+        """Fração da carga ou dos dias que seria usada (restrições já violadas não contam)"""
+        carga, dias, trabalha_hoje, _ = estado
+        fracao_carga = (carga + 1) / self.carga if carga <= self.carga else 0.0
+        dia_novo = 0 if trabalha_hoje else 1
+        fracao_dias = (dias + dia_novo) / max(self.max_dias, 1) if dias <= self.max_dias else 0.0
+        return max(fracao_carga, fracao_dias) + 0.5 * dia_novo / max(self.max_dias, 1)
+
+    @staticmethod
+    def _composicoes(contagens: List[int], total: int) -> Iterator[Tuple[int, ...]]:
+        """Formas de escolher `total` funcionários das classes, das primeiras classes para as últimas"""
+        restantes = [sum(contagens[i:]) for i in range(len(contagens) + 1)]
+
+        def compor(i: int, resto: int) -> Iterator[Tuple[int, ...]]:
+            if resto == 0:
+                yield (0,) * (len(contagens) - i)
+                return
+            if restantes[i] < resto:
+                return
+            for q in range(min(contagens[i], resto), -1, -1):
+                for cauda in compor(i + 1, resto - q):
+                    yield (q,) + cauda
+
+        return compor(0, total)
+
+    def _proximo_estado(self, estado: Tuple, escalado: bool, dia: int, turno: int) -> Tuple:
+        carga, dias, trabalha_hoje, noite_anterior = estado
+        if escalado:
+            carga = min(carga + 1, self.carga + 1)
+            if not trabalha_hoje:
+                dias = min(dias + 1, self.max_dias + 1)
+            trabalha_hoje = True
+        if turno == N_TURNOS - 1:
+            # Fim do dia (e, no domingo, da semana)
+            noite_anterior, trabalha_hoje = escalado, False
+            if dia % N_DIAS == N_DIAS - 1:
+                carga, dias = 0, 0
+        return (carga, dias, trabalha_hoje, noite_anterior)
+
+    def _transicao(self, classes, composicao, dia: int, turno: int) -> Tuple:
+        novas: Counter = Counter()
+        for (estado, n), q in zip(classes, composicao):
+            if q:
+                novas[self._proximo_estado(estado, True, dia, turno)] += q
+            if n - q:
+                novas[self._proximo_estado(estado, False, dia, turno)] += n - q
+        return tuple(sorted(novas.items()))
+
+    def _limite_inferior(self, k: int, classes: Tuple) -> int:
+        """Violações mínimas do turno `k` em diante, pela capacidade que resta na semana"""
+        semana = k // (N_DIAS * N_TURNOS)
+        fim_semana = (semana + 1) * N_DIAS * N_TURNOS
+        demandas = self.demanda[k:fim_semana]
+        restantes = fim_semana - k
+        restantes_hoje = N_TURNOS - k % N_TURNOS
+
+        oferta, ganho = 0, max(demandas)
+        for (carga, dias, trabalha_hoje, _), n in classes:
+            livre_carga = self.carga - carga if carga <= self.carga else restantes
+            if dias <= self.max_dias:
+                livre_dias = (restantes_hoje if trabalha_hoje else 0) + N_TURNOS * (self.max_dias - dias)
+            else:
+                livre_dias = restantes
+            capacidade = min(restantes, livre_carga, livre_dias)
+            oferta += n * capacidade
+            ganho = max(ganho, restantes - capacidade)
+
+        deficit = sum(demandas) - oferta
+        limite = math.ceil(deficit / ganho) if deficit > 0 else 0
+        return limite + self.limite_apos_semana[semana]
+
+    def _reconstruir(self, caminho: List) -> np.ndarray:
+        """Converte as escolhas por classe em um indivíduo concreto"""
+        individuo = self.base.copy()
+        estados = [(0, 0, False, False)] * len(self.linhas_livres)
+        for k, escolhas in enumerate(caminho):
+            dia, turno = divmod(k, N_TURNOS)
+            escalados = set()
+            for estado, q in escolhas:
+                indices = [i for i, atual in enumerate(estados) if atual == estado][:q]
+                escalados.update(indices)
+            for i in escalados:
+                individuo[self.linhas_livres[i], dia, turno] = True
+            estados = [
+                self._proximo_estado(estado, i in escalados, dia, turno) for i, estado in enumerate(estados)
+            ]
+        return individuo
+
+
+def resolver_branch_and_bound(service: "EscalaGeneticaService", tempo_limite: float) -> SolucaoExata:
+    """Branch and bound sem dependências externas"""
+    return _BranchAndBound(service, tempo_limite).resolver()
+
+
+SOLVERS: Dict[str, Callable[["EscalaGeneticaService", float], SolucaoExata]] = {
+    "cpsat": resolver_cpsat,
+    "branch_and_bound": resolver_branch_and_bound,
+}
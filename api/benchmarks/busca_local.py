@@ -0,0 +1,78 @@
+"""
+Comparação do AG puro com o AG memético (busca local no melhor indivíduo)
+
+Para cada instância e semente, executa as duas variantes até zero violações
+(`fitness_alvo=0`) ou até o limite de gerações, partindo de populações
+aleatórias para isolar o efeito da busca local.
+
+Uso (a partir de `api/`):
+
+    python -m benchmarks.busca_local [--sementes 5] [--orcamento 200]
+"""
+
+import argparse
+import statistics
+import time
+
+from app.core.constants import DIAS_SEMANA
+from app.models.schemas import ConfiguracaoEscala, Funcionario
+from app.services.genetic_algorithm import EscalaGeneticaService
+
+# (nome, funcionários, cobertura mínima, semanas, proibir noite-manhã)
+INSTANCIAS = [
+    ("10 func, 1 semana", 10, 2, 1, False),
+    ("30 func, 1 semana", 30, 5, 1, True),
+    ("30 func, 4 semanas", 30, 5, 4, True),
+    ("60 func, 13 semanas", 60, 10, 13, True),
+]
+
+
+def executar(n_funcionarios, cobertura, n_semanas, noite_manha, semente, busca, orcamento):
+    funcionarios = [
+        Funcionario(id=i + 1, nome=f"F{i + 1}", preferencias_folga=[DIAS_SEMANA[i % 7]])
+        for i in range(n_funcionarios)
+    ]
+    config = ConfiguracaoEscala(
+        funcionarios=funcionarios,
+        cobertura_minima=cobertura,
+        n_semanas=n_semanas,
+        proibir_noite_manha=noite_manha,
+        parametros={
+            "pop_size": 30,
+            "n_geracoes": 200,
+            "usar_elitismo": True,
+            "fitness_alvo": 0,
+            "fracao_construtiva": 0.0,
+            "busca_local": busca,
+            "orcamento_busca_local": orcamento,
+            "seed": semente,
+        },
+    )
+    service = EscalaGeneticaService(config)
+    inicio = time.perf_counter()
+    service.otimizar()
+    return len(service.evolucao_fitness), service.melhor_fitness, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sementes", type=int, default=5)
+    parser.add_argument("--orcamento", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'instância':<22}{'variante':<10}{'gerações':>10}{'violações':>11}{'tempo (s)':>11}")
+    for nome, n_funcionarios, cobertura, n_semanas, noite_manha in INSTANCIAS:
+        for variante, busca in (("AG", False), ("memético", True)):
+            execucoes = [
+                executar(n_funcionarios, cobertura, n_semanas, noite_manha, semente, busca, args.orcamento)
+                for semente in range(args.sementes)
+            ]
+            geracoes, violacoes, tempos = zip(*execucoes)
+            print(
+                f"{nome:<22}{variante:<10}{statistics.mean(geracoes):>10.1f}"
+                f"{statistics.mean(violacoes):>11.1f}{statistics.mean(tempos):>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Benchmarks de desempenho do motor e dos endpoints
+
+Mede, para equipes sintéticas de tamanhos fixos e sementes fixas:
+
+- motor: tempo de parede de `otimizar`, avaliações por segundo, pico de memória
+  (tracemalloc, em uma execução separada) e tempo até zero violações;
+- HTTP: vazão e percentis de latência de `/otimizar` e `/validar` sob requisições
+  concorrentes, no app em processo (`TestClient`) ou em um servidor via `--url`.
+
+O resultado é gravado em JSON; com `--baseline`, cada métrica é comparada com a
+de um resultado anterior.
+
+Uso (a partir de `api/`):
+
+    python -m benchmarks.desempenho [--tamanhos 6 50 200 1000] [--sementes 3]
+        [--saida resultado.json] [--baseline anterior.json] [--url http://localhost:8000]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.models.schemas import ConfiguracaoEscala
+from app.services.genetic_algorithm import EscalaGeneticaService
+from benchmarks.instancias import TAMANHOS_EQUIPE, gerar_configuracao, gerar_escala
+
+# Métricas comparadas com o baseline e se valores menores são melhores
+METRICAS_MOTOR = {
+    "tempo_s": True,
+    "avaliacoes_por_s": False,
+    "pico_memoria_mb": True,
+    "tempo_ate_zero_s": True,
+}
+METRICAS_HTTP = {
+    "vazao_rps": False,
+    "latencia_p50_ms": True,
+    "latencia_p95_ms": True,
+    "latencia_p99_ms": True,
+}
+
+
+def medir_motor(n_funcionarios: int, semente: int, parametros: Dict[str, Any], memoria: bool = True) -> Dict[str, Any]:
+    """Executa o motor uma vez na instância e coleta as métricas"""
+    config = ConfiguracaoEscala(**gerar_configuracao(n_funcionarios, semente, parametros))
+
+    service = EscalaGeneticaService(config)
+    melhorias = []
+    inicio = time.perf_counter()
+    for _ in service.evoluir():
+        # Só guarda o melhor indivíduo quando ele muda; as violações são contadas fora do tempo
+        if not melhorias or melhorias[-1][1] is not service.melhor_individuo:
+            melhorias.append((time.perf_counter() - inicio, service.melhor_individuo))
+    tempo = time.perf_counter() - inicio
+    tempo_ate_zero = next(
+        (instante for instante, individuo in melhorias if service.contar_violacoes(individuo) == 0), None
+    )
+
+    # O tracemalloc deixa a execução mais lenta; a memória é medida em outra execução
+    pico_memoria = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            for _ in EscalaGeneticaService(config).evoluir():
+                pass
+            pico_memoria = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "n_funcionarios": n_funcionarios,
+        "semente": semente,
+        "tempo_s": tempo,
+        "num_avaliacoes": service.num_avaliacoes,
+        "avaliacoes_por_s": service.num_avaliacoes / tempo,
+        "pico_memoria_mb": pico_memoria,
+        "geracoes": len(service.evolucao_fitness),
+        "melhor_fitness": service.melhor_fitness,
+        "tempo_ate_zero_s": tempo_ate_zero,
+    }
+
+
+def _mediana(valores: List[Optional[float]]) -> Optional[float]:
+    """Mediana ignorando execuções sem o valor (ex.: que não chegaram a zero violações)"""
+    presentes = [v for v in valores if v is not None]
+    return statistics.median(presentes) if presentes else None
+
+
+def resumir_motor(execucoes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Medianas das métricas do motor por tamanho de equipe"""
+    resumo = {}
+    for n_funcionarios in sorted({e["n_funcionarios"] for e in execucoes}):
+        do_tamanho = [e for e in execucoes if e["n_funcionarios"] == n_funcionarios]
+        resumo[str(n_funcionarios)] = {
+            **{metrica: _mediana([e[metrica] for e in do_tamanho]) for metrica in METRICAS_MOTOR},
+            "chegou_a_zero": sum(e["tempo_ate_zero_s"] is not None for e in do_tamanho),
+            "execucoes": len(do_tamanho),
+        }
+    return resumo
+
+
+def medir_endpoint(cliente, caminho: str, corpos: List[Dict[str, Any]], concorrencia: int) -> Dict[str, Any]:
+    """Envia as requisições com `concorrencia` clientes simultâneos e mede a latência"""
+    def enviar(corpo: Dict[str, Any]):
+        inicio = time.perf_counter()
+        response = cliente.post(caminho, json=corpo)
+        return time.perf_counter() - inicio, response
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        respostas = list(executor.map(enviar, corpos))
+    duracao = time.perf_counter() - inicio
+
+    latencias = np.array([latencia for latencia, _ in respostas]) * 1000
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    metricas = {
+        "caminho": caminho,
+        "concorrencia": concorrencia,
+        "requisicoes": len(corpos),
+        "erros": sum(response.status_code != 200 for _, response in respostas),
+        "cache_hits": sum(
+            response.status_code == 200 and response.json().get("cache_hit", False)
+            for _, response in respostas
+        ),
+        "vazao_rps": len(corpos) / duracao,
+        "latencia_p50_ms": float(p50),
+        "latencia_p95_ms": float(p95),
+        "latencia_p99_ms": float(p99),
+        "latencia_max_ms": float(latencias.max()),
+    }
+
+    # Tempo de execução informado pelo próprio servidor, quando presente
+    tempos = [
+        response.json()["tempo_execucao"]
+        for _, response in respostas
+        if response.status_code == 200 and "tempo_execucao" in response.json()
+    ]
+    if tempos:
+        metricas["tempo_execucao_medio_s"] = statistics.mean(tempos)
+    return metricas
+
+
+@contextmanager
+def abrir_cliente(url: Optional[str]) -> Iterator[Any]:
+    """Cliente HTTP para o servidor em `url` ou para o app em processo (com lifespan)"""
+    if url is not None:
+        import httpx
+
+        with httpx.Client(base_url=url, timeout=None) as cliente:
+            yield cliente
+        return
+
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.main import app
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        settings.JOBS_DB_PATH = os.path.join(diretorio, "jobs.db")
+        with TestClient(app) as cliente:
+            yield cliente
+
+
+def medir_http(
+    url: Optional[str],
+    n_funcionarios: int,
+    parametros: Dict[str, Any],
+    requisicoes: int,
+    concorrencias: List[int],
+) -> List[Dict[str, Any]]:
+    """Mede `/otimizar` e `/validar` para cada nível de concorrência"""
+    escala = gerar_escala(gerar_configuracao(n_funcionarios, 1000, parametros))
+
+    resultados = []
+    with abrir_cliente(url) as cliente:
+        for nivel, concorrencia in enumerate(concorrencias):
+            # Uma semente diferente por requisição, e por nível de concorrência, evita
+            # respostas vindas do cache
+            otimizacoes = [
+                gerar_configuracao(n_funcionarios, 1000 + nivel * requisicoes + i, parametros)
+                for i in range(requisicoes)
+            ]
+            for caminho, corpos in (
+                ("/api/v1/otimizar", otimizacoes),
+                ("/api/v1/validar", [escala] * requisicoes),
+            ):
+                medicao = medir_endpoint(cliente, caminho, corpos, concorrencia)
+                if medicao["cache_hits"]:
+                    raise RuntimeError(f"{caminho}: {medicao['cache_hits']} respostas vieram do cache")
+                resultados.append({"n_funcionarios": n_funcionarios, **medicao})
+    return resultados
+
+
+def comparar(atual: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Linhas com a variação de cada métrica em relação ao baseline"""
+    def variacao(metrica, valor, anterior, menor_melhor):
+        if valor is None or not anterior:
+            return f"  {metrica:<20}{'-':>12}"
+        delta = (valor - anterior) / anterior * 100
+        if delta == 0:
+            sinal = "igual"
+        else:
+            sinal = "melhor" if (delta < 0) == menor_melhor else "pior"
+        return f"  {metrica:<20}{anterior:>12.4g}{valor:>12.4g}{delta:>+9.1f}%  {sinal}"
+
+    linhas = []
+    for tamanho, resumo in atual.get("motor", {}).items():
+        anterior = baseline.get("motor", {}).get(tamanho)
+        if anterior is None:
+            continue
+        linhas.append(f"motor, {tamanho} funcionários")
+        for metrica, menor_melhor in METRICAS_MOTOR.items():
+            linhas.append(variacao(metrica, resumo[metrica], anterior[metrica], menor_melhor))
+
+    anteriores_http = {(m["caminho"], m["concorrencia"]): m for m in baseline.get("http", [])}
+    for medicao in atual.get("http", []):
+        anterior = anteriores_http.get((medicao["caminho"], medicao["concorrencia"]))
+        if anterior is None:
+            continue
+        linhas.append(f"{medicao['caminho']}, concorrência {medicao['concorrencia']}")
+        for metrica, menor_melhor in METRICAS_HTTP.items():
+            linhas.append(variacao(metrica, medicao[metrica], anterior[metrica], menor_melhor))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_EQUIPE)
+    parser.add_argument("--sementes", type=int, default=3, help="execuções (sementes 0..n-1) por tamanho")
+    parser.add_argument("--pop-size", type=int, default=30)
+    parser.add_argument("--geracoes", type=int, default=100)
+    parser.add_argument("--sem-memoria", action="store_true", help="não medir o pico de memória")
+    parser.add_argument("--sem-http", action="store_true", help="medir apenas o motor")
+    parser.add_argument("--url", help="servidor a medir (padrão: app em processo)")
+    parser.add_argument("--http-funcionarios", type=int, default=50)
+    parser.add_argument("--requisicoes", type=int, default=40)
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--baseline", help="resultado anterior para comparação")
+    args = parser.parse_args()
+
+    # Sem critérios de parada antecipada: todas as execuções rodam as mesmas gerações
+    parametros = {"pop_size": args.pop_size, "n_geracoes": args.geracoes, "usar_elitismo": True}
+
+    execucoes = []
+    for n_funcionarios in args.tamanhos:
+        for semente in range(args.sementes):
+            execucao = medir_motor(n_funcionarios, semente, parametros, memoria=not args.sem_memoria)
+            execucoes.append(execucao)
+            print(
+                f"motor: {n_funcionarios} funcionários, semente {semente}: "
+                f"{execucao['tempo_s']:.3f} s, {execucao['avaliacoes_por_s']:.0f} avaliações/s",
+                file=sys.stderr,
+            )
+
+    http = []
+    if not args.sem_http:
+        http = medir_http(args.url, args.http_funcionarios, parametros, args.requisicoes, args.concorrencia)
+        for medicao in http:
+            print(
+                f"http: {medicao['caminho']} (concorrência {medicao['concorrencia']}): "
+                f"{medicao['vazao_rps']:.1f} req/s, p95 {medicao['latencia_p95_ms']:.1f} ms",
+                file=sys.stderr,
+            )
+
+    resultado = {
+        "ambiente": {
+            "data": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "parametros": {**parametros, "sementes": args.sementes, "url": args.url},
+        "motor": resumir_motor(execucoes),
+        "execucoes": execucoes,
+        "http": http,
+    }
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+        print("\n".join(comparar(resultado, baseline)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
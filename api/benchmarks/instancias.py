@@ -0,0 +1,69 @@
+"""
+Geradores de instâncias sintéticas para os benchmarks
+
+As equipes são geradas a partir de uma semente fixa, de modo que a mesma
+instância seja reproduzida em qualquer máquina e em qualquer versão do motor.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.core.constants import DIAS_SEMANA, MAX_COBERTURA_MINIMA, TURNOS
+from app.models.schemas import ConfiguracaoEscala
+from app.services.genetic_algorithm import EscalaGeneticaService
+
+# Tamanhos de equipe medidos por padrão
+TAMANHOS_EQUIPE = [6, 50, 200, 1000]
+
+CARGA_MAX_SEMANAL = 6
+FOLGAS_OBRIGATORIAS = 1
+
+
+def gerar_funcionarios(n_funcionarios: int, semente: int) -> List[Dict[str, Any]]:
+    """Equipe sintética com até dois dias de folga preferidos por funcionário"""
+    rng = np.random.default_rng(semente)
+    funcionarios = []
+    for i in range(n_funcionarios):
+        n_preferencias = int(rng.integers(0, 3))
+        dias = rng.choice(len(DIAS_SEMANA), size=n_preferencias, replace=False)
+        funcionarios.append({
+            "id": i + 1,
+            "nome": f"Funcionário {i + 1}",
+            "preferencias_folga": [DIAS_SEMANA[d] for d in sorted(dias)],
+        })
+    return funcionarios
+
+
+def cobertura_para(n_funcionarios: int) -> int:
+    """Cobertura mínima que usa cerca de 70% da capacidade da equipe"""
+    capacidade_por_turno = n_funcionarios * CARGA_MAX_SEMANAL / (len(DIAS_SEMANA) * len(TURNOS))
+    return int(min(MAX_COBERTURA_MINIMA, max(1, 0.7 * capacidade_por_turno)))
+
+
+def gerar_configuracao(
+    n_funcionarios: int,
+    semente: int,
+    parametros: Dict[str, Any],
+    n_semanas: int = 1,
+) -> Dict[str, Any]:
+    """Configuração de escala (no formato JSON da API) para uma equipe sintética"""
+    return {
+        "funcionarios": gerar_funcionarios(n_funcionarios, semente),
+        "carga_max_semanal": CARGA_MAX_SEMANAL,
+        "folgas_obrigatorias": FOLGAS_OBRIGATORIAS,
+        "cobertura_minima": cobertura_para(n_funcionarios),
+        "n_semanas": n_semanas,
+        "parametros": {**parametros, "seed": semente},
+    }
+
+
+def gerar_escala(configuracao: Dict[str, Any]) -> Dict[str, Any]:
+    """Escala completa (entrada de `/validar`) construída para a configuração"""
+    service = EscalaGeneticaService(ConfiguracaoEscala(**configuracao))
+    individuo = service.gerar_populacao(1)[0]
+    return {
+        "escala": service.para_escala(individuo),
+        "funcionarios": configuracao["funcionarios"],
+        "n_semanas": configuracao.get("n_semanas", 1),
+    }
@@ -2,13 +2,41 @@
 Testes básicos para a API
 """
 
+import asyncio
+import json
+import time
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
+from app.core.config import settings
 from app.main import app
+from app.services import genoma
+from app.services.metricas import metricas
+from app.services.solvers import cpsat_disponivel
 
 client = TestClient(app)
 
 
+@pytest.fixture
+def client_lifespan(tmp_path, monkeypatch):
+    """Cliente com o lifespan ativo (pool de processos e fila de jobs)"""
+    monkeypatch.setattr(settings, "JOBS_DB_PATH", str(tmp_path / "jobs.db"))
+    with TestClient(app) as client_com_lifespan:
+        yield client_com_lifespan
+
+
+def aguardar_job(client_jobs, job_id, status_esperados, timeout=30):
+    """Consulta o job até que ele chegue a um dos status esperados"""
+    limite = time.time() + timeout
+    while time.time() < limite:
+        job = client_jobs.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] in status_esperados:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} não chegou a {status_esperados}")
+
+
 def test_configuracao_exemplo():
     """Testa o endpoint de configuração de exemplo"""
     response = client.get("/api/v1/exemplo")
@@ -44,6 +72,108 @@ def test_otimizar_escala():
     assert "num_violacoes" in data
     assert "evolucao_fitness" in data
     assert "tempo_execucao" in data
+    assert data["num_avaliacoes"] == 10 + 19 * 9
+    assert data["geracoes_executadas"] == 20
+    assert data["criterio_parada"] == "n_geracoes"
+
+
+def test_otimizar_escala_varias_semanas():
+    """Com `n_semanas`, a escala cobre todo o horizonte e pode ser validada"""
+    config = {
+        "funcionarios": [
+            {"id": 1, "nome": "Ana"},
+            {"id": 2, "nome": "Bruno"}
+        ],
+        "cobertura_minima": 1,
+        "n_semanas": 4,
+        "proibir_noite_manha": True,
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    
+    response = client.post("/api/v1/otimizar", json=config)
+    assert response.status_code == 200
+    escala = response.json()["escala_otimizada"]
+    assert len(escala["1"]) == 28
+    assert "domingo_4" in escala["1"]
+    
+    dados = {
+        "escala": escala,
+        "funcionarios": config["funcionarios"],
+        "n_semanas": 4,
+        "proibir_noite_manha": True
+    }
+    response = client.post("/api/v1/validar", json=dados)
+    assert response.status_code == 200
+
+
+def test_otimizar_devolve_semente_reprodutivel():
+    """Sem semente, uma é sorteada e devolvida; reenviá-la reproduz o resultado"""
+    config = {
+        "funcionarios": [{"id": i, "nome": f"F{i}"} for i in range(1, 6)],
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    
+    primeiro = client.post("/api/v1/otimizar", json=config).json()
+    seed = primeiro["seed_utilizada"]
+    assert isinstance(seed, int)
+    assert primeiro["parametros_utilizados"]["seed"] == seed
+    
+    config["parametros"]["seed"] = seed
+    segundo = client.post("/api/v1/otimizar", json=config).json()
+    assert segundo["escala_otimizada"] == primeiro["escala_otimizada"]
+    assert segundo["evolucao_fitness"] == primeiro["evolucao_fitness"]
+
+
+def test_otimizar_com_diagnostico_e_metricas():
+    """O diagnóstico só vem quando pedido; as fases de toda otimização vão para /metrics"""
+    config = {
+        "funcionarios": [{"id": i, "nome": f"F{i}"} for i in range(1, 6)],
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    assert client.post("/api/v1/otimizar", json=config).json()["diagnostico"] is None
+    
+    config["parametros"]["diagnostico"] = True
+    diagnostico = client.post("/api/v1/otimizar", json=config).json()["diagnostico"]
+    assert {"inicializacao", "avaliacao", "selecao", "cruzamento", "mutacao"} <= set(diagnostico["tempos_fases"])
+    assert diagnostico["num_avaliacoes"] > 0
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    texto = response.text
+    assert 'escalas_fase_segundos_total{fase="mutacao"}' in texto
+    assert 'escalas_requisicoes_duracao_segundos_count{metodo="POST",rota="/api/v1/otimizar",status="200"}' in texto
+    assert "escalas_otimizacoes_em_andamento 0" in texto
+
+
+def test_otimizar_em_formatos_compactos():
+    """Bitmask e atribuições (por parâmetro ou Accept) descrevem a mesma escala do JSON"""
+    config = {
+        "funcionarios": [{"id": i, "nome": f"F{i}"} for i in range(1, 6)],
+        "n_semanas": 2,
+        "parametros": {"pop_size": 10, "n_geracoes": 10, "seed": 11}
+    }
+    escala = client.post("/api/v1/otimizar", json=config).json()["escala_otimizada"]
+    
+    response = client.post("/api/v1/otimizar?formato=bitmask", json=config)
+    assert response.headers["content-type"] == "application/vnd.escalas.bitmask+json"
+    resultado = response.json()
+    assert resultado["escala_otimizada"] is None
+    individuo = genoma.de_base64(resultado["escala_bitmask"], 5, 14)
+    assert genoma.para_dict(individuo, list(range(1, 6)), genoma.nomes_dias(2)) == {
+        int(i): dias for i, dias in escala.items()
+    }
+    
+    response = client.post(
+        "/api/v1/otimizar", json=config, headers={"Accept": "application/vnd.escalas.atribuicoes+json"}
+    )
+    atribuicoes = {tuple(a) for a in response.json()["atribuicoes"]}
+    assert atribuicoes == {
+        (int(i), dia, turno)
+        for i, dias in escala.items()
+        for dia, turnos in dias.items()
+        for turno, valor in turnos.items()
+        if valor
+    }
 
 
 def test_validar_escala():
@@ -72,3 +202,294 @@ def test_validar_escala():
     assert "num_violacoes" in data
     assert "violacoes" in data
     assert "estatisticas" in data
+
+
+def test_otimizar_escala_em_pool_de_processos(client_lifespan):
+    """Com o lifespan ativo, a otimização roda no pool de processos"""
+    config = {
+        "funcionarios": [
+            {"id": 1, "nome": "Ana"},
+            {"id": 2, "nome": "Bruno"}
+        ],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    
+    assert app.state.executor is not None
+    response = client_lifespan.post("/api/v1/otimizar", json=config)
+    assert response.status_code == 200
+    assert set(response.json()["escala_otimizada"]) == {"1", "2"}
+
+
+def test_job_de_otimizacao(client_lifespan):
+    """Testa a submissão e a consulta de um job até a conclusão"""
+    config = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    
+    response = client_lifespan.post("/api/v1/jobs", json=config)
+    assert response.status_code == 202
+    job = aguardar_job(client_lifespan, response.json()["id"], {"concluido"})
+    assert job["geracao_atual"] == 10
+    assert job["resultado"]["evolucao_fitness"][-1] >= job["melhor_fitness"]
+    
+    assert client_lifespan.get("/api/v1/jobs/inexistente").status_code == 404
+
+
+def test_cancelar_job(client_lifespan):
+    """Um job cancelado para entre gerações"""
+    config = {
+        "funcionarios": [{"id": i, "nome": f"F{i}"} for i in range(1, 301)],
+        "parametros": {"pop_size": 100, "n_geracoes": 200}
+    }
+    
+    job_id = client_lifespan.post("/api/v1/jobs", json=config).json()["id"]
+    aguardar_job(client_lifespan, job_id, {"executando"})
+    response = client_lifespan.delete(f"/api/v1/jobs/{job_id}")
+    assert response.status_code == 200
+    
+    job = aguardar_job(client_lifespan, job_id, {"cancelado"})
+    assert job["geracao_atual"] < 200
+
+
+def test_job_sem_pool_de_processos(tmp_path, monkeypatch):
+    """Sem pool de processos (OTIMIZACAO_WORKERS=0), o job roda na thread do worker"""
+    monkeypatch.setattr(settings, "JOBS_DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(settings, "OTIMIZACAO_WORKERS", 0)
+    config = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    
+    with TestClient(app) as client_sem_pool:
+        assert client_sem_pool.app.state.jobs.executor is None
+        job_id = client_sem_pool.post("/api/v1/jobs", json=config).json()["id"]
+        job = aguardar_job(client_sem_pool, job_id, {"concluido"})
+    assert job["geracao_atual"] == 10
+
+
+def test_otimizar_escala_stream():
+    """Testa o envio do progresso por geração via SSE"""
+    config = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 12}
+    }
+    
+    with client.stream("POST", "/api/v1/otimizar/stream", json=config) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        eventos = [linha for linha in response.iter_lines() if linha.startswith("event:")]
+    
+    assert eventos.count("event: geracao") == 12
+    assert eventos[-1] == "event: resultado"
+
+
+def test_otimizar_escala_stream_em_pool_de_processos(client_lifespan):
+    """Com o pool de processos, a evolução do SSE roda nele e o progresso chega pela fila"""
+    config = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 12}
+    }
+    
+    assert client_lifespan.app.state.executor is not None
+    with client_lifespan.stream("POST", "/api/v1/otimizar/stream", json=config) as response:
+        linhas = [linha for linha in response.iter_lines() if linha.startswith("data:")]
+    
+    geracoes = [json.loads(linha[len("data:"):])["geracao"] for linha in linhas[:-1]]
+    assert geracoes == list(range(1, 13))
+    assert len(json.loads(linhas[-1][len("data:"):])["evolucao_fitness"]) == 12
+
+
+def test_cache_de_resultados(client_lifespan):
+    """Requisições idênticas com semente explícita são respondidas pelo cache"""
+    config = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 10, "seed": 123}
+    }
+    
+    primeira = client_lifespan.post("/api/v1/otimizar", json=config).json()
+    segunda = client_lifespan.post("/api/v1/otimizar", json=config).json()
+    assert primeira["cache_hit"] is False
+    assert segunda["cache_hit"] is True
+    assert segunda["escala_otimizada"] == primeira["escala_otimizada"]
+    
+    # Sem semente, a otimização é sempre executada
+    del config["parametros"]["seed"]
+    assert client_lifespan.post("/api/v1/otimizar", json=config).json()["cache_hit"] is False
+    assert client_lifespan.post("/api/v1/otimizar", json=config).json()["cache_hit"] is False
+
+
+def test_replanejar_escala():
+    """Testa o replanejamento a partir de uma escala anterior"""
+    config = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    escala = client.post("/api/v1/otimizar", json=config).json()["escala_otimizada"]
+    
+    config["funcionarios"].append({"id": 3, "nome": "Carla"})
+    config["escala_inicial"] = escala
+    config["funcionarios_alterados"] = [3]
+    response = client.post("/api/v1/replanejar", json=config)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["escala_otimizada"]["1"] == escala["1"]
+    assert set(data["escala_otimizada"]) == {"1", "2", "3"}
+    
+    del config["escala_inicial"]
+    assert client.post("/api/v1/replanejar", json=config).status_code == 400
+
+
+def test_otimizar_lote():
+    """Testa o lote: um resultado por item e erros isolados"""
+    valida = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "cobertura_minima": 1,
+        "parametros": {"pop_size": 10, "n_geracoes": 10}
+    }
+    lote = [valida, {"funcionarios": []}, {"carga_max_semanal": 6}, valida]
+    
+    response = client.post("/api/v1/otimizar/lote", json=lote)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    linhas = {item["indice"]: item for item in map(json.loads, response.text.splitlines())}
+    assert set(linhas) == {0, 1, 2, 3}
+    assert "resultado" in linhas[0] and "resultado" in linhas[3]
+    assert linhas[1]["erro"] == "Lista de funcionários não pode estar vazia"
+    assert "funcionarios" in linhas[2]["erro"]
+
+
+def test_validar_lote():
+    """Testa a validação em lote com bitmasks e base64"""
+    todos_os_turnos = 2 ** 21 - 1
+    dados = {
+        "funcionarios": [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bruno"}],
+        "carga_max_semanal": 21,
+        "folgas_obrigatorias": 0,
+        "escalas": [
+            [todos_os_turnos, todos_os_turnos],
+            [0, todos_os_turnos],
+            "///////A",
+        ],
+    }
+    
+    response = client.post("/api/v1/validar/lote", json=dados)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["num_escalas"] == 3
+    assert data["num_violacoes"] == [0, 21, 0]
+    assert data["num_validas"] == 2
+    assert data["detalhes"] is None
+    
+    dados["detalhes"] = True
+    detalhes = client.post("/api/v1/validar/lote", json=dados).json()["detalhes"]
+    assert detalhes[1]["violacoes"][0] == "Cobertura insuficiente em segunda manha."
+    assert detalhes[1]["estatisticas"]["Ana"]["turnos_totais"] == 0
+    
+    dados["escalas"] = [[1]]
+    assert client.post("/api/v1/validar/lote", json=dados).status_code == 400
+    for mascara in (2 ** 21, -1, 2 ** 63, 2 ** 70):
+        dados["escalas"] = [[mascara, 0]]
+        assert client.post("/api/v1/validar/lote", json=dados).status_code == 400
+
+
+def test_otimizar_com_solver_exato():
+    """O solver é escolhido por requisição e o resultado informa se é ótimo"""
+    config = {
+        "funcionarios": [{"id": i, "nome": f"F{i}"} for i in range(1, 9)],
+        "cobertura_minima": 2,
+        "parametros": {"solver": "exato", "tempo_max_segundos": 5}
+    }
+    
+    response = client.post("/api/v1/otimizar", json=config)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["solver"] in ("cpsat", "branch_and_bound")
+    assert data["num_violacoes"] == 0
+    assert data["otimo_provado"] is True
+    assert data["gap"] == 0
+    
+    if not cpsat_disponivel():
+        config["parametros"]["solver"] = "cpsat"
+        response = client.post("/api/v1/otimizar", json=config)
+        assert response.status_code == 400
+
+
+def test_stream_interrompido_deixa_de_contar_em_andamento():
+    """Desconectar do SSE no meio da evolução libera o medidor de otimizações em andamento"""
+    config = {
+        "funcionarios": [{"id": i, "nome": f"F{i}"} for i in range(1, 41)],
+        "cobertura_minima": 5,
+        "parametros": {"pop_size": 100, "n_geracoes": 200},
+    }
+    corpo = json.dumps(config).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/v1/otimizar/stream", "raw_path": b"/api/v1/otimizar/stream",
+        "root_path": "", "query_string": b"", "client": ("teste", 1), "server": ("teste", 80),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(corpo)).encode())],
+    }
+    
+    async def executar():
+        desconectou = asyncio.Event()
+        mensagens = [{"type": "http.request", "body": corpo, "more_body": False}]
+        
+        async def receive():
+            if mensagens:
+                return mensagens.pop()
+            await desconectou.wait()
+            return {"type": "http.disconnect"}
+        
+        async def send(mensagem):
+            # O cliente sai logo depois do primeiro evento de geração
+            if mensagem["type"] == "http.response.body" and b"event: geracao" in mensagem.get("body", b""):
+                desconectou.set()
+        
+        await asyncio.wait_for(app(scope, receive, send), timeout=10)
+        
+        # Ainda com o loop rodando: nada pode depender do fechamento dos geradores no fim
+        return metricas.exportar({})
+    
+    assert "escalas_otimizacoes_em_andamento 0\n" in asyncio.run(executar())
+
+
+def test_validar_lote_com_varias_semanas():
+    """O lote valida o escala_bitmask de otimizações de várias semanas com as mesmas regras do /validar"""
+    config = {
+        "funcionarios": [{"id": i, "nome": f"F{i}"} for i in range(1, 7)],
+        "cobertura_minima": 1,
+        "n_semanas": 2,
+        "proibir_noite_manha": True,
+        "parametros": {"pop_size": 10, "n_geracoes": 10, "seed": 5},
+    }
+    resultado = client.post("/api/v1/otimizar?formato=bitmask", json=config).json()
+    individuo = genoma.de_base64(resultado["escala_bitmask"], 6, 14)
+    inteiros = [int(sum(1 << k for k in np.flatnonzero(linha))) for linha in individuo.reshape(6, -1)]
+    
+    dados = {
+        "funcionarios": config["funcionarios"],
+        "cobertura_minima": 1,
+        "n_semanas": 2,
+        "proibir_noite_manha": True,
+        "escalas": [resultado["escala_bitmask"], inteiros],
+    }
+    response = client.post("/api/v1/validar/lote", json=dados)
+    assert response.status_code == 200
+    assert response.json()["num_violacoes"] == [resultado["num_violacoes"]] * 2
+    
+    # Noite de segunda seguida da manhã de terça: só conta com proibir_noite_manha
+    dados.update(funcionarios=[{"id": 1, "nome": "Ana"}], folgas_obrigatorias=0, escalas=[[1 << 2 | 1 << 3]])
+    com_regra = client.post("/api/v1/validar/lote", json=dados).json()["num_violacoes"][0]
+    dados["proibir_noite_manha"] = False
+    assert com_regra == client.post("/api/v1/validar/lote", json=dados).json()["num_violacoes"][0] + 1
+    
+    dados["escalas"] = [[2 ** 42]]
+    assert client.post("/api/v1/validar/lote", json=dados).status_code == 400
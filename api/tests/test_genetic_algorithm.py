@@ -0,0 +1,548 @@
+"""
+Testes do serviço de algoritmo genético
+"""
+
+import numpy as np
+import pytest
+
+from app.core.constants import DIAS_SEMANA, TURNOS
+from app.core.layout import layout
+from app.models.schemas import ConfiguracaoEscala, Funcionario
+from app.services import genoma, operadores
+from app.services.busca_local import busca_local
+from app.services.cache import CacheResultados, chave_configuracao
+from app.services.construcao import construir_populacao
+from app.services.genetic_algorithm import EscalaGeneticaService
+
+
+def criar_config(n_funcionarios: int = 6, preferencias: bool = False, **kwargs) -> ConfiguracaoEscala:
+    """Cria uma configuração com funcionários sintéticos (com um dia de folga preferido cada)"""
+    funcionarios = [
+        Funcionario(
+            id=i + 1,
+            nome=f"Funcionario {i + 1}",
+            preferencias_folga=[DIAS_SEMANA[i % 7]] if preferencias else [],
+        )
+        for i in range(n_funcionarios)
+    ]
+    return ConfiguracaoEscala(funcionarios=funcionarios, **kwargs)
+
+
+def test_gerar_populacao_respeita_carga():
+    """Cada funcionário recebe `carga_max_semanal` dias com um turno cada"""
+    rng = np.random.default_rng(0)
+    populacao = genoma.gerar_populacao(rng, 10, 5, 4)
+    assert populacao.shape == (10, 5, genoma.N_DIAS, genoma.N_TURNOS)
+    assert (populacao.sum(axis=(2, 3)) == 4).all()
+    assert (populacao.sum(axis=3) <= 1).all()
+
+
+def test_cruzar_herda_bits_dos_pais():
+    """Todo bit do filho vem de um dos pais"""
+    rng = np.random.default_rng(1)
+    pais1 = genoma.gerar_populacao(rng, 8, 4, 3)
+    pais2 = genoma.gerar_populacao(rng, 8, 4, 3)
+    filhos = genoma.cruzar(rng, pais1, pais2)
+    assert ((filhos == pais1) | (filhos == pais2)).all()
+
+
+def test_conversao_dict_ida_e_volta():
+    """A conversão genoma -> dict -> genoma preserva a escala"""
+    rng = np.random.default_rng(2)
+    individuo = genoma.gerar_populacao(rng, 1, 3, 5)[0]
+    escala = genoma.para_dict(individuo, [10, 20, 30])
+    assert set(escala) == {10, 20, 30}
+    assert (genoma.de_dict(escala, [10, 20, 30]) == individuo).all()
+
+
+def test_otimizar_retorna_genoma():
+    """A otimização devolve um genoma com a forma da escala"""
+    service = EscalaGeneticaService(criar_config(cobertura_minima=1))
+    melhor, evolucao, tempo = service.otimizar()
+    assert melhor.shape == (6, genoma.N_DIAS, genoma.N_TURNOS)
+    assert len(evolucao) == service.params.n_geracoes
+    assert service.avaliar_individuo(melhor) == min(evolucao)
+
+
+def violacoes_referencia(service: EscalaGeneticaService, escala: dict) -> list:
+    """Verificação das restrições percorrendo o dict, como na versão original"""
+    violacoes = []
+    for f in service.funcionarios:
+        total_turnos = sum(escala[f.id][dia][turno] for dia in DIAS_SEMANA for turno in TURNOS)
+        folgas = sum(all(escala[f.id][dia][t] == 0 for t in TURNOS) for dia in DIAS_SEMANA)
+        if total_turnos > service.carga_max_semanal:
+            violacoes.append(f"{f.nome} excedeu carga máxima semanal.")
+        if folgas < service.folgas_obrigatorias:
+            violacoes.append(f"{f.nome} não tem folgas suficientes.")
+    for dia in DIAS_SEMANA:
+        for turno in TURNOS:
+            trabalhando = sum(escala[f.id][dia][turno] for f in service.funcionarios)
+            if trabalhando < service.cobertura_minima:
+                violacoes.append(f"Cobertura insuficiente em {dia} {turno}.")
+    return violacoes
+
+
+def test_avaliacao_vetorizada_concorda_com_checar_restricoes():
+    """A contagem vetorizada encontra as mesmas violações que o relatório"""
+    rng = np.random.default_rng(3)
+    service = EscalaGeneticaService(
+        criar_config(8, carga_max_semanal=5, folgas_obrigatorias=2, cobertura_minima=2)
+    )
+    populacao = rng.random((50, 8, genoma.N_DIAS, genoma.N_TURNOS)) < rng.random((50, 1, 1, 1))
+    contagens = service.contar_violacoes(populacao)
+    for individuo, valor in zip(populacao, contagens):
+        escala = service.para_escala(individuo)
+        violacoes = service.checar_restricoes(escala)
+        assert violacoes == violacoes_referencia(service, escala)
+        assert valor == len(violacoes)
+
+
+def fitness_referencia(service: EscalaGeneticaService, escala: dict) -> int:
+    """Fitness ponderado percorrendo o dict: violações pela magnitude e termos suaves"""
+    pesos = service.config.pesos
+    n = len(service.funcionarios)
+    carga_equilibrada = min(service.carga_max_semanal, -(-service.cobertura_minima * 21 // n))
+    violacoes = suaves = 0
+    for f in service.funcionarios:
+        dias = escala[f.id]
+        total_turnos = sum(dias[dia][turno] for dia in DIAS_SEMANA for turno in TURNOS)
+        trabalhados = [dia for dia in DIAS_SEMANA if any(dias[dia][t] for t in TURNOS)]
+        violacoes += max(total_turnos - service.carga_max_semanal, 0)
+        violacoes += max(service.folgas_obrigatorias - (7 - len(trabalhados)), 0)
+        suaves += pesos.preferencia_folga * len(set(trabalhados) & set(f.preferencias_folga))
+        suaves += pesos.carga_desigual * max(total_turnos - carga_equilibrada, 0)
+        suaves += pesos.noites_seguidas * sum(
+            dias[a]["noite"] and dias[b]["noite"] for a, b in zip(DIAS_SEMANA, DIAS_SEMANA[1:])
+        )
+    for dia in DIAS_SEMANA:
+        for turno in TURNOS:
+            trabalhando = sum(escala[f.id][dia][turno] for f in service.funcionarios)
+            violacoes += max(service.cobertura_minima - trabalhando, 0)
+    return pesos.violacao * violacoes + suaves
+
+
+def test_fitness_ponderado_concorda_com_referencia():
+    """O fitness pondera a magnitude das violações e os critérios suaves"""
+    rng = np.random.default_rng(8)
+    funcionarios = [
+        Funcionario(id=i + 1, nome=f"F{i + 1}", preferencias_folga=[DIAS_SEMANA[i % 7], "domingo"])
+        for i in range(8)
+    ]
+    service = EscalaGeneticaService(ConfiguracaoEscala(
+        funcionarios=funcionarios, carga_max_semanal=5, cobertura_minima=2,
+        pesos={"violacao": 50, "preferencia_folga": 3, "carga_desigual": 2, "noites_seguidas": 5},
+    ))
+    populacao = rng.random((40, 8, genoma.N_DIAS, genoma.N_TURNOS)) < rng.random((40, 1, 1, 1))
+    fitness = service.avaliar_populacao(populacao)
+    for individuo, valor in zip(populacao, fitness):
+        assert valor == fitness_referencia(service, service.para_escala(individuo))
+
+
+def test_otimizar_avalia_cada_individuo_uma_vez():
+    """Só os indivíduos novos de cada geração são avaliados"""
+    config = criar_config(
+        parametros={"pop_size": 10, "n_geracoes": 15, "usar_elitismo": True}
+    )
+    service = EscalaGeneticaService(config)
+    service.otimizar()
+    assert service.num_avaliacoes == 10 + 14 * 9
+
+
+@pytest.mark.parametrize("horizonte", [{}, {"n_semanas": 3, "proibir_noite_manha": True}])
+def test_avaliacao_incremental_concorda_com_avaliacao_completa(horizonte):
+    """O fitness incremental acompanha a avaliação completa após cada inversão"""
+    rng = np.random.default_rng(4)
+    service = EscalaGeneticaService(
+        criar_config(
+            5, preferencias=True, carga_max_semanal=4, folgas_obrigatorias=2, cobertura_minima=2,
+            pesos={"preferencia_folga": 3, "carga_desigual": 2, "noites_seguidas": 5}, **horizonte
+        )
+    )
+    avaliador = service.criar_avaliador(service.gerar_populacao(1)[0])
+    assert avaliador.fitness == service.avaliar_individuo(avaliador.individuo)
+    for _ in range(300):
+        movimento = (rng.integers(5), rng.integers(service.n_dias), rng.integers(genoma.N_TURNOS))
+        esperado = avaliador.fitness + avaliador.delta(*movimento)
+        assert avaliador.inverter(*movimento) == esperado
+        assert esperado == service.avaliar_individuo(avaliador.individuo)
+
+
+def test_evoluir_para_quando_o_consumo_para():
+    """Parar de consumir o gerador interrompe a evolução"""
+    service = EscalaGeneticaService(
+        criar_config(parametros={"pop_size": 10, "n_geracoes": 50})
+    )
+    for progresso in service.evoluir():
+        if progresso.geracao == 5:
+            break
+    assert len(service.evolucao_fitness) == 5
+    assert service.num_avaliacoes == 10 * 5
+
+
+def test_parada_antecipada_por_fitness_alvo():
+    """A evolução para assim que o fitness alvo é atingido"""
+    service = EscalaGeneticaService(
+        criar_config(
+            8, parametros={"n_geracoes": 200, "fitness_alvo": 0, "fracao_construtiva": 0.0, "seed": 0}
+        )
+    )
+    melhor, evolucao, tempo = service.otimizar()
+    assert evolucao[0] > 0
+    assert evolucao[-1] == 0
+    assert len(evolucao) < 200
+    assert service.criterio_parada == "fitness_alvo"
+    assert service.contar_violacoes(melhor) == 0
+
+
+def test_parada_antecipada_por_estagnacao():
+    """A evolução para após `geracoes_sem_melhora` gerações sem melhora"""
+    service = EscalaGeneticaService(
+        criar_config(
+            cobertura_minima=10,
+            parametros={"n_geracoes": 200, "geracoes_sem_melhora": 3, "usar_elitismo": True},
+        )
+    )
+    melhor, evolucao, tempo = service.otimizar()
+    assert service.criterio_parada == "geracoes_sem_melhora"
+    assert evolucao[-4] == evolucao[-1] == min(evolucao)
+
+
+def test_modo_ilhas_reprodutivel():
+    """Com a mesma semente, o modo de ilhas produz o mesmo resultado"""
+    parametros = {
+        "pop_size": 10, "n_geracoes": 20, "n_ilhas": 3,
+        "intervalo_migracao": 5, "usar_elitismo": True, "seed": 42,
+    }
+    resultados = []
+    for _ in range(2):
+        service = EscalaGeneticaService(criar_config(cobertura_minima=3, parametros=parametros))
+        melhor, evolucao, tempo = service.otimizar()
+        resultados.append((melhor, evolucao, service.num_avaliacoes))
+    
+    (melhor1, evolucao1, avaliacoes1), (melhor2, evolucao2, avaliacoes2) = resultados
+    assert (melhor1 == melhor2).all()
+    assert evolucao1 == evolucao2
+    assert len(evolucao1) == 20
+    assert avaliacoes1 == avaliacoes2 == 3 * (10 + 19 * 9)
+
+
+def test_cache_em_disco_sobrevive_reinicio(tmp_path):
+    """O cache em disco é lido por uma nova instância e respeita o TTL"""
+    caminho = str(tmp_path / "cache.db")
+    config = criar_config(parametros={"seed": 1})
+    chave = chave_configuracao(config)
+    assert chave is not None
+    assert chave_configuracao(criar_config()) is None
+    
+    cache = CacheResultados(tamanho=2, ttl_segundos=60, caminho_disco=caminho)
+    cache.guardar(chave, {"num_violacoes": 0})
+    cache.fechar()
+    
+    assert CacheResultados(2, 60, caminho).obter(chave) == {"num_violacoes": 0}
+    
+    expirado = CacheResultados(tamanho=2, ttl_segundos=0)
+    expirado.guardar(chave, {"num_violacoes": 0})
+    assert expirado.obter(chave) is None
+
+
+def test_escala_inicial_com_funcionarios_congelados():
+    """A população parte da escala anterior e as linhas congeladas não mudam"""
+    anterior = EscalaGeneticaService(criar_config(4, cobertura_minima=1))
+    escala_anterior = anterior.para_escala(anterior.gerar_populacao(1)[0])
+    
+    # Funcionário 4 sai e o 7 entra; 1 e 2 ficam congelados
+    config = criar_config(
+        4,
+        cobertura_minima=1,
+        escala_inicial={i: escala_anterior[i] for i in (1, 2, 3)},
+        funcionarios_congelados=[1, 2, 7],
+        parametros={"pop_size": 10, "n_geracoes": 10},
+    )
+    config.funcionarios[3] = Funcionario(id=7, nome="Novo")
+    service = EscalaGeneticaService(config)
+    
+    populacao = service.gerar_populacao(10)
+    inicial = genoma.de_dict({i: escala_anterior[i] for i in (1, 2, 3)}, [1, 2, 3])
+    assert (populacao[0, :3] == inicial).all()
+    assert service.livres.tolist() == [False, False, True, True]
+    
+    melhor, evolucao, tempo = service.otimizar()
+    assert (melhor[:2] == inicial[:2]).all()
+
+
+def test_formatos_compactos_ida_e_volta():
+    """Bitmasks de 21 bits e bitmaps base64 preservam a escala"""
+    rng = np.random.default_rng(5)
+    populacao = rng.random((4, 3, genoma.N_DIAS, genoma.N_TURNOS)) < 0.3
+    bits = populacao.reshape(4, 3, genoma.N_DIAS * genoma.N_TURNOS).astype(np.int64)
+    mascaras = (bits << np.arange(genoma.N_DIAS * genoma.N_TURNOS)).sum(axis=-1)
+    assert (genoma.de_bitmasks(mascaras) == populacao).all()
+    linhas = genoma.de_inteiros(mascaras.ravel().tolist(), genoma.N_DIAS)
+    assert (linhas.reshape(populacao.shape) == populacao).all()
+    assert (genoma.de_base64(genoma.para_base64(populacao[0]), 3) == populacao[0]).all()
+    
+    horizonte = rng.random((4, 3, 13 * genoma.N_DIAS, genoma.N_TURNOS)) < 0.3
+    bits = genoma.compactar(horizonte)
+    assert bits.shape == (4, 3, 35)
+    assert (genoma.descompactar(bits, 13 * genoma.N_DIAS) == horizonte).all()
+
+
+def test_horizonte_de_varias_semanas():
+    """Carga e folgas valem por semana e a regra noite-manhã cruza semanas"""
+    service = EscalaGeneticaService(
+        criar_config(2, carga_max_semanal=3, cobertura_minima=1, n_semanas=2, proibir_noite_manha=True)
+    )
+    assert service.nomes_dias[7] == "segunda_2"
+    populacao = service.gerar_populacao(10)
+    assert populacao.shape == (10, 2, 14, genoma.N_TURNOS)
+    assert (populacao.reshape(10, 2, 2, -1).sum(axis=-1) == 3).all()
+    
+    # Funcionário 1: 4 turnos na semana 1 (nenhum na 2) e noite de domingo_1 + manhã de segunda_2
+    individuo = np.zeros((2, 14, genoma.N_TURNOS), dtype=bool)
+    individuo[0, [0, 1, 2], 1] = True
+    individuo[0, 6, 2] = True
+    individuo[0, 7, 0] = True
+    violacoes = service.checar_restricoes(service.para_escala(individuo))
+    assert "Funcionario 1 excedeu carga máxima semanal na semana 1." in violacoes
+    assert "Funcionario 1 trabalha na noite de domingo_1 e na manhã seguinte." in violacoes
+    assert not any("semana 2" in violacao for violacao in violacoes)
+    assert service.contar_violacoes(individuo) == len(violacoes)
+
+
+def test_heuristica_construtiva_viavel_e_respeita_preferencias():
+    """A construção gulosa cobre os turnos sem violar carga e folgas, evitando dias preferidos"""
+    funcionarios = [
+        Funcionario(id=i + 1, nome=f"Funcionario {i + 1}", preferencias_folga=[DIAS_SEMANA[i % 7]])
+        for i in range(10)
+    ]
+    config = ConfiguracaoEscala(
+        funcionarios=funcionarios, cobertura_minima=2, n_semanas=2, proibir_noite_manha=True
+    )
+    service = EscalaGeneticaService(config)
+    populacao = construir_populacao(
+        service.rng, 8, 6, 1, 2, service.preferencias_folga, proibir_noite_manha=True
+    )
+    assert (service.contar_violacoes(populacao) == 0).all()
+    assert not (populacao.any(axis=-1) & service.preferencias_folga).any()
+
+
+def test_heuristica_construtiva_com_carga_acima_de_sete():
+    """Cargas acima de 7 turnos por semana usam mais de um turno no mesmo dia"""
+    rng = np.random.default_rng(6)
+    preferencias = np.zeros((7, genoma.N_DIAS), dtype=bool)
+    populacao = construir_populacao(rng, 4, 10, 1, 3, preferencias)
+    assert (populacao.sum(axis=(2, 3)) <= 10).all()
+    assert (populacao.sum(axis=(2, 3)) > genoma.N_DIAS).any()
+    assert (populacao.sum(axis=1) == 3).all()
+
+
+def test_busca_local_repara_sem_alterar_congelados():
+    """A busca local reduz as violações, mantém o fitness exato e respeita as linhas congeladas"""
+    service = EscalaGeneticaService(
+        criar_config(12, cobertura_minima=3, n_semanas=2, proibir_noite_manha=True)
+    )
+    individuo = genoma.gerar_populacao(service.rng, 1, 12, 6, 2)[0]
+    avaliador = service.criar_avaliador(individuo)
+    livres = np.arange(12) >= 2
+    inicial = avaliador.fitness
+    
+    final = busca_local(avaliador, service.rng, 500, livres)
+    assert final < inicial
+    assert final == service.avaliar_individuo(avaliador.individuo)
+    assert (avaliador.individuo[:2] == individuo[:2]).all()
+
+
+def test_busca_local_segue_apos_turno_sem_reparo(monkeypatch):
+    """Um turno descoberto sem candidatos (todos já escalados) não encerra a busca"""
+    from app.services import busca_local as modulo
+    
+    movimentos = []
+    aplicar = modulo._aplicar_se_nao_piorar
+    
+    def contar(avaliador, movimento):
+        movimentos.append(movimento)
+        return aplicar(avaliador, movimento)
+    
+    monkeypatch.setattr(modulo, "_aplicar_se_nao_piorar", contar)
+    service = EscalaGeneticaService(criar_config(3, cobertura_minima=4))
+    individuo = np.zeros((3, genoma.N_DIAS, genoma.N_TURNOS), dtype=bool)
+    individuo[:, :, 0] = True
+    avaliador = service.criar_avaliador(individuo)
+    inicial = avaliador.fitness
+    
+    final = busca_local(avaliador, service.rng, 1000)
+    assert len(movimentos) == 1000
+    assert final < inicial
+    assert final == service.avaliar_individuo(avaliador.individuo)
+
+
+def test_otimizar_com_busca_local():
+    """Com a fase memética, uma população aleatória chega a zero violações"""
+    service = EscalaGeneticaService(
+        criar_config(
+            10,
+            parametros={
+                "n_geracoes": 50, "fitness_alvo": 0, "fracao_construtiva": 0.0,
+                "busca_local": True, "seed": 0,
+            },
+        )
+    )
+    melhor, evolucao, tempo = service.otimizar()
+    assert service.criterio_parada == "fitness_alvo"
+    assert service.contar_violacoes(melhor) == 0
+
+
+def test_branch_and_bound_prova_otimo():
+    """O backend exato devolve a escala ótima com o limite inferior provado"""
+    config = criar_config(5, parametros={"solver": "branch_and_bound", "seed": 1})
+    service = EscalaGeneticaService(config)
+    melhor, evolucao, tempo = service.otimizar()
+    resultado = service.montar_resultado(melhor, evolucao, tempo)
+    
+    # 5 funcionários cobrem no máximo 30 dos 42 turnos necessários sem violar a carga
+    assert resultado.num_violacoes == 1
+    assert resultado.otimo_provado is True
+    assert resultado.gap == 0
+    assert resultado.criterio_parada == "otimo"
+    assert resultado.solver == "branch_and_bound"
+
+
+def test_branch_and_bound_respeita_congelados():
+    """Linhas congeladas da escala inicial não mudam no backend exato"""
+    anterior = EscalaGeneticaService(criar_config(4, cobertura_minima=1))
+    escala_anterior = anterior.para_escala(anterior.gerar_populacao(1)[0])
+    config = criar_config(
+        4,
+        cobertura_minima=1,
+        escala_inicial=escala_anterior,
+        funcionarios_congelados=[1],
+        parametros={"solver": "branch_and_bound", "tempo_max_segundos": 2},
+    )
+    service = EscalaGeneticaService(config)
+    melhor, evolucao, tempo = service.otimizar()
+    assert (melhor[0] == service.individuo_inicial[0]).all()
+    assert service.contar_violacoes(melhor) >= service.limite_inferior
+
+
+def test_cpsat_prova_otimo():
+    """Com OR-Tools instalado, o CP-SAT resolve a mesma instância"""
+    pytest.importorskip("ortools")
+    service = EscalaGeneticaService(criar_config(5, parametros={"solver": "cpsat", "seed": 1}))
+    melhor, evolucao, tempo = service.otimizar()
+    assert service.contar_violacoes(melhor) == service.limite_inferior == 1
+
+
+def test_execucoes_com_mesma_semente_sao_identicas():
+    """Cada serviço tem o seu gerador: a mesma semente reproduz a execução, mesmo intercalada"""
+    parametros = {"n_geracoes": 30, "busca_local": True, "orcamento_busca_local": 20, "seed": 123}
+    servicos = [EscalaGeneticaService(criar_config(8, cobertura_minima=3, parametros=parametros)) for _ in range(2)]
+    outro = EscalaGeneticaService(criar_config(8, cobertura_minima=3, parametros={**parametros, "seed": 124}))
+    
+    # Intercalar as gerações das execuções não deve afetar nenhuma delas
+    for progressos in zip(*(servico.evoluir() for servico in servicos + [outro])):
+        pass
+    assert (servicos[0].melhor_individuo == servicos[1].melhor_individuo).all()
+    assert servicos[0].evolucao_fitness == servicos[1].evolucao_fitness
+    assert not (outro.melhor_individuo == servicos[0].melhor_individuo).all()
+    
+    sem_semente = EscalaGeneticaService(criar_config())
+    assert sem_semente.params.seed is None and sem_semente.seed >= 0
+
+
+def test_diversidade_e_duplicados():
+    """Distância de Hamming média por pares e detecção de genomas repetidos"""
+    rng = np.random.default_rng(5)
+    populacao = rng.random((12, 4, genoma.N_DIAS, genoma.N_TURNOS)) < 0.5
+    populacao[7] = populacao[2]
+    populacao[9] = populacao[2]
+    
+    distancias = [
+        (populacao[i] != populacao[j]).mean()
+        for i in range(len(populacao)) for j in range(i + 1, len(populacao))
+    ]
+    assert genoma.diversidade(populacao) == pytest.approx(np.mean(distancias))
+    assert genoma.diversidade(populacao[[2, 7]]) == 0.0
+    assert np.flatnonzero(genoma.duplicados(populacao)).tolist() == [7, 9]
+
+
+def test_populacao_sem_duplicados_e_com_imigrantes():
+    """Filhos repetidos são perturbados e a diversidade baixa traz imigrantes"""
+    config = criar_config(parametros={"pop_size": 20, "n_geracoes": 40, "seed": 3})
+    service = EscalaGeneticaService(config)
+    for _ in service.evoluir():
+        assert not genoma.duplicados(service.populacao).any()
+    assert len(service.evolucao_diversidade) == 40
+    assert all(0 <= d <= 1 for d in service.evolucao_diversidade)
+    
+    parametros = {"pop_size": 20, "n_geracoes": 10, "seed": 3, "diversidade_minima": 0.5, "fracao_imigrantes": 0.25}
+    service = EscalaGeneticaService(criar_config(parametros=parametros))
+    resultado = service.montar_resultado(*service.otimizar())
+    assert resultado.diagnostico.imigrantes_inseridos == 10 * 5
+    assert service.num_avaliacoes == 20 * 10 + 10 * 5
+    assert resultado.evolucao_diversidade == service.evolucao_diversidade
+
+
+def test_operadores_preservam_estrutura():
+    """Cruzamento por linha herda linhas inteiras e as mutações por bloco mantêm a carga semanal"""
+    rng = np.random.default_rng(11)
+    pais1 = genoma.gerar_populacao(rng, 20, 6, 5, n_semanas=2)
+    pais2 = genoma.gerar_populacao(rng, 20, 6, 5, n_semanas=2)
+    
+    filhos = operadores.cruzamento_funcionario(rng, pais1, pais2)
+    de_pai1 = (filhos == pais1).all(axis=(2, 3))
+    assert (de_pai1 | (filhos == pais2).all(axis=(2, 3))).all()
+    
+    filhos = operadores.cruzamento_dois_pontos(rng, pais1, pais2)
+    assert ((filhos == pais1) | (filhos == pais2)).all()
+    
+    carga = pais1.reshape(20, 6, 2, genoma.N_DIAS, genoma.N_TURNOS).sum(axis=(3, 4))
+    for mutacao in (operadores.mutacao_trocar, operadores.mutacao_mover):
+        mutados = mutacao(rng, pais1.copy(), 1.0, np.array([True] * 5 + [False]))
+        assert (mutados[:, 5] == pais1[:, 5]).all()
+        assert not (mutados == pais1).all()
+        nova_carga = mutados.reshape(20, 6, 2, genoma.N_DIAS, genoma.N_TURNOS).sum(axis=(3, 4))
+        assert (nova_carga <= carga).all() and (nova_carga >= carga - 1).all()
+    
+    mutados = operadores.mutacao_trocar(rng, pais1.copy(), 1.0)
+    assert (mutados.reshape(20, 6, 2, -1).sum(axis=-1) == carga).all()
+
+
+@pytest.mark.parametrize("selecao", ["torneio", "ranking", "sus"])
+def test_selecao_favorece_os_melhores(selecao):
+    """Todos os operadores de seleção escolhem mais vezes os indivíduos de menor fitness"""
+    rng = np.random.default_rng(2)
+    fitness = rng.permutation(np.arange(30) * 10)
+    pais = operadores.SELECAO[selecao](rng, fitness, 3000, 3)
+    assert pais.shape == (3000,) and pais.min() >= 0 and pais.max() < 30
+    assert fitness[pais].mean() < fitness.mean()
+
+
+def test_otimizar_com_operadores_por_bloco():
+    """Operadores escolhidos em ParametrosAlgoritmo chegam a uma escala viável"""
+    parametros = {
+        "pop_size": 30, "n_geracoes": 100, "fracao_construtiva": 0.0, "seed": 4, "fitness_alvo": 0,
+        "selecao": "ranking", "cruzamento": "funcionario", "mutacao": "trocar", "taxa_mutacao": 0.1,
+    }
+    service = EscalaGeneticaService(criar_config(12, cobertura_minima=2, parametros=parametros))
+    melhor, _, _ = service.otimizar()
+    assert service.contar_violacoes(melhor) == 0
+
+
+def test_layout_e_conversao_de_escala_parcial():
+    """Tabelas do layout e linhas com dias ou turnos faltando na escala inicial"""
+    horizonte = layout(2)
+    assert layout(2) is horizonte
+    assert horizonte.dias[horizonte.indice_dia["domingo_2"]] == "domingo_2"
+    mascara = genoma.mascara_preferencias([["domingo", "segunda_2", "feriado"]], 2)
+    assert np.flatnonzero(mascara[0]).tolist() == [6, 7, 13]
+    
+    dias = genoma.nomes_dias(2)
+    escala = {
+        1: {dia: {"manha": 0, "tarde": 1, "noite": 0} for dia in dias},
+        3: {"terça_2": {"noite": 1}},
+    }
+    individuo, presentes = genoma.de_dict_parcial(escala, [1, 2, 3], dias)
+    assert presentes.tolist() == [True, False, True]
+    assert individuo[0, :, 1].all() and individuo[0].sum() == len(dias)
+    assert np.argwhere(individuo[2]).tolist() == [[8, 2]]
+    assert genoma.para_dict(individuo, [1, 2, 3], dias)[3]["terça_2"] == {"manha": 0, "tarde": 0, "noite": 1}